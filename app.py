@@ -1,10 +1,26 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify
+from flask import Flask, Response, render_template, request, redirect, url_for, jsonify, make_response
 
 from flask import Flask
 from flask_wtf.csrf import CSRFProtect
+import io
+import shutil
 import sqlite3
-
-from list_manager import ListManager, Task
+import tempfile
+import click
+
+import db
+import migrations
+import records
+from list_manager import ListManager, Task, COMPLETED_PAGE_SIZE, MAX_COMPLETED_PAGE, decode_completed_cursor
+from dashboard import load_dashboard
+from conditional import conditional
+import calendar_service
+import recurrence
+import changes
+import events
+import search
+import transfer
+from cache import data_cache, bump_data_version, SHARED_SCOPE
 from utils import get_daily_video
 from datetime import date, timedelta
 
@@ -19,6 +35,8 @@ import random
 from user_model import User  # <— von hier holen wir User
 
 app = Flask(__name__)
+# Zeilen aus der DB (records.Record) direkt an jsonify übergeben können
+app.json = records.RecordJSONProvider(app)
 
 # Secret Key – in Produktion über Umgebungsvariable setzen!
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev‐fallback‐key')  # Session‑Cookie hart machen
@@ -35,6 +53,12 @@ app.config["REMEMBER_COOKIE_SECURE"] = True  # falls du Flask‑Login nutzt
 # CSRF global aktivieren
 csrf = CSRFProtect(app)
 
+# Eine DB-Verbindung pro Request, wird beim Teardown an den Pool zurückgegeben
+db.init_app(app)
+
+# Schema auf den neuesten Stand bringen (PRAGMA user_version, siehe migrations.py)
+migrations.migrate(db.DATABASE)
+
 
 # 1) LoginManager hier erzeugen
 login_manager = LoginManager()
@@ -81,6 +105,7 @@ app.register_blueprint(timeline_bp, url_prefix="/timeline")
 from timeline_manager import TimelineManager
 timeline_manager = TimelineManager()
 
+import habits
 from habits import habits_bp
 app.register_blueprint(habits_bp, url_prefix="/habits")
 
@@ -169,15 +194,16 @@ def add_task(list_name):
 
     # Speziallisten → KEINE Hierarchie
     if list_name in ["Today", "Next Day", "This Week", "This Month"]:
-        conn = manager.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO special_list_tasks
-            (special_list_name, title, description, due_date, completed, estimated_time, user_id)
-            VALUES (?, ?, ?, ?, 0, ?, ?)
-        """, (list_name, title, description, due_date, estimated_time, current_user.id))
-        conn.commit()
-        conn.close()
+        with manager.get_db_connection(write=True) as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT INTO special_list_tasks
+                (special_list_name, title, description, due_date, completed, estimated_time, user_id)
+                VALUES (?, ?, ?, ?, 0, ?, ?)
+            """, (list_name, title, description, due_date, estimated_time, current_user.id))
+            bump_data_version(cur, current_user.id)
+            conn.commit()
+            events.notify()
 
     # Normale Listen → MIT parent_id
     else:
@@ -227,15 +253,16 @@ def add_task_to_today():
         estimated_time = 30  # Default-Wert
 
     # Neue Methode: Aufgabe in special_list_tasks einfügen
-    conn = manager.get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO special_list_tasks
-        (special_list_name, title, description, due_date, completed, estimated_time, user_id)
-        VALUES (?, ?, ?, ?, 0, ?, ?)
-    """, ("Today", title, description, due_date, estimated_time, current_user.id))
-    conn.commit()
-    conn.close()
+    with manager.get_db_connection(write=True) as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO special_list_tasks
+            (special_list_name, title, description, due_date, completed, estimated_time, user_id)
+            VALUES (?, ?, ?, ?, 0, ?, ?)
+        """, ("Today", title, description, due_date, estimated_time, current_user.id))
+        bump_data_version(cur, current_user.id)
+        conn.commit()
+        events.notify()
 
     return redirect(url_for("index"))
 
@@ -247,15 +274,16 @@ def add_task_to_next_day():
     estimated_time = int(request.form.get("estimated_time", 30))
     due_date = (date.today() + timedelta(days=1)).isoformat()
 
-    conn = manager.get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO special_list_tasks
-        (special_list_name, title, description, due_date, completed, estimated_time, user_id)
-        VALUES (?, ?, ?, ?, 0, ?, ?)
-    """, ("Next Day", title, description, due_date, estimated_time, current_user.id))
-    conn.commit()
-    conn.close()
+    with manager.get_db_connection(write=True) as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO special_list_tasks
+            (special_list_name, title, description, due_date, completed, estimated_time, user_id)
+            VALUES (?, ?, ?, ?, 0, ?, ?)
+        """, ("Next Day", title, description, due_date, estimated_time, current_user.id))
+        bump_data_version(cur, current_user.id)
+        conn.commit()
+        events.notify()
 
     return redirect(url_for("index"))
 @app.route("/add_task_to_this_week", methods=["POST"])
@@ -269,15 +297,16 @@ def add_task_to_this_week():
     week_end = week_start + timedelta(days=6)
     due_date = week_end.isoformat()  # Ende der Woche als Fälligkeitsdatum
 
-    conn = manager.get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO special_list_tasks
-        (special_list_name, title, description, due_date, completed, estimated_time, user_id)
-        VALUES (?, ?, ?, ?, 0, ?, ?)
-    """, ("This Week", title, description, due_date, estimated_time, current_user.id))
-    conn.commit()
-    conn.close()
+    with manager.get_db_connection(write=True) as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO special_list_tasks
+            (special_list_name, title, description, due_date, completed, estimated_time, user_id)
+            VALUES (?, ?, ?, ?, 0, ?, ?)
+        """, ("This Week", title, description, due_date, estimated_time, current_user.id))
+        bump_data_version(cur, current_user.id)
+        conn.commit()
+        events.notify()
 
     return redirect(url_for("index"))
 
@@ -291,15 +320,16 @@ def add_task_to_this_month():
     next_month = (today.replace(day=1) + timedelta(days=31)).replace(day=1)
     due_date = next_month.isoformat()  # Erster Tag nächsten Monats
 
-    conn = manager.get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO special_list_tasks
-        (special_list_name, title, description, due_date, completed, estimated_time, user_id)
-        VALUES (?, ?, ?, ?, 0, ?, ?)
-    """, ("This Month", title, description, due_date, estimated_time, current_user.id))
-    conn.commit()
-    conn.close()
+    with manager.get_db_connection(write=True) as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO special_list_tasks
+            (special_list_name, title, description, due_date, completed, estimated_time, user_id)
+            VALUES (?, ?, ?, ?, 0, ?, ?)
+        """, ("This Month", title, description, due_date, estimated_time, current_user.id))
+        bump_data_version(cur, current_user.id)
+        conn.commit()
+        events.notify()
 
     return redirect(url_for("index"))
 
@@ -319,23 +349,78 @@ def restore_list(list_name):
 @app.route("/archived_lists")
 @login_required
 def archived_lists():
-    archived = manager.get_archived_lists()  # Muss alle archivierten Listennamen zurückgeben
-    archived_lists_with_data = [
-        {
-            "name": list_name,
-            "color": manager.get_list_color(list_name),
-            "tasks": manager.get_tasks(list_name)
-        }
-        for list_name in archived
-    ]
-    return render_template("archive.html", archived_lists=archived_lists_with_data)
+    # Nur die Übersicht (eine Abfrage); die Tasks lädt die Seite beim Aufklappen nach
+    return conditional(
+        "archived_lists", (current_user.id,),
+        lambda: render_template("archive.html", archived_lists=manager.get_archived_list_summaries()),
+        html=True
+    )
+
+
+@app.route("/archived_lists/<list_name>/tasks")
+@login_required
+def archived_list_tasks(list_name):
+    return conditional(
+        "archived_list_tasks", (current_user.id,),
+        lambda: jsonify(manager.get_archived_tasks(list_name)),
+        extra=(list_name,)
+    )
+
+
+@app.route("/completed_tasks/<list_name>")
+@login_required
+def completed_tasks(list_name):
+    """
+    Weitere erledigte Tasks einer Liste ("Mehr laden"), siehe _completed_history.
+    """
+    return _completed_history("completed_tasks", list_name, manager.get_completed_tasks)
+
+
+@app.route("/special_lists/<list_name>/completed")
+@login_required
+def special_list_completed(list_name):
+    return _completed_history("special_list_completed", list_name, manager.get_special_list_completed)
+
+
+def _completed_history(namespace, list_name, load):
+    """
+    Parameter: after (Cursor aus "next" bzw. X-Next-Cursor), limit, format=json|html.
+    json liefert {"tasks": [...], "next": ...}; html die <li>-Elemente zum Anhängen,
+    den Cursor der nächsten Seite dann im Header X-Next-Cursor.
+    """
+    after = request.args.get("after") or None
+    output = request.args.get("format", "json")
+    try:
+        limit = int(request.args.get("limit", COMPLETED_PAGE_SIZE))
+        if after:
+            decode_completed_cursor(after)
+    except ValueError:
+        return jsonify({"error": "invalid limit or cursor"}), 400
+    if not 1 <= limit <= MAX_COMPLETED_PAGE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_COMPLETED_PAGE}"}), 400
+    if output not in ("json", "html"):
+        return jsonify({"error": "format must be json or html"}), 400
+
+    def build():
+        page = load(list_name, limit, after)
+        if output == "json":
+            return jsonify(page)
+        response = make_response(render_template("completed_tasks.html", tasks=page["tasks"]))
+        if page["next"]:
+            response.headers["X-Next-Cursor"] = page["next"]
+        return response
+
+    return conditional(namespace, (current_user.id,), build, extra=(list_name, after, limit, output))
 
 
 @app.route("/view_list/<list_name>")
 @login_required
 def view_list(list_name):
-    tasks = manager.get_tasks(list_name)
-    return render_template("view_lists.html", list_name=list_name, tasks=tasks)
+    return conditional(
+        "view_list", (current_user.id,),
+        lambda: render_template("view_lists.html", list_name=list_name, tasks=manager.get_tasks(list_name)),
+        extra=(list_name,), html=True
+    )
 
 
 
@@ -347,177 +432,38 @@ def index():
     Fetches all lists, including special lists (Today, Next Day, This Week, and This Month).
     Jetzt werden zusätzlich auch die Milestones aus der Timeline in den jeweiligen Datumsbereichen
     mit aufgenommen.
+    Alle Bereiche kommen aus einem einzigen Durchlauf von load_dashboard (siehe dashboard.py).
     """
-    from datetime import date, timedelta
-    today = date.today()
-    tomorrow = today + timedelta(days=1)
-    week_start = today - timedelta(days=today.weekday())
-    week_end = week_start + timedelta(days=6)
-    month_start = today.replace(day=1)
-    next_month = (month_start + timedelta(days=31)).replace(day=1)
-    month_end = next_month - timedelta(days=1)
-
-    # ---------------------------
-    # TODAY Tasks & Milestones
-    # ---------------------------
-    # Normale Tasks für Today
-    today_incomplete = manager.get_tasks_for_date_range(today.isoformat(), today.isoformat(), completed=False)
-    today_completed = manager.get_tasks_for_date_range(today.isoformat(), today.isoformat(), completed=True)
-
-
-    # Milestones, die heute fällig sind
-    today_milestones = timeline_manager.get_milestones_for_date_range(today.isoformat(), today.isoformat())
-    today_milestones_converted = []
-    for m in today_milestones:
-        # Wir wandeln die Milestone-Daten in ein Tuple um, das dem Format der Tasks entspricht:
-        # (id, title, category, due_date, completed)
-        today_milestones_converted.append((
-            m["id"],
-            f"{m['title']} (Goal: {m['goal_title']})",
-            "milestone",
-            m["due_date"],
-            m["completed"]
-        ))
-    # Füge die Meilensteine den normalen Tasks hinzu (je nach Status)
-    for milestone in today_milestones_converted:
-        if milestone[4]:
-            today_completed.append(milestone)
-        else:
-            today_incomplete.append(milestone)
-    today_tasks = {"incomplete": today_incomplete, "completed": today_completed}
-
-    # ---------------------------
-    # TOMORROW Tasks & Milestones
-    # ---------------------------
-    tomorrow_incomplete = manager.get_tasks_for_date_range(tomorrow.isoformat(), tomorrow.isoformat(), completed=False)
-    tomorrow_completed = manager.get_tasks_for_date_range(tomorrow.isoformat(), tomorrow.isoformat(), completed=True)
-    tomorrow_milestones = timeline_manager.get_milestones_for_date_range(tomorrow.isoformat(), tomorrow.isoformat())
-    tomorrow_milestones_converted = []
-    for m in tomorrow_milestones:
-        tomorrow_milestones_converted.append((
-            m["id"],
-            f"{m['title']} (Goal: {m['goal_title']})",
-            "milestone",
-            m["due_date"],
-            m["completed"]
-        ))
-    for milestone in tomorrow_milestones_converted:
-        if milestone[4]:
-            tomorrow_completed.append(milestone)
-        else:
-            tomorrow_incomplete.append(milestone)
-    next_day_tasks = {"incomplete": tomorrow_incomplete, "completed": tomorrow_completed}
-
-    # ---------------------------
-    # WEEK Tasks & Milestones
-    # ---------------------------
-    week_incomplete = manager.get_tasks_for_date_range(week_start.isoformat(), week_end.isoformat(), completed=False, exclude_lists=["Today", "Next Day"])
-    week_completed = manager.get_tasks_for_date_range(week_start.isoformat(), week_end.isoformat(), completed=True, exclude_lists=["Today", "Next Day"])
-    week_milestones = timeline_manager.get_milestones_for_date_range(week_start.isoformat(), week_end.isoformat())
-    week_milestones_converted = []
-    for m in week_milestones:
-        week_milestones_converted.append((
-            m["id"],
-            f"{m['title']} (Goal: {m['goal_title']})",
-            "milestone",
-            m["due_date"],
-            m["completed"]
-        ))
-    for milestone in week_milestones_converted:
-        if milestone[4]:
-            week_completed.append(milestone)
-        else:
-            week_incomplete.append(milestone)
-    week_tasks = {"incomplete": week_incomplete, "completed": week_completed}
-
-    # ---------------------------
-    # MONTH Tasks & Milestones
-    # ---------------------------
-    month_incomplete = manager.get_tasks_for_date_range(
-        month_start.isoformat(), month_end.isoformat(),
-        completed=False,
-        exclude_lists=["Today", "Next Day", "This Week"],
-        exclude_date_range=(week_start.isoformat(), week_end.isoformat())
-    )
-    month_completed = manager.get_tasks_for_date_range(
-        month_start.isoformat(), month_end.isoformat(),
-        completed=True,
-        exclude_lists=["Today", "Next Day", "This Week"],
-        exclude_date_range=(week_start.isoformat(), week_end.isoformat())
-    )
+    def render():
+        # Ab diesem Cursor schiebt /events Änderungen nach (siehe scripts.js)
+        with manager.get_db_connection() as conn:
+            sync_cursor = changes.latest_cursor(conn)
+
+        # Gecacht pro User + Timeline-Version; ändert sich nichts, wird kein SQL ausgeführt
+        context = data_cache.get_or_load(
+            "dashboard", (current_user.id, SHARED_SCOPE), (date.today().isoformat(),),
+            lambda: load_dashboard(manager, current_user.id)
+        )
+        # Alle Daten an das Template übergeben
+        return render_template("index.html", sync_cursor=sync_cursor, **context)
 
-    # Statt den reinen Milestone-Datensätzen fügen wir jetzt die Milestone-Tasks hinzu:
-    month_milestones = timeline_manager.get_milestones_for_date_range(month_start.isoformat(), month_end.isoformat())
-    for m in month_milestones:
-        # Für jedes Milestone holen wir die zugehörigen Aufgaben
-        milestone_tasks = timeline_manager.get_tasks_for_milestone(m["id"])
-        # Konvertiere die Tasks in Dictionary-Form (falls noch nicht geschehen)
-        tasks_list = [dict(task) for task in milestone_tasks]
-
-        # Für jeden Task erstellen wir einen Eintrag, bei dem der Task-Titel
-        # mit dem Namen des Goals in Klammern versehen wird.
-        for task in tasks_list:
-            entry = (
-                task["id"],
-                f"{task['title']} ({m['goal_title']})",
-                "milestone_task",  # Verwende eine eigene Kategorie, z.B. "milestone_task"
-                m["due_date"],  # Wir übernehmen das Due-Datum des Milestones
-                task["completed"]
-            )
-            if task["completed"]:
-                month_completed.append(entry)
-            else:
-                month_incomplete.append(entry)
-
-    # Zusammensetzen der Monatsliste
-    month_tasks = {"incomplete": month_incomplete, "completed": month_completed}
-
-    # ---------------------------
-    # Normale Listen
-    # ---------------------------
-    all_lists = [
-        list_name for list_name in manager.get_all_lists()
-        if list_name not in ["Today", "Next Day", "This Week", "This Month"]
-    ]
-    all_lists_with_colors_and_tasks = [
-        {
-            "name": list_name,
-            "color": manager.get_list_color(list_name),
-            "tasks": manager.get_tasks(list_name),
-        }
-        for list_name in all_lists
-    ]
-
-    # Speziallisten Tasks hinzufügen
-    today_special_tasks = manager.get_special_list_tasks("Today")
-    for status in ["incomplete", "completed"]:
-        today_tasks[status].extend(today_special_tasks[status])
-
-    tomorrow_special_tasks = manager.get_special_list_tasks("Next Day")
-    for status in ["incomplete", "completed"]:
-        next_day_tasks[status].extend(tomorrow_special_tasks[status])
-
-    week_special_tasks = manager.get_special_list_tasks("This Week")
-    for status in ["incomplete", "completed"]:
-        week_tasks[status].extend(week_special_tasks[status])
-
-    month_special_tasks = manager.get_special_list_tasks("This Month")
-    for status in ["incomplete", "completed"]:
-        month_tasks[status].extend(month_special_tasks[status])
-
-    # Alle Daten an das Template übergeben
-    return render_template(
-        "index.html",
-        lists=all_lists_with_colors_and_tasks,
-        today_tasks=today_tasks,
-        next_day_tasks=next_day_tasks,
-        week_tasks=week_tasks,
-        month_tasks=month_tasks
-    )
+    # Hat der Browser die Seite schon in diesem Stand, reicht ein 304
+    return conditional("index", (current_user.id, SHARED_SCOPE), render, html=True)
 
 @app.route("/special_lists")
 @login_required
 def special_lists():
+    def render():
+        context = data_cache.get_or_load(
+            "special_lists", (current_user.id,), (date.today().isoformat(),),
+            _load_special_lists
+        )
+        return render_template("special_lists.html", **context)
+
+    return conditional("special_lists", (current_user.id,), render, html=True)
+
+
+def _load_special_lists():
     today = date.today()
     tomorrow = today + timedelta(days=1)
     week_start = today - timedelta(days=today.weekday())
@@ -532,23 +478,11 @@ def special_lists():
     week_tasks = manager.get_tasks_for_date_range(week_start.isoformat(), week_end.isoformat())
     month_tasks = manager.get_tasks_for_date_range(month_start.isoformat(), month_end.isoformat())
 
-    # Normale Listen
-    lists = manager.get_all_lists()
-    all_lists_with_colors_and_tasks = [
-        {
-            "name": list_name,
-            "color": manager.get_list_color(list_name),
-            "tasks": manager.get_tasks(list_name),
-        }
-        for list_name in lists
-    ]
-
-    return render_template("special_lists.html",
-                           today_tasks=today_tasks,
-                           next_day_tasks=next_day_tasks,
-                           week_tasks=week_tasks,
-                           month_tasks=month_tasks,
-                           lists=all_lists_with_colors_and_tasks)
+    # Die normalen Listen zeigt diese Seite nicht – load_lists wäre hier nur Ballast
+    return dict(today_tasks=today_tasks,
+                next_day_tasks=next_day_tasks,
+                week_tasks=week_tasks,
+                month_tasks=month_tasks)
 
 
 @app.route("/toggle_task/<int:task_id>", methods=["POST"])
@@ -591,6 +525,34 @@ def delete_task(task_id):
     return "OK", 200
 
 
+@app.route("/task/<int:task_id>")
+@login_required
+def task_details(task_id):
+    """
+    Ein Task mit Beschreibung und allen Feldern als JSON – die Listen laden das
+    erst beim Aufklappen (siehe static/task_details.js).
+    """
+    def build():
+        task = manager.get_task_details(task_id)
+        if task is None:
+            return jsonify({"error": "not found"}), 404
+        return jsonify(task)
+
+    return conditional("task", (current_user.id,), build, extra=(task_id,))
+
+
+@app.route("/task/<int:task_id>/subtree")
+@login_required
+def task_subtree(task_id):
+    """
+    Task mit allen Unteraufgaben (flach, mit depth) als JSON.
+    """
+    rows = manager.get_subtree(task_id)
+    if not rows:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(rows)
+
+
 @app.route("/calendar")
 @login_required
 def calendar():
@@ -617,16 +579,28 @@ def calendar():
     # Tage des Monats berechnen
     days = monthcalendar(year, month)
 
-    # Aufgaben für den aktuellen Monat abrufen
-    calendar_tasks = manager.get_calendar_tasks(year, month)
+    def render():
+        # Cursor vor den Daten lesen: was danach geändert wird, holt calendar.js über /api/changes
+        with manager.get_db_connection() as conn:
+            sync_cursor = changes.latest_cursor(conn)
+
+        # Einmalige und wiederkehrende Aufgaben des Monats in einem Durchgang
+        start, end = calendar_service.month_range(year, month)
+        tasks = _calendar_entries(start, end)
+
+        return render_template("calendar.html", days=days, tasks=tasks,
+                               tasks_by_date=calendar_service.group_by_date(tasks),
+                               month=month, year=year, sync_cursor=sync_cursor)
 
-    # Wiederkehrende Aufgaben generieren
-    recurring_tasks = manager.get_calendar_tasks_with_recurring(year, month, include_recurring=True)
+    return conditional("calendar", (current_user.id,), render, extra=(year, month), html=True)
 
-    # Kombiniere normale und wiederkehrende Aufgaben
-    all_tasks = list(calendar_tasks) + recurring_tasks
 
-    return render_template("calendar.html", days=days, tasks=all_tasks, month=month, year=year)
+def _calendar_entries(start, end, include_recurring=True):
+    return data_cache.get_or_load(
+        "calendar", (current_user.id,),
+        (start.isoformat(), end.isoformat(), include_recurring),
+        lambda: calendar_service.load_calendar(manager, current_user.id, start, end, include_recurring)
+    )
 
 
 @app.route("/update_task_date/<int:task_id>", methods=["POST"])
@@ -665,15 +639,16 @@ def move_task_to_special_list():
     task_id = data["taskId"]
     special_list_name = data["specialListName"]
 
-    conn = manager.get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE special_list_tasks
-        SET special_list_name = ?
-        WHERE id = ? AND user_id = ?
-    """, (special_list_name, task_id, current_user.id))
-    conn.commit()
-    conn.close()
+    with manager.get_db_connection(write=True) as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE special_list_tasks
+            SET special_list_name = ?
+            WHERE id = ? AND user_id = ?
+        """, (special_list_name, task_id, current_user.id))
+        bump_data_version(cur, current_user.id)
+        conn.commit()
+        events.notify()
     return "OK", 200
 
 
@@ -684,42 +659,55 @@ def add_calendar_task():
     date = request.form.get("date")
     category = request.form.get("category")
 
-    connection = manager.get_db_connection()
-    cursor = connection.cursor()
-
-    # 🔍 Prüfen, ob die Aufgabe mit gleicher Title, Date & Category bereits existiert
-    cursor.execute("SELECT COUNT(*) FROM calendar_tasks WHERE title = ? AND date = ? AND category = ?",
-                   (title, date, category))
-    exists = cursor.fetchone()[0]
+    # 🔍 Nur hinzufügen, wenn der User die Aufgabe (Title, Date & Category) noch nicht hat
+    if not manager.task_exists_in_calendar(title, date, category):
+        manager.add_calendar_task(title, date, category)
 
-    if exists == 0:  # Falls die Aufgabe noch nicht existiert, füge sie hinzu
-        cursor.execute("""
-            INSERT INTO calendar_tasks (title, date, category)
-            VALUES (?, ?, ?)
-        """, (title, date, category))
-        connection.commit()
-
-    connection.close()
     return redirect(url_for("calendar"))
 
 @app.route("/calendar/<int:year>/<int:month>")
 @login_required
 def get_calendar_for_month(year, month):
-    from calendar import monthcalendar
-
-    days = monthcalendar(year, month)
-    tasks_data = manager.get_calendar_tasks(year, month)  # Holt Aufgaben
+    if not 1 <= month <= 12:
+        return jsonify({"error": "invalid month"}), 400
+
+    start, end = calendar_service.month_range(year, month)
+    include_recurring = request.args.get("include_recurring", "1") != "0"
+    return conditional(
+        "calendar_month", (current_user.id,),
+        lambda: jsonify({
+            "year": year,
+            "month": month,
+            "days": monthcalendar(year, month),
+            "tasks": _calendar_entries(start, end, include_recurring)
+        }),
+        extra=(year, month, include_recurring)
+    )
 
-    if isinstance(tasks_data, tuple):  # Falls zwei Werte zurückgegeben werden
-        tasks, column_names = tasks_data
-    else:
-        tasks = tasks_data
-        column_names = ["title", "date", "category"]  # Setze Standardwerte
 
-    return jsonify({
-        "days": days,
-        "tasks": [dict(zip(column_names, row)) for row in tasks]
-    })
+@app.route("/calendar/range")
+@login_required
+def get_calendar_range():
+    """
+    Kalender-Einträge für ein beliebiges Fenster [start, end), z.B. die
+    Nachbarmonate zum Vorladen oder ein ganzes Jahr.
+    """
+    try:
+        start, end = calendar_service.parse_range(request.args.get("start", ""),
+                                                  request.args.get("end", ""))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    include_recurring = request.args.get("include_recurring", "1") != "0"
+    return conditional(
+        "calendar_range", (current_user.id,),
+        lambda: jsonify({
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "tasks": _calendar_entries(start, end, include_recurring)
+        }),
+        extra=(start, end, include_recurring)
+    )
 
 
 
@@ -730,15 +718,35 @@ def add_recurring_task():
     frequency = request.form.get("frequency")
     start_date = request.form.get("start_date")
     interval_value = request.form.get("interval_value")  # Optionales Feld
+    end_date = request.form.get("end_date") or None     # Optionales Feld
+
+    if frequency not in recurrence.FREQUENCIES:
+        return "Unknown frequency", 400
 
     # Standardwert für interval_value setzen, falls nicht angegeben
     interval_value = int(interval_value) if interval_value else 1
 
     # Speichere die wiederkehrende Aufgabe in der Datenbank
-    manager.add_recurring_task(title, frequency, start_date, interval_value)
+    manager.add_recurring_task(title, frequency, start_date, interval_value, end_date)
     return redirect(url_for("calendar"))
 
 
+@app.route("/skip_recurring_task/<int:recurring_task_id>", methods=["POST"])
+@login_required
+def skip_recurring_task(recurring_task_id):
+    """
+    Lässt einen einzelnen Termin einer wiederkehrenden Aufgabe aus.
+    """
+    skip_date = (request.get_json(silent=True) or {}).get("date")
+    try:
+        datetime.date.fromisoformat(skip_date or "")
+    except ValueError:
+        return jsonify({"error": "invalid date"}), 400
+
+    manager.skip_recurring_occurrence(recurring_task_id, skip_date)
+    return "OK", 200
+
+
 
 
 
@@ -795,5 +803,204 @@ def update_task_order():
 
 
 
+MAX_BATCH_OPERATIONS = 500
+
+
+@app.route("/api/batch", methods=["POST"])
+@login_required
+def batch():
+    """
+    Mehrere Task-Operationen in einer Transaktion, siehe ListManager.apply_batch.
+    Body: {"operations": [{"op": "toggle", "ids": [1, 2], "completed": true}, ...]}
+    """
+    data = request.get_json(silent=True) or {}
+    operations = data.get("operations")
+    if not isinstance(operations, list) or not all(isinstance(op, dict) for op in operations):
+        return jsonify({"ok": False, "error": "operations must be a list of objects"}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({"ok": False, "error": f"at most {MAX_BATCH_OPERATIONS} operations"}), 400
+
+    ok, results = manager.apply_batch(operations)
+    return jsonify({"ok": ok, "results": results}), 200 if ok else 400
+
+
+@app.route("/api/changes")
+@login_required
+def api_changes():
+    """
+    Änderungen seit dem Cursor since (siehe changes.py), für Clients mit lokaler Kopie.
+    """
+    try:
+        since = int(request.args.get("since", 0))
+        limit = int(request.args.get("limit", changes.DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "since and limit must be integers"}), 400
+    if since < 0 or not 1 <= limit <= changes.MAX_LIMIT:
+        return jsonify({"error": f"since must be >= 0 and limit between 1 and {changes.MAX_LIMIT}"}), 400
+
+    return jsonify(changes.load_changes(manager, current_user.id, since, limit))
+
+
+@app.route("/search")
+@login_required
+def search_tasks():
+    """
+    Volltextsuche (siehe search.py). Parameter: q, limit, after (Cursor aus "next").
+    """
+    query = request.args.get("q", "")
+    after = request.args.get("after") or None
+    try:
+        limit = int(request.args.get("limit", search.DEFAULT_LIMIT))
+        if after:
+            search.decode_cursor(after)
+    except ValueError:
+        return jsonify({"error": "invalid limit or cursor"}), 400
+    if not 1 <= limit <= search.MAX_LIMIT:
+        return jsonify({"error": f"limit must be between 1 and {search.MAX_LIMIT}"}), 400
+
+    return conditional(
+        "search", (current_user.id, SHARED_SCOPE),
+        lambda: jsonify(search.search(manager, current_user.id, query, limit, after)),
+        extra=(query, limit, after)
+    )
+
+
+@app.cli.command("rebuild-search")
+@click.option("--chunk-size", default=search.REBUILD_CHUNK, show_default=True,
+              help="Zeilen pro Transaktion")
+def rebuild_search(chunk_size):
+    """Baut den Volltextindex in kleinen Transaktionen neu auf."""
+    total = search.rebuild(chunk_size=chunk_size,
+                           progress=lambda table, count: click.echo(f"{table}: {count}"))
+    click.echo(f"{total} Einträge indiziert.")
+
+
+@app.cli.command("repair-progress")
+def repair_progress():
+    """Zählt den Fortschritt von Meilensteinen und Zielen neu."""
+    milestones, goals = timeline_manager.repair_progress_counters()
+    click.echo(f"{milestones} Meilensteine und {goals} Ziele korrigiert.")
+
+
+@app.cli.command("import-legacy-habits")
+@click.argument("username")
+def import_legacy_habits(username):
+    """Übernimmt den gemeinsamen Tracker (daily_habits) als eigene Gewohnheiten eines Users."""
+    user = User.find_by_username(username)
+    if user is None:
+        raise click.ClickException(f"Unbekannter User {username!r}")
+    with habits.get_db_connection(write=True) as conn:
+        cursor = conn.cursor()
+        days = habits.import_daily_habits(cursor, user.id)
+        bump_data_version(cursor, user.id)
+        conn.commit()
+    click.echo(f"{days} Tage übernommen.")
+
+
+EXPORT_FORMATS = {
+    "ndjson": (transfer.export_ndjson, "application/x-ndjson"),
+    "json": (transfer.export_json, "application/json"),
+}
+
+
+@app.route("/export")
+@login_required
+def export_data():
+    """
+    Alle Daten des Users als Download, gestreamt (siehe transfer.py).
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+
+    export, mimetype = EXPORT_FORMATS[fmt]
+    response = Response(export(db.DATABASE, current_user.id), mimetype=mimetype)
+    filename = f"export-{current_user.username}-{date.today().isoformat()}.{fmt}"
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@app.route("/import", methods=["POST"])
+@login_required
+def import_data():
+    """
+    Importiert einen Export in das Konto des Users – als Datei-Upload (Feld "file")
+    oder als Request-Body. Antwort: Statistik mit Durchsatz.
+    """
+    upload = request.files.get("file")
+    if upload is not None:
+        raw = upload.stream
+    else:
+        # Der Import liest zweimal – der Body muss dafür zwischengespeichert werden
+        raw = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        shutil.copyfileobj(request.stream, raw)
+        raw.seek(0)
+
+    try:
+        stats = transfer.import_records(db.DATABASE, current_user.id, io.TextIOWrapper(raw, encoding="utf-8"))
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    return jsonify({"ok": True, **stats})
+
+
+@app.cli.command("export-user")
+@click.argument("username")
+@click.option("--output", "-o", type=click.File("w", encoding="utf-8"), default="-",
+              help="Zieldatei (Standard: stdout)")
+@click.option("--format", "fmt", type=click.Choice(list(EXPORT_FORMATS)), default="ndjson", show_default=True)
+def export_user(username, output, fmt):
+    """Exportiert alle Daten eines Users."""
+    user = User.find_by_username(username)
+    if user is None:
+        raise click.ClickException(f"User {username!r} nicht gefunden.")
+    export, _ = EXPORT_FORMATS[fmt]
+    for chunk in export(db.DATABASE, user.id):
+        output.write(chunk)
+
+
+@app.cli.command("import-user")
+@click.argument("username")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False))
+@click.option("--chunk-size", default=transfer.IMPORT_CHUNK, show_default=True,
+              help="Zeilen pro Transaktion")
+def import_user(username, source, chunk_size):
+    """Importiert einen Export in das Konto eines Users."""
+    user = User.find_by_username(username)
+    if user is None:
+        raise click.ClickException(f"User {username!r} nicht gefunden.")
+    try:
+        # Datei statt stdin: der Import liest sie zweimal (Prüfen, dann Schreiben)
+        with open(source, encoding="utf-8") as stream:
+            stats = transfer.import_records(db.DATABASE, user.id, stream, chunk_size)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for record_type, count in stats["by_type"].items():
+        click.echo(f"{record_type}: {count}")
+    if stats["skipped"]:
+        click.echo(f"{stats['skipped']} Datensätze der gemeinsamen Timeline/Habits übersprungen.")
+    click.echo(f"{stats['records']} Datensätze in {stats['seconds']} s "
+               f"({stats['records_per_second']}/s).")
+
+
+@app.route("/events")
+@login_required
+def event_stream():
+    """
+    Server-Sent Events mit den Änderungen des Users (siehe events.py).
+    Beim Neuverbinden schickt der Browser Last-Event-ID, beim ersten Mal kann
+    der Cursor der Seite als ?since= mitgegeben werden.
+    """
+    since = request.headers.get("Last-Event-ID") or request.args.get("since")
+    try:
+        since = int(since) if since else None
+    except ValueError:
+        return jsonify({"error": "since must be an integer"}), 400
+
+    response = Response(events.stream(manager, current_user.id, since), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # nginx soll nicht puffern
+    return response
+
+
 if __name__ == "__main__":
     app.run(debug=True)  # Debug-Modus aktivieren
@@ -14,11 +14,11 @@ def register():
         username = request.form["username"]
         password = request.form["password"]
         pw_hash  = generate_password_hash(password)
-        conn = get_db_connection()
-        cur  = conn.cursor()
-        cur.execute("INSERT INTO users (username, password_hash) VALUES (?,?)",
-                    (username, pw_hash))
-        conn.commit(); conn.close()
+        with get_db_connection(write=True) as conn:
+            cur  = conn.cursor()
+            cur.execute("INSERT INTO users (username, password_hash) VALUES (?,?)",
+                        (username, pw_hash))
+            conn.commit()
         flash("Registrierung erfolgreich, bitte melde dich an.","success")
         return redirect(url_for("auth.login"))
     return render_template("register.html")
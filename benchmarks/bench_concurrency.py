@@ -0,0 +1,132 @@
+# benchmarks/bench_concurrency.py
+"""
+Gemischter Lese-/Schreib-Durchsatz auf einer tasks-Tabelle, einmal mit dem
+alten Setup (Rollback-Journal, sqlite3-Standardverbindung) und einmal mit dem
+Pragma-Profil aus db.py (WAL, synchronous=NORMAL, busy_timeout, ...).
+
+Jeder Thread hat seine eigene Verbindung, so wie mehrere Worker auf derselben
+tasks.db. Leser holen die Tasks einer Liste, Schreiber toggeln einzelne Tasks
+(wie /toggle_task) und committen jedes Mal.
+
+Aufruf: python benchmarks/bench_concurrency.py [sekunden] [leser] [schreiber]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import db  # noqa: E402
+
+USERS = 20
+LISTS_PER_USER = 10
+TASKS_PER_LIST = 50
+
+
+def create_database(path, pragmas):
+    conn = sqlite3.connect(path)
+    if pragmas:
+        db.apply_pragmas(conn, pragmas)
+    conn.execute("""
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            list_name TEXT, title TEXT, description TEXT, due_date TEXT,
+            completed INTEGER, user_id INTEGER, archived INTEGER DEFAULT 0,
+            parent_id INTEGER, position INTEGER DEFAULT 0
+        )
+    """)
+    rows = [
+        (f"List {l}", f"Task {t}", "x" * 200, "2026-10-18", t % 2, u, t)
+        for u in range(1, USERS + 1)
+        for l in range(LISTS_PER_USER)
+        for t in range(TASKS_PER_LIST)
+    ]
+    conn.executemany("""
+        INSERT INTO tasks (list_name, title, description, due_date, completed, user_id, position)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+    return len(rows)
+
+
+def run(path, pragmas, seconds, readers, writers, task_count):
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def connect():
+        conn = sqlite3.connect(path, check_same_thread=False)
+        if pragmas:
+            db.apply_pragmas(conn, pragmas)
+        return conn
+
+    def reader():
+        conn = connect()
+        n = 0
+        while time.monotonic() < stop:
+            user_id = random.randint(1, USERS)
+            conn.execute(
+                "SELECT id, title, description, due_date, completed, parent_id, position "
+                "FROM tasks WHERE list_name = ? AND user_id = ?",
+                (f"List {random.randrange(LISTS_PER_USER)}", user_id)
+            ).fetchall()
+            n += 1
+        conn.close()
+        with lock:
+            counts["reads"] += n
+
+    def writer():
+        conn = connect()
+        n = locked = 0
+        while time.monotonic() < stop:
+            try:
+                conn.execute("UPDATE tasks SET completed = 1 - completed WHERE id = ?",
+                             (random.randint(1, task_count),))
+                conn.commit()
+                n += 1
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                conn.rollback()
+                locked += 1
+        conn.close()
+        with lock:
+            counts["writes"] += n
+            counts["locked"] += locked
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return counts
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    writers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+    profiles = {
+        "rollback journal (vorher)": {},
+        "WAL-Profil (db.PRAGMAS)": dict(db.PRAGMAS),
+    }
+
+    print(f"{seconds:.0f}s, {readers} Leser, {writers} Schreiber")
+    for name, pragmas in profiles.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            task_count = create_database(path, pragmas)
+            counts = run(path, pragmas, seconds, readers, writers, task_count)
+        print(f"{name:28s} reads/s={counts['reads'] / seconds:9.0f} "
+              f"writes/s={counts['writes'] / seconds:7.0f} locked={counts['locked']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/bench_habit_analytics.py
+"""
+Eigene Gewohnheiten: eine Zeile pro erledigtem Tag (wie daily_habits, nur mit
+habit_id) gegen ein Bitset pro Gewohnheit und Jahr (habit_years, Migration 13).
+Gemessen werden die Jahres-Heatmap (habits.load_habit_year) und Serien plus
+7/30/90-Tage-Quoten über die ganze Historie (habits.load_habit_stats); die
+Zeilen-Variante rechnet dieselben Werte mit einer Schleife über die Tage.
+
+Aufruf: python benchmarks/bench_habit_analytics.py [gewohnheiten] [jahre]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+_tmp = tempfile.TemporaryDirectory()
+
+import db  # noqa: E402
+import habit_analytics  # noqa: E402
+import habits  # noqa: E402
+import migrations  # noqa: E402
+
+TODAY = date(2026, 10, 18)
+USER_ID = 1
+
+
+def create_database(path, count, years):
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE habit_rows (habit_id INTEGER, habit_date TEXT, PRIMARY KEY (habit_id, habit_date))")
+    rng = random.Random(42)
+    start = date(TODAY.year - years + 1, 1, 1)
+    cursor = conn.cursor()
+    for n in range(count):
+        habit_id = habits.create_habit(cursor, USER_ID, f"Gewohnheit {n}", start_date=start)
+        p = rng.uniform(0.3, 0.9)
+        done = [start + timedelta(days=i) for i in range((TODAY - start).days + 1) if rng.random() < p]
+        cursor.executemany("INSERT INTO habit_rows VALUES (?, ?)", [(habit_id, d.isoformat()) for d in done])
+        habits.set_habit_days(cursor, USER_ID, [(habit_id, d, 1) for d in done])
+    conn.commit()
+    return conn
+
+
+def year_from_rows(conn, year):
+    grids = {}
+    for row in conn.execute("""
+        SELECT d.id, r.habit_date FROM habit_definitions d
+        JOIN habit_rows r ON r.habit_id = d.id AND r.habit_date >= ? AND r.habit_date < ?
+        WHERE d.user_id = ?
+    """, (f"{year}-01-01", f"{year + 1}-01-01", USER_ID)):
+        days = grids.setdefault(row["id"], ["0"] * habit_analytics.days_in_year(year))
+        days[habit_analytics.day_index(date.fromisoformat(row["habit_date"]))] = "1"
+    return {habit_id: "".join(days) for habit_id, days in grids.items()}
+
+
+def stats_from_rows(conn):
+    # Schleife über alle Tage seit Beginn der Gewohnheit
+    result = {}
+    for habit in conn.execute("SELECT id, start_date FROM habit_definitions WHERE user_id = ?", (USER_ID,)).fetchall():
+        done = {row[0] for row in conn.execute("SELECT habit_date FROM habit_rows WHERE habit_id = ? AND habit_date <= ?",
+                                               (habit["id"], TODAY.isoformat()))}
+        start = date.fromisoformat(habit["start_date"])
+        longest = run = 0
+        day = start
+        while day <= TODAY:
+            run = run + 1 if day.isoformat() in done else 0
+            longest = max(longest, run)
+            day += timedelta(days=1)
+        current, day = 0, TODAY if TODAY.isoformat() in done else TODAY - timedelta(days=1)
+        while day.isoformat() in done:
+            current += 1
+            day -= timedelta(days=1)
+        ratios = {}
+        for window in habit_analytics.RATIO_WINDOWS:
+            days = min(window, (TODAY - start).days + 1)
+            ratios[str(window)] = round(sum((TODAY - timedelta(days=i)).isoformat() in done for i in range(days)) / days, 3)
+        result[habit["id"]] = (current, longest, ratios)
+    return result
+
+
+def timed(runs, function):
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        result = function()
+    return (time.perf_counter() - t0) / runs, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    years = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    runs = 5
+
+    conn = create_database(os.path.join(_tmp.name, "habits.db"), count, years)
+    rows = conn.execute("SELECT COUNT(*) FROM habit_rows").fetchone()[0]
+    blob_bytes = conn.execute("SELECT SUM(length(bits)) FROM habit_years WHERE year = ?", (TODAY.year,)).fetchone()[0]
+    year_rows = conn.execute("SELECT COUNT(*) FROM habit_rows WHERE habit_date >= ?", (f"{TODAY.year}-01-01",)).fetchone()[0]
+
+    old_year_s, old_year = timed(runs, lambda: year_from_rows(conn, TODAY.year))
+    new_year_s, new_year = timed(runs, lambda: habits.load_habit_year(conn.cursor(), USER_ID, TODAY.year))
+    old_stats_s, old_stats = timed(runs, lambda: stats_from_rows(conn))
+    new_stats_s, new_stats = timed(runs, lambda: habits.load_habit_stats(conn.cursor(), USER_ID, TODAY))
+
+    same = (all(old_year[h["id"]][:(TODAY - date(TODAY.year, 1, 1)).days + 1]
+                == h["days"][:(TODAY - date(TODAY.year, 1, 1)).days + 1] for h in new_year)
+            and all(old_stats[h["id"]] == (h["current_streak"], h["longest_streak"], h["ratios"]) for h in new_stats))
+    print(f"{count} Gewohnheiten × {years} Jahre, {rows} erledigte Tage")
+    print(f"Heatmap: Zeilen        {old_year_s * 1000:8.2f} ms  ({year_rows} Zeilen)")
+    print(f"Heatmap: Bitsets       {new_year_s * 1000:8.2f} ms  ({blob_bytes} Bytes)")
+    print(f"Statistik: Zeilen      {old_stats_s * 1000:8.2f} ms  (Schleife über die Tage)")
+    print(f"Statistik: Bitsets     {new_stats_s * 1000:8.2f} ms")
+    print("Gleiche Heatmaps und Statistiken" if same else "Ergebnis unterschiedlich!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_habits.py
+"""
+Habits-Seite nach längerer Abwesenheit: bisher ein INSERT pro fehlendem Tag
+(mit IntegrityError-Abfang) und danach die ganze Historie; jetzt eine
+INSERT ... WITH RECURSIVE-Anweisung (habits.fill_missing_days) und nur der
+angezeigte Zeitraum (habits.load_habit_page).
+
+Aufruf: python benchmarks/bench_habits.py [jahre_historie] [fehlende_tage]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+_tmp = tempfile.TemporaryDirectory()
+
+import db  # noqa: E402
+import habits  # noqa: E402
+import migrations  # noqa: E402
+
+TODAY = date(2026, 10, 18)
+
+
+def create_database(path, years, missing):
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    rng = random.Random(42)
+    last = TODAY - timedelta(days=missing)
+    days = (last - date(last.year - years, last.month, 1)).days
+    conn.executemany("INSERT INTO daily_habits (habit_date, alcohol, smoke, sport) VALUES (?, ?, ?, ?)",
+                     [((last - timedelta(days=i)).isoformat(), rng.randint(0, 1), rng.randint(0, 1), rng.randint(0, 1))
+                      for i in range(days)])
+    conn.commit()
+    conn.close()
+
+
+def open_copy(source, name):
+    # Jede Variante bekommt ihre eigene Kopie mit derselben Lücke
+    path = os.path.join(_tmp.name, name)
+    with sqlite3.connect(source) as src, sqlite3.connect(path) as dst:
+        src.backup(dst)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    db.apply_pragmas(conn)
+    return conn
+
+
+def fill_per_row(cursor):
+    # Stand vorher: ein INSERT pro Tag
+    last = date.fromisoformat(cursor.execute("SELECT MAX(habit_date) FROM daily_habits").fetchone()[0])
+    for i in range(1, (TODAY - last).days + 1):
+        try:
+            cursor.execute("INSERT INTO daily_habits (habit_date, alcohol, smoke, sport) VALUES (?, 0, 0, 0)",
+                           ((last + timedelta(days=i)).isoformat(),))
+        except sqlite3.IntegrityError:
+            pass
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    missing = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    runs = 5
+
+    source = os.path.join(_tmp.name, "habits.db")
+    create_database(source, years, missing)
+
+    conn = open_copy(source, "old.db")
+    t0 = time.perf_counter()
+    fill_per_row(conn.cursor())
+    conn.commit()
+    old_fill = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        history = conn.execute("SELECT * FROM daily_habits ORDER BY habit_date ASC").fetchall()
+    old_load = (time.perf_counter() - t0) / runs
+    old_rows = conn.execute("SELECT habit_date FROM daily_habits ORDER BY habit_date").fetchall()
+    conn.close()
+
+    conn = open_copy(source, "new.db")
+    t0 = time.perf_counter()
+    inserted = habits.fill_missing_days(conn.cursor(), TODAY)
+    conn.commit()
+    new_fill = time.perf_counter() - t0
+    start, end = habits.habit_window("month", TODAY)
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        page, _ = habits.load_habit_page(conn.cursor(), start, end, habits.HABIT_PAGE_SIZE)
+    new_load = (time.perf_counter() - t0) / runs
+    same = [tuple(r) for r in old_rows] == [tuple(r) for r in
+                                            conn.execute("SELECT habit_date FROM daily_habits ORDER BY habit_date")]
+    conn.close()
+
+    print(f"{years} Jahre Historie, {missing} fehlende Tage")
+    print(f"Lücken: INSERT pro Tag  {old_fill * 1000:8.1f} ms  ({missing} Anweisungen)")
+    print(f"Lücken: eine Anweisung  {new_fill * 1000:8.1f} ms  ({inserted} Tage)")
+    print("Gleiche Tage angelegt" if same else "Ergebnis unterschiedlich!")
+    print(f"Laden: ganze Historie   {old_load * 1000:8.1f} ms  ({len(history)} Einträge)")
+    print(f"Laden: ein Monat        {new_load * 1000:8.1f} ms  ({len(page)} Einträge)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# benchmarks/bench_records.py
+"""
+Zeilenobjekte im Vergleich: der frühere Weg (sqlite3.Row, pro Zeile ein dict,
+beim Baum-Aufbau noch einmal {**task, "children": []}) gegen records.row_factory
+mit dem Baum-Aufbau in place aus list_manager.build_task_tree (task_tree.py).
+
+Gemessen wird pro "Render" – Abfrage, Baum und ein rekursives Jinja-Template
+über alle Knoten – die Laufzeit sowie mit tracemalloc die insgesamt allozierten
+Bytes und die Speicher-Spitze. tracemalloc läuft nur im zweiten Durchgang,
+damit es die Zeitmessung nicht verfälscht.
+
+Aufruf: python benchmarks/bench_records.py [tasks] [runs]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+_tmp = tempfile.TemporaryDirectory()
+
+from jinja2 import Environment  # noqa: E402
+
+import migrations  # noqa: E402
+import records  # noqa: E402
+from list_manager import HAS_DESCRIPTION_SQL, ListManager  # noqa: E402
+
+QUERY = f"""
+    SELECT id, title, {HAS_DESCRIPTION_SQL}, due_date, completed, parent_id, position
+    FROM tasks
+    WHERE user_id = 1 AND list_name = 'Groß' AND completed = 0
+    ORDER BY parent_id, position, id
+"""
+
+TEMPLATE = Environment().from_string("""
+{%- macro render(tasks) -%}
+<ul>{% for task in tasks %}<li data-id="{{ task.id }}">{{ task.title }}
+{%- if task.has_description %} …{% endif %}{% if task.due_date %} ({{ task.due_date }}){% endif %}
+{%- if task.children %}{{ render(task.children) }}{% endif %}</li>{% endfor %}</ul>
+{%- endmacro -%}
+{{ render(tasks) }}""")
+
+
+def create_database(path, count):
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users (id, username, password_hash) VALUES (1, 'bench', '')")
+    rng = random.Random(42)
+    rows = []
+    for i in range(1, count + 1):
+        # jeder dritte Task ist Unteraufgabe eines älteren
+        parent = rng.randint(1, i - 1) if i > 1 and i % 3 == 0 else None
+        description = f"Beschreibung {i}" if i % 2 else ""
+        due = f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}" if i % 5 == 0 else None
+        rows.append((i, "Groß", f"Task {i}", description, due, 0, parent, rng.randint(0, 1000), 1))
+    conn.executemany("""
+        INSERT INTO tasks (id, list_name, title, description, due_date, completed, parent_id, position, user_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+def dict_tree(tasks):
+    # Stand vor records.py: Kopie jeder Zeile als Knoten
+    task_map = {t["id"]: {**t, "children": []} for t in tasks}
+    tree = []
+    for t in task_map.values():
+        parent = task_map.get(t["parent_id"]) if t["parent_id"] is not None else None
+        if parent is not None:
+            parent["children"].append(t)
+        else:
+            tree.append(t)
+
+    def sort_children(task):
+        task["children"].sort(key=lambda x: x["position"])
+        for child in task["children"]:
+            sort_children(child)
+
+    for t in tree:
+        sort_children(t)
+    return tree
+
+
+def load_dicts(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    tasks = [dict(r) for r in conn.execute(QUERY).fetchall()]
+    conn.close()
+    return dict_tree(tasks)
+
+
+def load_records(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = records.row_factory
+    tasks = conn.execute(QUERY).fetchall()
+    conn.close()
+    return ListManager.build_task_tree(None, tasks)
+
+
+def measure(load, path, runs):
+    html = TEMPLATE.render(tasks=load(path))
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        TEMPLATE.render(tasks=load(path))
+    seconds = (time.perf_counter() - t0) / runs
+
+    # Spitze über den ganzen Render, dazu was der fertige Baum dauerhaft belegt
+    tracemalloc.start()
+    tree = load(path)
+    retained, _ = tracemalloc.get_traced_memory()
+    TEMPLATE.render(tasks=tree)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, retained, html
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    path = os.path.join(_tmp.name, "records.db")
+    create_database(path, count)
+
+    print(f"{count} offene Tasks in einer Liste, {runs} Durchläufe")
+    pages = []
+    for label, load in (("dict + Kopie", load_dicts), ("Record in place", load_records)):
+        seconds, peak, retained, html = measure(load, path, runs)
+        pages.append(html)
+        print(f"{label:16} {seconds * 1000:8.1f} ms/Render  Baum {retained / 1024 / 1024:6.1f} MiB  "
+              f"Spitze {peak / 1024 / 1024:6.1f} MiB  HTML {len(html) / 1024:.0f} KiB")
+    print("HTML identisch" if pages[0] == pages[1] else "HTML unterschiedlich!")
+
+
+if __name__ == "__main__":
+    main()
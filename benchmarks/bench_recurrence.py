@@ -0,0 +1,100 @@
+# benchmarks/bench_recurrence.py
+"""
+Expansion wiederkehrender Aufgaben für ein Kalenderfenster: die alte
+Schrittschleife (ab start_date Intervall für Intervall bis Monatsende) gegen
+die geschlossene Form aus recurrence.py.
+
+Die Regeln haben zufällige Startdaten in den letzten drei Jahren, wie sie sich
+bei einem langjährigen Nutzer ansammeln.
+
+Aufruf: python benchmarks/bench_recurrence.py [regeln] [wiederholungen]
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import calendar_service  # noqa: E402
+import recurrence  # noqa: E402
+
+
+def make_rules(count, today):
+    rng = random.Random(42)
+    rules = []
+    for i in range(count):
+        frequency = rng.choice(("daily", "daily", "weekly", "monthly"))
+        rules.append({
+            "id": i,
+            "frequency": frequency,
+            "interval_value": rng.choice((1, 1, 2, 3)),
+            "start_date": (today - timedelta(days=rng.randint(0, 3 * 365))).isoformat(),
+            "end_date": None,
+        })
+    return rules
+
+
+def expand_stepping(rules, start, end):
+    """
+    Bisheriges Verfahren aus get_calendar_tasks_with_recurring (ohne Fensterfilter).
+    """
+    out = []
+    last = end - timedelta(days=1)
+    for r in rules:
+        d0 = date.fromisoformat(r["start_date"])
+        interval = r["interval_value"]
+        if r["frequency"] == "daily":
+            while d0 <= last:
+                out.append(d0)
+                d0 += timedelta(days=interval or 1)
+        elif r["frequency"] == "weekly":
+            while d0 <= last:
+                out.append(d0)
+                d0 += timedelta(weeks=interval or 1)
+        elif r["frequency"] == "monthly":
+            while d0 <= last:
+                out.append(d0)
+                d0 = (d0.replace(day=1) + timedelta(days=31)).replace(day=1)
+    return out
+
+
+def expand_closed_form(rules, start, end):
+    out = []
+    for r in rules:
+        out.extend(recurrence.rule_occurrences(r, start, end))
+    return out
+
+
+def timed(fn, repeat, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, len(result)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    today = date(2026, 10, 18)
+    rules = make_rules(count, today)
+    windows = {
+        "Monat": calendar_service.month_range(today.year, today.month),
+        "Jahr": (date(today.year, 1, 1), date(today.year + 1, 1, 1)),
+    }
+
+    print(f"{count} Regeln, bestes von {repeat} Läufen")
+    for name, (start, end) in windows.items():
+        old, old_n = timed(expand_stepping, repeat, rules, start, end)
+        new, new_n = timed(expand_closed_form, repeat, rules, start, end)
+        print(f"{name:6s} Schrittschleife {old * 1000:8.1f} ms ({old_n:7d} Termine)   "
+              f"geschlossene Form {new * 1000:8.1f} ms ({new_n:6d} Termine im Fenster)   "
+              f"x{old / new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/bench_search.py
+"""
+Suche nach einem Task: alle Listen laden und in Python filtern (wie select_task
+mit WordCompleter), LIKE '%wort%' in SQL und der FTS5-Index aus Migration 6.
+
+Die Datenbank wird über migrations.migrate() angelegt, die Tasks laufen also
+durch dieselben Trigger wie in der App.
+
+Aufruf: python benchmarks/bench_search.py [tasks] [wiederholungen]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import db  # noqa: E402
+import migrations  # noqa: E402
+
+WORDS = ("Rechnung", "Steuer", "Einkauf", "Arzt", "Termin", "Bericht", "Projekt", "Garten",
+         "Auto", "Reparatur", "Urlaub", "Planung", "Geburtstag", "Geschenk", "Präsentation")
+# Seltenes Wort (jeder 200. Task) – der typische Fall: man sucht genau den einen Task
+RARE = "Steuerbescheid"
+QUERY = "steuerb"
+
+
+def create_database(path, count):
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    db.apply_pragmas(conn)
+    rng = random.Random(42)
+    conn.executemany("""
+        INSERT INTO tasks (list_name, title, description, completed, position, user_id)
+        VALUES (?, ?, ?, 0, ?, 1)
+    """, [
+        (f"Liste {i % 40}", " ".join(rng.sample(WORDS, 3) + ([RARE] if i % 200 == 0 else [])),
+         " ".join(rng.sample(WORDS, 6)), i)
+        for i in range(count)
+    ])
+    conn.commit()
+    return conn
+
+
+def load_all_and_filter(conn):
+    needle = QUERY.lower()
+    hits = []
+    for (list_name,) in conn.execute("SELECT DISTINCT list_name FROM tasks WHERE user_id = 1").fetchall():
+        rows = conn.execute("SELECT * FROM tasks WHERE user_id = 1 AND list_name = ?", (list_name,)).fetchall()
+        hits += [r for r in rows if needle in r["title"].lower()]
+    return hits
+
+
+def like_scan(conn):
+    return conn.execute("""
+        SELECT id, title FROM tasks
+        WHERE user_id = 1 AND (title LIKE ? OR description LIKE ?)
+        LIMIT 20
+    """, (f"%{QUERY}%", f"%{QUERY}%")).fetchall()
+
+
+def fts(conn):
+    return conn.execute("""
+        SELECT rowid FROM search_index WHERE search_index MATCH ? AND scope IN (1, 0)
+        ORDER BY bm25(search_index, 10.0, 1.0, 0.0) LIMIT 20
+    """, (f'{{title description}} : ("{QUERY}"*)',)).fetchall()
+
+
+def timed(fn, conn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(conn)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = create_database(os.path.join(tmp, "search.db"), count)
+        print(f"{count} Tasks, Suche nach {QUERY!r}, bestes von {repeat} Läufen")
+        for name, fn in (("alle Listen laden", load_all_and_filter), ("LIKE", like_scan), ("FTS5", fts)):
+            print(f"{name:18s} {timed(fn, conn, repeat):8.2f} ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
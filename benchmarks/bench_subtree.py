@@ -0,0 +1,141 @@
+# benchmarks/bench_subtree.py
+"""
+Teilbaum-Operationen auf verschachtelten Tasks: rekursive CTE über parent_id
+(mit Index) gegen eine gepflegte Closure-Tabelle – und zum Vergleich das
+bisherige Vorgehen, Kinder Ebene für Ebene per Einzelabfrage zu holen.
+
+Gemessen wird das Lesen eines Teilbaums mit Tiefe und das Löschen eines
+Teilbaums, jeweils für einen tiefen (Kette) und einen breiten Baum. Dazu
+kommen die Kosten, die die Closure-Tabelle beim Einfügen verursacht.
+
+Aufruf: python benchmarks/bench_subtree.py [knoten] [wiederholungen]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import db  # noqa: E402
+
+SUBTREE_CTE = """
+    WITH RECURSIVE subtree(id, depth) AS (
+        SELECT id, 0 FROM tasks WHERE id = ?
+        UNION ALL
+        SELECT t.id, s.depth + 1 FROM tasks t JOIN subtree s ON t.parent_id = s.id
+    )
+"""
+
+
+def create_database(path, shape, nodes, closure):
+    conn = sqlite3.connect(path)
+    db.apply_pragmas(conn)
+    conn.execute("""
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY, list_name TEXT, title TEXT,
+            parent_id INTEGER, completed INTEGER DEFAULT 0, user_id INTEGER
+        )
+    """)
+    conn.execute("CREATE INDEX idx_tasks_parent ON tasks (parent_id)")
+    if closure:
+        conn.execute("""
+            CREATE TABLE task_closure (
+                ancestor INTEGER, descendant INTEGER, depth INTEGER,
+                PRIMARY KEY (ancestor, descendant)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE INDEX idx_task_closure_descendant ON task_closure (descendant)")
+
+    t0 = time.perf_counter()
+    for i in range(1, nodes + 1):
+        if shape == "tief":
+            parent = i - 1 or None
+        else:
+            parent = i // 8 or None  # jeder Knoten hat bis zu 8 Kinder
+        conn.execute("INSERT INTO tasks (id, list_name, title, parent_id, user_id) VALUES (?, 'L', ?, ?, 1)",
+                     (i, f"Task {i}", parent))
+        if closure:
+            conn.execute("INSERT INTO task_closure VALUES (?, ?, 0)", (i, i))
+            if parent:
+                conn.execute("""
+                    INSERT INTO task_closure (ancestor, descendant, depth)
+                    SELECT ancestor, ?, depth + 1 FROM task_closure WHERE descendant = ?
+                """, (i, parent))
+    conn.commit()
+    insert_time = time.perf_counter() - t0
+    return conn, insert_time
+
+
+def fetch_cte(conn):
+    return conn.execute(SUBTREE_CTE + "SELECT id, depth FROM subtree", (1,)).fetchall()
+
+
+def fetch_closure(conn):
+    return conn.execute("SELECT descendant, depth FROM task_closure WHERE ancestor = ?", (1,)).fetchall()
+
+
+def fetch_per_level(conn):
+    result, level, depth = [], [1], 0
+    while level:
+        result += [(i, depth) for i in level]
+        children = []
+        for parent in level:
+            children += [r[0] for r in conn.execute("SELECT id FROM tasks WHERE parent_id = ?", (parent,))]
+        level, depth = children, depth + 1
+    return result
+
+
+def delete_cte(conn):
+    # CTE in der Unterabfrage: beginnt das Statement mit WITH, öffnet das
+    # sqlite3-Modul keine Transaktion und rollback() wäre wirkungslos
+    conn.execute("DELETE FROM tasks WHERE id IN (" + SUBTREE_CTE + "SELECT id FROM subtree)", (1,))
+
+
+def delete_closure(conn):
+    conn.execute("DELETE FROM tasks WHERE id IN (SELECT descendant FROM task_closure WHERE ancestor = 1)")
+    conn.execute("""
+        DELETE FROM task_closure WHERE descendant IN (
+            SELECT descendant FROM task_closure WHERE ancestor = 1
+        )
+    """)
+
+
+def timed(conn, fn, repeat, rollback=False):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(conn)
+        best = min(best, time.perf_counter() - t0)
+        if rollback:
+            conn.rollback()
+    return best * 1000
+
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print(f"{nodes} Knoten, bestes von {repeat} Läufen (ms)")
+    print(f"{'Baum':6s} {'Verfahren':14s} {'Einfügen':>9s} {'Lesen':>8s} {'Löschen':>8s}")
+    for shape in ("tief", "breit"):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn, insert_plain = create_database(os.path.join(tmp, "plain.db"), shape, nodes, False)
+            cte_fetch = timed(conn, fetch_cte, repeat)
+            level_fetch = timed(conn, fetch_per_level, repeat)
+            cte_delete = timed(conn, delete_cte, repeat, rollback=True)
+            conn.close()
+
+            conn, insert_closure = create_database(os.path.join(tmp, "closure.db"), shape, nodes, True)
+            closure_fetch = timed(conn, fetch_closure, repeat)
+            closure_delete = timed(conn, delete_closure, repeat, rollback=True)
+            conn.close()
+
+        print(f"{shape:6s} {'Einzelabfragen':14s} {'':>9s} {level_fetch:8.1f} {'':>8s}")
+        print(f"{shape:6s} {'rekursive CTE':14s} {insert_plain * 1000:9.1f} {cte_fetch:8.1f} {cte_delete:8.1f}")
+        print(f"{shape:6s} {'Closure-Tab.':14s} {insert_closure * 1000:9.1f} {closure_fetch:8.1f} {closure_delete:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
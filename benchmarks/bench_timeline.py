@@ -0,0 +1,114 @@
+# benchmarks/bench_timeline.py
+"""
+Timeline-Daten laden: bisher eine Abfrage für die Ziele, eine pro Ziel für die
+Meilensteine und eine pro Meilenstein für die Tasks; jetzt eine Abfrage mit
+LEFT JOIN über Ziele und Meilensteine (TimelineManager._load_timeline).
+Fortschritt und Lage kommen aus den Zählern der Trigger aus Migration 11 – die
+Laufzeit hängt nicht mehr von der Zahl der Milestone-Tasks ab.
+
+Die Ziele verteilen sich über 20 Jahre. Zum Vergleich mit dem Laden aller
+Ziele wird das Fenster der Timeline-Seite geladen (ein Jahr, einzelne
+Meilensteine) und ein Zehn-Jahres-Fenster mit Quartals-Zusammenfassungen.
+
+Aufruf: python benchmarks/bench_timeline.py [ziele] [meilensteine_pro_ziel] [tasks_pro_meilenstein]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+_tmp = tempfile.TemporaryDirectory()
+
+import db  # noqa: E402
+import migrations  # noqa: E402
+from timeline_manager import TimelineManager  # noqa: E402
+
+
+FIRST_GOAL = date(2006, 1, 1)
+
+
+def create_database(path, goals, milestones, tasks):
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    rng = random.Random(42)
+    milestone_id = task_id = 0
+    for goal_id in range(1, goals + 1):
+        # Ziele über 20 Jahre verteilt, jedes läuft ein Jahr
+        start = FIRST_GOAL + timedelta(days=(goal_id - 1) * 20 * 365 // goals)
+        conn.execute("INSERT INTO timeline_goals (id, title, description, due_date, start_date, color) "
+                     "VALUES (?, ?, '', ?, ?, '#007bff')",
+                     (goal_id, f"Ziel {goal_id}", (start + timedelta(days=365)).isoformat(), start.isoformat()))
+        for _ in range(milestones):
+            milestone_id += 1
+            conn.execute("INSERT INTO milestones (id, goal_id, title, due_date) VALUES (?, ?, ?, ?)",
+                         (milestone_id, goal_id, f"Meilenstein {milestone_id}",
+                          (start + timedelta(days=rng.randint(0, 365))).isoformat()))
+            for _ in range(tasks):
+                task_id += 1
+                conn.execute("INSERT INTO milestone_tasks (id, milestone_id, title, completed) VALUES (?, ?, ?, ?)",
+                             (task_id, milestone_id, f"Task {task_id}", rng.randint(0, 1)))
+    conn.commit()
+    conn.close()
+
+
+def load_per_row(conn):
+    # Stand vor dem JOIN: N+1 über Ziele und Meilensteine
+    timeline_data = []
+    for goal in conn.execute("SELECT * FROM timeline_goals ORDER BY due_date ASC").fetchall():
+        goal_entry = {"id": goal.id, "title": goal.title, "milestones": []}
+        for milestone in conn.execute("SELECT * FROM milestones WHERE goal_id = ? ORDER BY due_date ASC",
+                                      (goal.id,)).fetchall():
+            tasks = conn.execute("SELECT * FROM milestone_tasks WHERE milestone_id = ? ORDER BY id ASC",
+                                 (milestone.id,)).fetchall()
+            goal_entry["milestones"].append({"id": milestone.id, "tasks": tasks})
+        timeline_data.append(goal_entry)
+    return timeline_data
+
+
+def main():
+    goals = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    milestones = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    tasks = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    runs = 5
+
+    path = os.path.join(_tmp.name, "timeline.db")
+    create_database(path, goals, milestones, tasks)
+    manager = TimelineManager(path)
+
+    with manager.get_db_connection() as conn:
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            old = load_per_row(conn)
+        old_seconds = (time.perf_counter() - t0) / runs
+        queries = 1 + goals + goals * milestones
+
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        new = manager._load_timeline()
+    new_seconds = (time.perf_counter() - t0) / runs
+
+    same = ([[m["id"] for m in g["milestones"]] for g in old] == [[m["id"] for m in g["milestones"]] for g in new]
+            and [len(m["tasks"]) for g in old for m in g["milestones"]]
+            == [m["task_count"] for g in new for m in g["milestones"]])
+    print(f"{goals} Ziele × {milestones} Meilensteine × {tasks} Tasks")
+    print(f"Einzelabfragen  {old_seconds * 1000:8.1f} ms  ({queries} Abfragen, ohne Fortschritt)")
+    print(f"JOIN            {new_seconds * 1000:8.1f} ms  (1 Abfrage, mit Fortschritt und Lage)")
+    print("Gleiche Meilensteine und Task-Zahlen" if same else "Ergebnis unterschiedlich!")
+
+    for label, start, end, zoom in (("Fenster 1 Jahr", "2025-01-01", "2026-01-01", "week"),
+                                    ("Fenster 10 Jahre", "2016-01-01", "2026-01-01", "quarter")):
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            window = manager._load_timeline(start, end, zoom)
+        seconds = (time.perf_counter() - t0) / runs
+        points = sum(len(g["milestones"]) + len(g.get("buckets", ())) for g in window)
+        print(f"{label:16}{seconds * 1000:8.1f} ms  ({len(window)} Ziele, {points} Punkte, zoom={zoom})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_transfer.py
+"""
+Export und Import eines großen Users mit transfer.py: NDJSON-Export in eine
+Datei, danach Import derselben Datei für einen zweiten User (neue IDs,
+umgebogene parent_id). Änderungsprotokoll und Volltextindex werden dabei
+wie in der App mitgeschrieben (beim Import mengenbasiert, siehe transfer.py).
+
+Die Speicher-Spitze des Exports wird in einem zweiten Lauf mit tracemalloc
+gemessen – das Tracing kostet ein Vielfaches der eigentlichen Laufzeit.
+
+Aufruf: python benchmarks/bench_transfer.py [tasks] [chunk]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+_tmp = tempfile.TemporaryDirectory()
+
+import migrations  # noqa: E402
+import transfer  # noqa: E402
+
+
+def create_database(path, count):
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users (id, username, password_hash) VALUES (1, 'quelle', ''), (2, 'ziel', '')")
+    rng = random.Random(42)
+    rows = []
+    for i in range(1, count + 1):
+        # jeder vierte Task ist Unteraufgabe eines älteren
+        parent = rng.randint(1, i - 1) if i > 1 and i % 4 == 0 else None
+        rows.append((i, f"Liste {i % 30}", f"Task {i}", f"Beschreibung {i}", parent, i, 1))
+    conn.executemany("""
+        INSERT INTO tasks (id, list_name, title, description, parent_id, position, user_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    chunk = int(sys.argv[2]) if len(sys.argv) > 2 else transfer.IMPORT_CHUNK
+
+    path = os.path.join(_tmp.name, "transfer.db")
+    create_database(path, count)
+    export_path = os.path.join(_tmp.name, "export.ndjson")
+
+    t0 = time.perf_counter()
+    with open(export_path, "w", encoding="utf-8") as out:
+        for line in transfer.export_ndjson(path, 1):
+            out.write(line)
+    export_seconds = time.perf_counter() - t0
+
+    tracemalloc.start()
+    for _ in transfer.export_ndjson(path, 1):
+        pass
+    _, export_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    with open(export_path, encoding="utf-8") as stream:
+        stats = transfer.import_records(path, 2, stream, chunk)
+
+    conn = sqlite3.connect(path)
+    orphans = conn.execute("""
+        SELECT COUNT(*) FROM tasks c LEFT JOIN tasks p ON p.id = c.parent_id
+        WHERE c.user_id = 2 AND c.parent_id IS NOT NULL AND (p.id IS NULL OR p.user_id != 2)
+    """).fetchone()[0]
+    log_entries = conn.execute("SELECT COUNT(*) FROM change_log WHERE user_id = 2").fetchone()[0]
+    indexed = conn.execute("SELECT COUNT(*) FROM search_index WHERE scope = 2").fetchone()[0]
+    conn.close()
+
+    size = os.path.getsize(export_path) / 1024 / 1024
+    print(f"{count} Tasks, Export {size:.1f} MB")
+    print(f"Export  {export_seconds:6.2f} s  ({count / export_seconds:8.0f} Zeilen/s, "
+          f"Speicher-Spitze {export_peak / 1024:.0f} KiB)")
+    print(f"Import  {stats['seconds']:6.2f} s  ({stats['records_per_second']:8.0f} Zeilen/s, Häppchen {chunk})")
+    print(f"Unteraufgaben mit falschem Elternteil nach dem Import: {orphans}")
+    print(f"Änderungsprotokoll {log_entries}, Suchindex {indexed} Einträge für den neuen User")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# benchmarks/bench_tree.py
+"""
+Baum-Aufbau einer Liste offener Tasks: bisher Abfrage in Tabellenreihenfolge,
+Baum per dict-Index und anschließend rekursives Sortieren aller Kinderlisten;
+jetzt Abfrage in Baumreihenfolge über den Teilindex aus Migration 10 und
+task_tree.build_forest (linear, ohne Rekursion, mit Unteraufgaben-Zahl und
+Zeitsumme pro Knoten).
+
+Drei Formen: "projekt" (zufällig verschachtelt), "breit" (bis zu 8 Kinder pro
+Knoten) und "tief" (eine Kette – das rekursive Sortieren scheitert dort am
+Rekursionslimit). Dazu der Abfrageplan: ohne "TEMP B-TREE" sortiert SQLite nicht.
+
+Aufruf: python benchmarks/bench_tree.py [tasks] [runs]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import migrations  # noqa: E402
+import records  # noqa: E402
+import task_tree  # noqa: E402
+
+COLUMNS = "id, title, due_date, estimated_time, completed, parent_id, position"
+WHERE = "WHERE list_name = ? AND completed = 0 AND user_id = 1"
+
+
+def create_database(path, count):
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users (id, username, password_hash) VALUES (1, 'bench', '')")
+    rng = random.Random(42)
+    rows = []
+    for shape in ("projekt", "breit", "tief"):
+        base = len(rows)
+        for i in range(1, count + 1):
+            if shape == "projekt":
+                parent = rng.randint(1, i - 1) if i > 1 and rng.random() < 0.8 else None
+            elif shape == "breit":
+                parent = i // 8 or None
+            else:
+                parent = i - 1 or None
+            rows.append((base + i, shape, f"Task {i}", rng.choice((15, 30, 60)),
+                         parent and base + parent, rng.randint(0, 10_000)))
+    conn.executemany("""
+        INSERT INTO tasks (id, list_name, title, estimated_time, completed, parent_id, position, user_id)
+        VALUES (?, ?, ?, ?, 0, ?, ?, 1)
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+def recursive_tree(tasks):
+    # Stand vor task_tree.py
+    by_id = {}
+    for task in tasks:
+        task.children = []
+        by_id[task.id] = task
+    tree = []
+    for task in tasks:
+        parent = by_id.get(task.parent_id) if task.parent_id is not None else None
+        if parent is not None:
+            parent.children.append(task)
+        else:
+            tree.append(task)
+
+    def sort_children(task):
+        task.children.sort(key=lambda x: x.position)
+        for child in task.children:
+            sort_children(child)
+
+    for t in tree:
+        sort_children(t)
+    return tree
+
+
+def load_old(conn, shape):
+    return recursive_tree(conn.execute(f"SELECT {COLUMNS} FROM tasks {WHERE}", (shape,)).fetchall())
+
+
+def load_new(conn, shape):
+    rows = conn.execute(f"SELECT {COLUMNS} FROM tasks {WHERE} ORDER BY {task_tree.TREE_ORDER_SQL}",
+                        (shape,)).fetchall()
+    return task_tree.build_forest(rows)
+
+
+def flatten(roots):
+    # Vorordnung iterativ, damit auch die Kette vergleichbar ist
+    result, stack = [], list(reversed(roots))
+    while stack:
+        node = stack.pop()
+        result.append(node.id)
+        stack.extend(reversed(node.children))
+    return result
+
+
+def timed(load, conn, shape, runs):
+    try:
+        tree = load(conn, shape)
+    except RecursionError:
+        return None, None
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        load(conn, shape)
+    return (time.perf_counter() - t0) / runs, tree
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    tmp = tempfile.TemporaryDirectory()
+    path = os.path.join(tmp.name, "tree.db")
+    create_database(path, count)
+    conn = sqlite3.connect(path)
+    conn.row_factory = records.row_factory
+
+    plan = conn.execute(f"EXPLAIN QUERY PLAN SELECT {COLUMNS} FROM tasks {WHERE} "
+                        f"ORDER BY {task_tree.TREE_ORDER_SQL}", ("x",)).fetchall()
+    print("Plan:", "; ".join(row[3] for row in plan))
+    print(f"{count} offene Tasks pro Form, {runs} Durchläufe")
+
+    for shape in ("projekt", "breit", "tief"):
+        old_seconds, old_tree = timed(load_old, conn, shape, runs)
+        new_seconds, new_tree = timed(load_new, conn, shape, runs)
+        total = sum(root.subtask_count + 1 for root in new_tree)
+        minutes = sum(root.estimated_total for root in new_tree)
+        if old_tree is None:
+            old = "   Rekursionslimit"
+            same = "-"
+        else:
+            old = f"{old_seconds * 1000:8.1f} ms"
+            same = "gleich" if flatten(old_tree) == flatten(new_tree) else "VERSCHIEDEN"
+        print(f"{shape:8} alt {old}   neu {new_seconds * 1000:8.1f} ms   "
+              f"Reihenfolge {same}, Summen {total} Tasks / {minutes} min")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# cache.py
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import db
+import migrations
+
+DATABASE = db.DATABASE
+
+# Timeline-Daten (Goals, Milestones) haben keinen user_id – sie laufen unter diesem Scope
+SHARED_SCOPE = 0
+# daily_habits hat ebenfalls keinen user_id, bekommt aber eine eigene Version,
+# damit ein Habit-Update nicht Dashboard und Timeline invalidiert
+HABITS_SCOPE = -1
+
+
+def bump_data_version(cursor, *user_ids):
+    """
+    Erhöht die Datenversion der angegebenen User. Muss in derselben Transaktion
+    wie die eigentliche Änderung aufgerufen werden (also vor dem commit).
+    """
+    cursor.executemany("""
+        INSERT INTO data_versions (user_id, version)
+        VALUES (?, 1)
+        ON CONFLICT(user_id) DO UPDATE SET version = version + 1
+    """, [(user_id,) for user_id in user_ids])
+
+
+class DataCache:
+    """
+    LRU-Cache für gerenderte Daten (Dashboard, Timeline, Listen).
+    Der Schlüssel enthält die Datenversion jedes beteiligten Users. Jede Schreib-
+    Methode erhöht diese Version in der Tabelle data_versions, d.h. alte Einträge
+    werden nie wieder getroffen und fallen irgendwann per LRU heraus.
+
+    Damit mehrere Worker-Prozesse auf derselben tasks.db korrekt bleiben, merkt
+    sich der Cache die Versionen nur so lange, wie sich PRAGMA data_version seiner
+    Prüf-Verbindung nicht ändert – jeder Commit einer anderen Verbindung (auch aus
+    einem anderen Prozess) verwirft die gemerkten Versionen.
+    """
+
+    def __init__(self, db_name=DATABASE, max_entries=256):
+        self.db_name = db_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._data_version = None
+        self._lock = threading.Lock()
+        # Erst beim ersten version() geöffnet: der Import von cache.py legt keine Datenbank an
+        self._probe = None
+
+    def _probe_connection(self):
+        if self._probe is None:
+            # data_versions muss existieren, bevor die erste Version gelesen wird
+            migrations.migrate(self.db_name)
+            self._probe = sqlite3.connect(self.db_name, check_same_thread=False)
+            db.apply_pragmas(self._probe)
+        return self._probe
+
+    def version(self, user_id):
+        """
+        Liefert die aktuelle Datenversion eines Users. Solange niemand geschrieben
+        hat, kostet das nur ein PRAGMA data_version und keine Tabellenabfrage.
+        """
+        with self._lock:
+            probe = self._probe_connection()
+            data_version = probe.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._data_version = data_version
+                self._versions.clear()
+
+            version = self._versions.get(user_id)
+            if version is None:
+                row = probe.execute(
+                    "SELECT version FROM data_versions WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                version = self._versions[user_id] = row[0] if row else 0
+            return version
+
+    def get_or_load(self, namespace, scopes, args, loader):
+        """
+        Gibt den gecachten Wert zurück oder ruft loader() auf und speichert ihn.
+
+        namespace: Name des Datensatzes, z.B. "dashboard"
+        scopes:    User-IDs, deren Datenversion in den Schlüssel eingeht
+        args:      weitere Schlüsselteile (Listenname, Datum, ...)
+        """
+        key = (namespace, args) + tuple((scope, self.version(scope)) for scope in scopes)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = loader()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+data_cache = DataCache()
@@ -0,0 +1,95 @@
+# calendar_service.py
+from datetime import date, datetime
+
+import recurrence
+
+# Größtes Fenster, das /calendar/range ausliefert (Jahresansicht + Rand)
+MAX_RANGE_DAYS = 400
+
+
+def month_range(year, month):
+    """
+    Halboffenes Intervall [erster Tag des Monats, erster Tag des Folgemonats).
+    """
+    start = date(year, month, 1)
+    end = date(year + month // 12, month % 12 + 1, 1)
+    return start, end
+
+
+def parse_range(start, end):
+    """
+    Liest start/end (YYYY-MM-DD, end exklusiv) aus Query-Parametern.
+    Wirft ValueError bei ungültigen oder zu großen Fenstern.
+    """
+    start = datetime.strptime(start, "%Y-%m-%d").date()
+    end = datetime.strptime(end, "%Y-%m-%d").date()
+    if end <= start:
+        raise ValueError("end must be after start")
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise ValueError(f"range must not exceed {MAX_RANGE_DAYS} days")
+    return start, end
+
+
+def load_calendar(manager, user_id, start, end, include_recurring=True):
+    """
+    Alle Kalender-Einträge des Users im Fenster [start, end) – einmalige
+    calendar_tasks und die Termine der recurring_tasks – über eine Verbindung.
+    Die Datumsbedingung ist ein halboffener Bereich auf der Spalte selbst,
+    damit idx_calendar_tasks_user_date greift (statt strftime pro Zeile).
+
+    Liefert eine nach Datum sortierte Liste von Dicts:
+    id, title, date, category, source ("calendar" oder "recurring")
+    """
+    start_iso, end_iso = start.isoformat(), end.isoformat()
+
+    with manager.get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT id, title, date, category
+            FROM calendar_tasks
+            WHERE user_id = ?
+              AND date >= ? AND date < ?
+            ORDER BY date, id
+        """, (user_id, start_iso, end_iso))
+        entries = [
+            {
+                "id": r["id"],
+                "title": r["title"],
+                "date": r["date"],
+                "category": r["category"],
+                "source": "calendar"
+            } for r in cur.fetchall()
+        ]
+
+        recurring = []
+        if include_recurring:
+            cur.execute("""
+                SELECT id, title, frequency, interval_value, start_date, end_date
+                FROM recurring_tasks
+                WHERE user_id = ?
+                  AND (start_date IS NULL OR start_date < ?)
+                  AND (end_date IS NULL OR end_date >= ?)
+            """, (user_id, end_iso, start_iso))
+            recurring = cur.fetchall()
+            skips = recurrence.load_skips(cur, user_id) if recurring else {}
+
+    for r in recurring:
+        for d in recurrence.rule_occurrences(r, start, end, skips):
+            entries.append({
+                "id": r["id"],
+                "title": r["title"],
+                "date": d.isoformat(),
+                "category": f"recurring-{r['frequency']}",
+                "source": "recurring"
+            })
+
+    # stabil: pro Tag erst einmalige, dann wiederkehrende Einträge
+    entries.sort(key=lambda e: e["date"])
+    return entries
+
+
+def group_by_date(entries):
+    by_date = {}
+    for e in entries:
+        by_date.setdefault(e["date"], []).append(e)
+    return by_date
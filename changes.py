@@ -0,0 +1,90 @@
+# changes.py
+"""
+Delta-Synchronisation über das Änderungsprotokoll change_log (siehe Migration 5).
+
+Trigger auf tasks, special_list_tasks, calendar_tasks, milestones und
+milestone_tasks schreiben bei jeder Änderung einen Eintrag mit neuer,
+streng steigender seq. Ein Client merkt sich die höchste seq, die er gesehen
+hat (den Cursor), und fragt beim nächsten Mal nur nach Einträgen dahinter.
+Pro Zeile steht immer nur der letzte Eintrag im Protokoll – wer lange nicht
+synchronisiert hat, bekommt jede Zeile trotzdem höchstens einmal.
+"""
+import json
+
+from cache import SHARED_SCOPE
+from migrations import CHANGE_TRACKED_TABLES
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+def latest_cursor(conn):
+    """
+    Höchste vergebene seq. Vor dem Laden einer Ansicht gelesen, ist das der
+    Cursor, ab dem der Client später nachfragt.
+    """
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return row[0] if row else 0
+
+
+def load_changes(manager, user_id, since=0, limit=DEFAULT_LIMIT):
+    """
+    Alle Änderungen des Users (und der gemeinsamen Timeline-Daten) nach dem Cursor since.
+
+    Liefert ein Dict:
+    cursor:   Cursor für die nächste Anfrage
+    has_more: True, wenn wegen limit noch Änderungen ausstehen
+    reset:    True, wenn since größer als jeder vergebene Cursor ist (z.B. nach
+              einem Zurückspielen der Datenbank) – der Client muss mit since=0
+              komplett neu laden
+    changes:  {tabelle: {"upserted": [zeilen], "deleted": [ids]}}, nur Tabellen mit Änderungen
+    """
+    with manager.get_db_connection() as conn:
+        latest = latest_cursor(conn)
+        if since > latest:
+            return {"cursor": latest, "has_more": False, "reset": True, "changes": {}}
+
+        rows = conn.execute("""
+            SELECT seq, table_name, row_id, deleted
+            FROM change_log
+            WHERE user_id IN (?, ?) AND seq > ?
+            ORDER BY seq
+            LIMIT ?
+        """, (user_id, SHARED_SCOPE, since, limit + 1)).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        changes = build_changes(conn, rows)
+
+    return {
+        "cursor": rows[-1]["seq"] if rows else since,
+        "has_more": has_more,
+        "reset": False,
+        "changes": changes,
+    }
+
+
+def build_changes(conn, log_rows):
+    """
+    Macht aus Einträgen von change_log (seq, table_name, row_id, deleted) das
+    Format von load_changes: aktuelle Zeilen für Upserts, IDs für Löschungen.
+    Eine Abfrage pro betroffener Tabelle.
+    """
+    upserted, deleted = {}, {}
+    for row in log_rows:
+        target = deleted if row["deleted"] else upserted
+        target.setdefault(row["table_name"], []).append(row["row_id"])
+
+    changes = {}
+    for table in CHANGE_TRACKED_TABLES:
+        if table not in upserted and table not in deleted:
+            continue
+        current = []
+        if table in upserted:
+            current = [dict(r) for r in conn.execute(
+                f"SELECT * FROM {table} WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id",
+                (json.dumps(upserted[table]),)
+            )]
+        changes[table] = {"upserted": current, "deleted": deleted.get(table, [])}
+    return changes
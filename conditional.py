@@ -0,0 +1,78 @@
+# conditional.py
+"""
+Bedingte GETs: starke ETags aus den Datenversionen (siehe cache.py).
+
+Stimmt If-None-Match mit dem aktuellen ETag überein, wird 304 geantwortet –
+das kostet nur das Nachschlagen der Versionen, keine Abfrage, kein JSON und
+kein Template-Rendering.
+"""
+import glob
+import hashlib
+import os
+import time
+from datetime import date
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+
+from cache import data_cache
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _build_id():
+    # Geänderte Templates oder geänderter Code → neue ETags (auch ohne Datenänderung)
+    files = glob.glob(os.path.join(_ROOT, "*.py")) + glob.glob(os.path.join(_ROOT, "templates", "*.html"))
+    return str(int(max((os.path.getmtime(f) for f in files), default=0)))
+
+
+BUILD_ID = os.environ.get("APP_BUILD_ID") or _build_id()
+
+
+def _html_parts():
+    """
+    HTML-Seiten enthalten das CSRF-Token und hängen vom Datum ab. Das Token
+    läuft nach WTF_CSRF_TIME_LIMIT ab, deshalb wechselt der ETag spätestens
+    nach der halben Laufzeit, damit nie eine Seite mit abgelaufenem Token aus
+    dem Browser-Cache kommt.
+    """
+    parts = [date.today().isoformat(), session.get("csrf_token", "")]
+    limit = current_app.config.get("WTF_CSRF_TIME_LIMIT", 3600)
+    if limit:
+        parts.append(str(int(time.time()) // max(limit // 2, 1)))
+    return parts
+
+
+def compute_etag(namespace, scopes, extra=(), html=False):
+    parts = [BUILD_ID, namespace, *map(str, extra)]
+    if current_user.is_authenticated:
+        parts.append(f"u{current_user.id}")
+    parts += [f"{scope}:{data_cache.version(scope)}" for scope in scopes]
+    if html:
+        parts += _html_parts()
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def conditional(namespace, scopes, build, extra=(), html=False):
+    """
+    Liefert 304, wenn der Client den aktuellen Stand schon hat, sonst build().
+
+    namespace: Name der Ressource, z.B. "habits"
+    scopes:    User-IDs/Scopes, deren Datenversion in den ETag eingeht
+    build:     erzeugt die Antwort (String, Response oder (body, status)); schreibt
+               nicht – sonst passte der ETag nicht mehr zur Antwort
+    extra:     weitere Bestandteile, von denen die Antwort abhängt (Args, Pfad ...)
+    html:      Seite mit CSRF-Token (siehe _html_parts)
+    """
+    etag = compute_etag(namespace, scopes, extra, html)
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    response = make_response(build())
+    if response.status_code == 200:
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,232 @@
+# dashboard.py
+import json
+from datetime import date, timedelta
+
+from list_manager import COMPLETED_PAGE_SIZE, DESCRIPTION_PREVIEW_SQL, HAS_DESCRIPTION_SQL, page_result
+from task_tree import TREE_ORDER_SQL
+
+SPECIAL_LISTS = ("Today", "Next Day", "This Week", "This Month")
+
+
+def _date_windows(today):
+    """
+    Berechnet die Datumsbereiche für Today, Next Day, Woche und Monat.
+    """
+    tomorrow = today + timedelta(days=1)
+    week_start = today - timedelta(days=today.weekday())
+    week_end = week_start + timedelta(days=6)
+    month_start = today.replace(day=1)
+    next_month = (month_start + timedelta(days=31)).replace(day=1)
+    month_end = next_month - timedelta(days=1)
+    return {
+        "today": today.isoformat(),
+        "tomorrow": tomorrow.isoformat(),
+        "week_start": week_start.isoformat(),
+        "week_end": week_end.isoformat(),
+        "month_start": month_start.isoformat(),
+        "month_end": month_end.isoformat(),
+    }
+
+
+def _milestone_entry(m):
+    # (id, title, category, due_date, completed) – gleiches Format wie die Tasks
+    return (
+        m["id"],
+        f"{m['title']} (Goal: {m['goal_title']})",
+        "milestone",
+        m["due_date"],
+        m["completed"]
+    )
+
+
+def load_lists(manager, user_id):
+    """
+    Lädt alle normalen Listen des Users mit Farbe, Task-Baum und der ersten Seite
+    erledigter Tasks. Liefert dieselbe Struktur wie get_all_lists + get_list_color
+    + get_tasks pro Liste – in drei Abfragen, unabhängig von der Zahl der Listen.
+    """
+    with manager.get_db_connection() as connection:
+        cursor = connection.cursor()
+
+        # Listen in der Reihenfolge ihres ersten Tasks; die Farbe steht an jedem Task
+        cursor.execute("""
+            SELECT l.list_name, t.color
+            FROM (
+                SELECT list_name, MIN(id) AS first_id
+                FROM tasks
+                WHERE user_id = ?
+                  AND list_name NOT IN ('Today','Next Day','This Week','This Month')
+                  AND LOWER(list_name) NOT IN (
+                      SELECT LOWER(name)
+                      FROM secret_lists
+                      WHERE user_id = ?
+                  )
+                GROUP BY list_name
+            ) l
+            JOIN tasks t ON t.id = l.first_id
+            ORDER BY l.first_id
+        """, (user_id, user_id))
+        grouped = {
+            r["list_name"]: {"color": r["color"] or "#ffffff", "incomplete": [], "completed": []}
+            for r in cursor.fetchall()
+        }
+        names = json.dumps(list(grouped))
+
+        # Baumreihenfolge über alle Listen; pro Liste bleibt sie beim Verteilen erhalten
+        cursor.execute(f"""
+            SELECT list_name, id, title, {HAS_DESCRIPTION_SQL}, due_date, estimated_time,
+                   completed, parent_id, position
+            FROM tasks
+            WHERE user_id = ?
+              AND completed = 0
+              AND list_name IN (SELECT value FROM json_each(?))
+            ORDER BY {TREE_ORDER_SQL}
+        """, (user_id, names))
+        for r in cursor.fetchall():
+            grouped[r.list_name]["incomplete"].append(r)
+
+        # Pro Liste nur die zuletzt erledigten (eine Seite + 1 für "Mehr laden") –
+        # jede Unterabfrage ist ein kurzer Bereichs-Scan im Teilindex aus Migration 9
+        cursor.execute("""
+            SELECT t.list_name, t.id, t.title, COALESCE(t.description, '') <> '' AS has_description,
+                   t.due_date, t.completed, t.completed_at
+            FROM json_each(?) l
+            JOIN tasks t ON t.id IN (
+                SELECT id
+                FROM tasks
+                WHERE user_id = ? AND list_name = l.value AND completed = 1
+                ORDER BY completed_at DESC, id DESC
+                LIMIT ?
+            )
+            ORDER BY t.completed_at DESC, t.id DESC
+        """, (names, user_id, COMPLETED_PAGE_SIZE + 1))
+        for r in cursor.fetchall():
+            grouped[r.list_name]["completed"].append(r)
+
+    lists = []
+    for list_name, entry in grouped.items():
+        completed, completed_next = page_result(entry["completed"], COMPLETED_PAGE_SIZE)
+        lists.append({
+            "name": list_name,
+            "color": entry["color"],
+            "tasks": {
+                "incomplete": manager.build_task_tree(entry["incomplete"]),
+                "completed": completed,
+                "completed_next": completed_next
+            }
+        })
+    return lists
+
+
+def load_dashboard(manager, user_id, today=None):
+    """
+    Baut den kompletten Template-Kontext für die Startseite (/).
+    Statt einer Abfrage pro Bereich und Liste werden Tasks, Milestones,
+    Milestone-Tasks und normale Listen mit je einer Abfrage über eine
+    Verbindung geladen und in Python auf die Bereiche verteilt. Die vier
+    Spezial-Listen kommen aus get_special_list_tasks: offene als Baum, von den
+    erledigten nur die erste Seite (completed_next: Cursor für "Mehr laden").
+    """
+    w = _date_windows(today or date.today())
+    range_start = min(w["week_start"], w["month_start"])
+    range_end = max(w["week_end"], w["month_end"])
+
+    with manager.get_db_connection() as connection:
+        cur = connection.cursor()
+
+        sections = {
+            name: {"incomplete": [], "completed": [], "completed_next": None}
+            for name in ("today", "next_day", "week", "month")
+        }
+
+        def add(section, entry, completed):
+            sections[section]["completed" if completed else "incomplete"].append(entry)
+
+        # ---------------------------
+        # Normale Tasks (alle Bereiche auf einmal)
+        # ---------------------------
+        cur.execute(f"""
+            SELECT id, title, {DESCRIPTION_PREVIEW_SQL}, due_date, completed, list_name
+            FROM tasks
+            WHERE due_date BETWEEN ? AND ?
+              AND user_id = ?
+            ORDER BY due_date ASC, id ASC
+        """, (range_start, range_end, user_id))
+        for row in cur.fetchall():
+            due, list_name = row["due_date"], row["list_name"]
+            in_week = w["week_start"] <= due <= w["week_end"]
+            if due == w["today"]:
+                add("today", row, row["completed"])
+            if due == w["tomorrow"]:
+                add("next_day", row, row["completed"])
+            if in_week and list_name not in ("Today", "Next Day"):
+                add("week", row, row["completed"])
+            if (w["month_start"] <= due <= w["month_end"] and not in_week
+                    and list_name not in ("Today", "Next Day", "This Week")):
+                add("month", row, row["completed"])
+
+        # ---------------------------
+        # Milestones für Today / Next Day / Woche
+        # ---------------------------
+        milestone_start = min(w["today"], w["week_start"])
+        milestone_end = max(w["tomorrow"], w["week_end"])
+        cur.execute("""
+            SELECT m.id, m.title, m.due_date, m.completed, g.title AS goal_title
+            FROM milestones m
+            JOIN timeline_goals g ON m.goal_id = g.id
+            WHERE m.due_date BETWEEN ? AND ?
+            ORDER BY m.due_date ASC
+        """, (milestone_start, milestone_end))
+        for m in cur.fetchall():
+            entry = _milestone_entry(m)
+            if m["due_date"] == w["today"]:
+                add("today", entry, m["completed"])
+            if m["due_date"] == w["tomorrow"]:
+                add("next_day", entry, m["completed"])
+            if w["week_start"] <= m["due_date"] <= w["week_end"]:
+                add("week", entry, m["completed"])
+
+        # ---------------------------
+        # Milestone-Tasks für den Monat
+        # ---------------------------
+        cur.execute("""
+            SELECT t.id, t.title, t.completed, m.due_date, g.title AS goal_title
+            FROM milestones m
+            JOIN timeline_goals g ON m.goal_id = g.id
+            JOIN milestone_tasks t ON t.milestone_id = m.id
+            WHERE m.due_date BETWEEN ? AND ?
+            ORDER BY m.due_date ASC, m.id ASC, t.id ASC
+        """, (w["month_start"], w["month_end"]))
+        for t in cur.fetchall():
+            entry = (
+                t["id"],
+                f"{t['title']} ({t['goal_title']})",
+                "milestone_task",
+                t["due_date"],
+                t["completed"]
+            )
+            add("month", entry, t["completed"])
+
+        # ---------------------------
+        # Spezial-Listen
+        # ---------------------------
+        # Offene Tasks als Baum (Unteraufgaben unter ihren Eltern), von den erledigten
+        # nur die erste Seite – den Rest lädt "Mehr laden" über /special_lists/<liste>/completed
+        for name, section in zip(SPECIAL_LISTS, ("today", "next_day", "week", "month")):
+            special = manager.get_special_list_tasks(name, user_id)
+            sections[section]["incomplete"].extend(special["incomplete"])
+            sections[section]["completed"].extend(special["completed"])
+            sections[section]["completed_next"] = special["completed_next"]
+
+        # ---------------------------
+        # Normale Listen
+        # ---------------------------
+        lists = load_lists(manager, user_id)
+
+    return {
+        "lists": lists,
+        "today_tasks": sections["today"],
+        "next_day_tasks": sections["next_day"],
+        "week_tasks": sections["week"],
+        "month_tasks": sections["month"],
+    }
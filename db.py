@@ -0,0 +1,209 @@
+# db.py
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+import records
+
+DATABASE = "tasks.db"
+POOL_SIZE = 4  # so viele Verbindungen pro DB-Datei werden zur Wiederverwendung aufgehoben
+
+READ_ONLY_METHODS = ("GET", "HEAD")
+
+# Pragma-Profil, das auf jede neue Verbindung angewendet wird.
+# WAL: Leser blockieren Schreiber nicht mehr (mehrere Threads/Worker auf derselben tasks.db).
+# wal_autocheckpoint: SQLite-Standard (1000 Seiten). Erst init_app schaltet es ab, wenn der
+# Checkpointer-Thread läuft – CLI, Benchmarks und Skripte ohne App checkpointen selbst.
+# Überschreibbar per Umgebungsvariable (SQLITE_<NAME>) oder app.config["SQLITE_PRAGMAS"].
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,          # ms warten statt sofort "database is locked"
+    "cache_size": -16000,          # negativ = KiB, also ~16 MB Page-Cache pro Verbindung
+    "mmap_size": 134217728,        # 128 MB memory-mapped I/O
+    "temp_store": "MEMORY",
+    "wal_autocheckpoint": 1000,
+}
+PRAGMAS = {
+    name: os.environ.get(f"SQLITE_{name.upper()}", value)
+    for name, value in DEFAULT_PRAGMAS.items()
+}
+
+CHECKPOINT_INTERVAL = 30                   # Sekunden zwischen zwei PASSIVE-Checkpoints
+CHECKPOINT_TRUNCATE_BYTES = 64 * 1024 * 1024  # ab dieser WAL-Größe wird TRUNCATE versucht
+
+
+def apply_pragmas(conn, pragmas=None):
+    """
+    Wendet das Pragma-Profil auf eine Verbindung an.
+    """
+    for name, value in (PRAGMAS if pragmas is None else pragmas).items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+class ConnectionPool:
+    """
+    Kleiner thread-sicherer Pool von SQLite-Verbindungen für eine DB-Datei.
+    Wird sowohl für die Request-Verbindung (ausgeliehen bis zum Teardown) als
+    auch für Aufrufer außerhalb eines Requests (CLI, Hintergrund-Jobs) genutzt.
+    """
+
+    def __init__(self, db_name, size=POOL_SIZE):
+        self.db_name = db_name
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        conn.row_factory = records.row_factory
+        apply_pragmas(conn)
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, conn):
+        # Offene Transaktionen nie an den nächsten Nutzer weitergeben
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute("PRAGMA query_only = OFF")
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name=DATABASE):
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None:
+            pool = _pools[db_name] = ConnectionPool(db_name)
+        return pool
+
+
+def _request_connection(db_name, write):
+    connections = g.setdefault("_db_connections", {})
+    read_only = g.setdefault("_db_read_only", set())
+
+    conn = connections.get(db_name)
+    if conn is None:
+        conn = connections[db_name] = get_pool(db_name).acquire()
+        # GET-Routen bekommen eine schreibgeschützte Verbindung
+        if request.method in READ_ONLY_METHODS:
+            conn.execute("PRAGMA query_only = ON")
+            read_only.add(db_name)
+
+    if write and db_name in read_only:
+        # Schreibende Methoden (z.B. Lückenfüllen in /habits/) heben den Schutz bewusst auf
+        conn.execute("PRAGMA query_only = OFF")
+        read_only.discard(db_name)
+    return conn
+
+
+@contextmanager
+def connection(db_name=DATABASE, write=False):
+    """
+    Liefert eine Verbindung zur Datenbank.
+
+    Innerhalb eines Requests ist das immer dieselbe Verbindung (in flask.g),
+    die erst beim Teardown an den Pool zurückgeht. Außerhalb eines Requests
+    wird eine Verbindung aus dem Pool geliehen und am Ende des with-Blocks
+    zurückgegeben. Wer schreibt, muss write=True angeben.
+    """
+    if has_request_context():
+        yield _request_connection(db_name, write)
+        return
+
+    pool = get_pool(db_name)
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+def close_request_connections(exc=None):
+    connections = g.pop("_db_connections", {})
+    g.pop("_db_read_only", None)
+    for db_name, conn in connections.items():
+        get_pool(db_name).release(conn)
+
+
+def checkpoint(db_name=DATABASE, mode="PASSIVE"):
+    """
+    Überträgt das WAL in die Datenbankdatei. Liefert (busy, log_frames, checkpointed).
+    """
+    with connection(db_name) as conn:
+        return tuple(conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone())
+
+
+class Checkpointer(threading.Thread):
+    """
+    Hintergrund-Thread, der regelmäßig einen Checkpoint macht, damit das nicht
+    (per wal_autocheckpoint) in einem zufälligen Request passiert. Wird das WAL
+    zu groß, wird TRUNCATE versucht, damit die Datei wieder schrumpft.
+    """
+
+    def __init__(self, db_name=DATABASE, interval=CHECKPOINT_INTERVAL,
+                 truncate_bytes=CHECKPOINT_TRUNCATE_BYTES, logger=None):
+        super().__init__(name=f"checkpointer:{db_name}", daemon=True)
+        self.db_name = db_name
+        self.logger = logger or logging.getLogger(__name__)
+        self.interval = interval
+        self.truncate_bytes = truncate_bytes
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            try:
+                wal_path = self.db_name + "-wal"
+                too_big = os.path.exists(wal_path) and os.path.getsize(wal_path) > self.truncate_bytes
+                checkpoint(self.db_name, "TRUNCATE" if too_big else "PASSIVE")
+            except sqlite3.Error as e:
+                self.logger.warning("Checkpoint von %s fehlgeschlagen: %s", self.db_name, e)
+
+    def stop(self):
+        self._halt.set()
+
+
+_checkpointers = {}
+
+
+def start_checkpointer(db_name=DATABASE, interval=CHECKPOINT_INTERVAL, logger=None):
+    with _pools_lock:
+        if db_name not in _checkpointers and interval:
+            _checkpointers[db_name] = Checkpointer(db_name, interval, logger=logger)
+            _checkpointers[db_name].start()
+
+
+def init_app(app):
+    # Pragmas aus der App-Konfiguration übernehmen; bereits geöffnete Verbindungen neu aufbauen
+    configured = app.config.get("SQLITE_PRAGMAS", {})
+    PRAGMAS.update(configured)
+    interval = app.config.get("SQLITE_CHECKPOINT_INTERVAL", CHECKPOINT_INTERVAL)
+    if interval and "wal_autocheckpoint" not in configured and "SQLITE_WAL_AUTOCHECKPOINT" not in os.environ:
+        # Ab jetzt checkpointet der Thread, kein Commit eines Requests mehr
+        PRAGMAS["wal_autocheckpoint"] = 0
+    for pool in list(_pools.values()):
+        pool.close_all()
+
+    app.teardown_appcontext(close_request_connections)
+    start_checkpointer(DATABASE, interval, logger=app.logger)
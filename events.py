@@ -0,0 +1,197 @@
+# events.py
+"""
+Server-Sent Events: Änderungen (siehe changes.py) live an offene Tabs pushen.
+
+Die Mutatoren von ListManager und TimelineManager rufen nach dem Commit
+notify() auf. Der EventHub liest daraufhin in einem eigenen Thread mit einer
+einzigen Verbindung die neuen Einträge aus change_log, baut pro User das
+Delta einmal und verteilt es an alle Abonnenten dieses Users. Abonnenten
+halten keine Verbindung – nur eine begrenzte Queue.
+
+Jedes Event trägt den change_log-Cursor als id. Ein Client, der die
+Verbindung verliert, meldet sich mit Last-Event-ID wieder an und bekommt
+die verpassten Änderungen über load_changes nachgeliefert. Dasselbe passiert,
+wenn seine Queue überläuft.
+
+Schreibt ein anderer Prozess (zweiter Worker, CLI), merkt der Hub das beim
+nächsten Poll spätestens nach POLL_INTERVAL Sekunden.
+"""
+import json
+import logging
+import queue
+import sqlite3
+import threading
+
+import changes
+import db
+import records
+from cache import SHARED_SCOPE
+
+SUBSCRIBER_QUEUE_SIZE = 64
+HEARTBEAT_INTERVAL = 15  # Sekunden ohne Event bis zum Keepalive-Kommentar
+POLL_INTERVAL = 2        # Sekunden zwischen zwei Blicken auf change_log ohne notify()
+RETRY_MS = 3000          # Wartezeit des Browsers vor dem Neuverbinden
+POLL_BATCH = 1000        # so viele Log-Einträge höchstens pro Durchgang
+
+
+class Subscriber:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # Queue übergelaufen: Events wurden verworfen und müssen nachgeladen werden
+        self.lagging = False
+
+
+class EventHub:
+    def __init__(self, db_name=db.DATABASE):
+        self.db_name = db_name
+        self._subscribers = {}  # user_id -> set(Subscriber)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._cursor = None
+
+    def subscribe(self, user_id):
+        subscriber = Subscriber(user_id)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+            if self._thread is None:
+                # Startpunkt vor dem ersten Stream festlegen, sonst könnte eine Änderung
+                # zwischen dessen Cursor und dem Start des Threads verloren gehen
+                conn = sqlite3.connect(self.db_name, check_same_thread=False)
+                conn.row_factory = records.row_factory
+                db.apply_pragmas(conn)
+                self._cursor = changes.latest_cursor(conn)
+                self._thread = threading.Thread(target=self._run, args=(conn,),
+                                                name=f"events:{self.db_name}", daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            group = self._subscribers.get(subscriber.user_id)
+            if group is not None:
+                group.discard(subscriber)
+                if not group:
+                    del self._subscribers[subscriber.user_id]
+
+    def notify(self):
+        """
+        Nach einem Commit aufrufen. Kostet nichts, wenn niemand zuhört.
+        """
+        if self._subscribers:
+            self._wake.set()
+
+    def _run(self, conn):
+        while True:
+            self._wake.wait(POLL_INTERVAL)
+            self._wake.clear()
+            if not self._subscribers:
+                continue
+            try:
+                self._poll(conn)
+            except Exception:
+                # Der Thread muss weiterlaufen, sonst bekommen alle offenen Streams nur noch Keepalives
+                logging.getLogger(__name__).exception("Event-Poll fehlgeschlagen")
+
+    def _poll(self, conn):
+        while True:
+            rows = conn.execute("""
+                SELECT seq, user_id, table_name, row_id, deleted
+                FROM change_log
+                WHERE seq > ?
+                ORDER BY seq
+                LIMIT ?
+            """, (self._cursor, POLL_BATCH)).fetchall()
+            if not rows:
+                return
+            cursor = rows[-1]["seq"]
+
+            with self._lock:
+                listening = {user_id: set(group) for user_id, group in self._subscribers.items()}
+
+            by_user = {}
+            for row in rows:
+                if row["user_id"] == SHARED_SCOPE or row["user_id"] in listening:
+                    by_user.setdefault(row["user_id"], []).append(row)
+
+            shared = changes.build_changes(conn, by_user.pop(SHARED_SCOPE, []))
+            for user_id, group in listening.items():
+                delta = dict(shared)
+                delta.update(changes.build_changes(conn, by_user.get(user_id, [])))
+                if not delta:
+                    continue
+                event = {"cursor": cursor, "has_more": False, "reset": False, "changes": delta}
+                for subscriber in group:
+                    self._deliver(subscriber, event)
+
+            self._cursor = cursor
+            if len(rows) < POLL_BATCH:
+                return
+
+    def _deliver(self, subscriber, event):
+        if subscriber.lagging:
+            return
+        try:
+            subscriber.queue.put_nowait(event)
+        except queue.Full:
+            # Nicht blockieren: der Stream lädt das Verpasste selbst nach
+            subscriber.lagging = True
+
+
+hub = EventHub()
+
+
+def notify():
+    hub.notify()
+
+
+def _format(event_id, data, event="change"):
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream(manager, user_id, since=None):
+    """
+    Generator für die SSE-Antwort eines Users.
+
+    since: Cursor des Clients (Last-Event-ID oder ?since=). Ohne Cursor beginnt
+           der Stream beim aktuellen Stand.
+    Läuft außerhalb des Request-Kontexts – Nachladen leiht sich kurz eine
+    Pool-Verbindung (siehe db.connection).
+    """
+    subscriber = hub.subscribe(user_id)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+
+        if since is None:
+            with manager.get_db_connection() as conn:
+                cursor = changes.latest_cursor(conn)
+            yield _format(cursor, {"cursor": cursor}, event="ready")
+        else:
+            cursor = since
+            subscriber.lagging = True  # erst nachladen, dann live
+
+        while True:
+            if subscriber.lagging:
+                # Vor dem Nachladen zurücksetzen: was danach kommt, landet wieder in der Queue
+                subscriber.lagging = False
+                while True:
+                    result = changes.load_changes(manager, user_id, cursor, changes.MAX_LIMIT)
+                    if result["changes"] or result["reset"]:
+                        yield _format(result["cursor"], result)
+                    cursor = result["cursor"]
+                    if not result["has_more"]:
+                        break
+
+            try:
+                event = subscriber.queue.get(timeout=HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            if event["cursor"] <= cursor:
+                continue  # schon beim Nachladen ausgeliefert
+            cursor = event["cursor"]
+            yield _format(cursor, event)
+    finally:
+        # Client hat die Verbindung geschlossen (GeneratorExit) oder der Server fährt herunter
+        hub.unsubscribe(subscriber)
@@ -0,0 +1,139 @@
+# habit_analytics.py
+"""
+Auswertung der Gewohnheiten aus habit_years (Migration 13).
+
+Jedes Jahr einer Gewohnheit ist ein Bitset: Bit i = i-ter Tag des Jahres
+(0 = 1. Januar), gespeichert als 46 Bytes little-endian. In Python wird
+daraus ein int; mehrere Jahre hintereinander ergeben wieder einen int, in dem
+Bit n der n-te Tag ab dem 1. Januar des ersten Jahres ist. Streaks, Quoten
+und Heatmaps sind damit Verschiebungen, Masken und bit_count() über den
+ganzen Zeitraum – keine Schleife über Tage.
+"""
+from calendar import isleap
+from datetime import date
+
+YEAR_BYTES = 46          # 366 Bits, auch Schaltjahre passen hinein
+RATIO_WINDOWS = (7, 30, 90)
+
+
+def days_in_year(year):
+    return 366 if isleap(year) else 365
+
+
+def day_index(day):
+    # Bit des Tages in seinem Jahres-Bitset
+    return day.timetuple().tm_yday - 1
+
+
+def unpack(blob):
+    return int.from_bytes(blob, "little") if blob else 0
+
+
+def pack(bits):
+    return bits.to_bytes(YEAR_BYTES, "little")
+
+
+def set_days(bits, indices, done):
+    """
+    Setzt (done) bzw. löscht die Bits der angegebenen Tage.
+    """
+    mask = 0
+    for index in indices:
+        mask |= 1 << index
+    return bits | mask if done else bits & ~mask
+
+
+def join_years(blobs, first_year, last_year):
+    """
+    Hängt die Jahres-Bitsets {jahr: blob} von first_year bis last_year zu einem
+    int aneinander; fehlende Jahre zählen als leer. Bit 0 = 1. Januar first_year.
+    """
+    bits = offset = 0
+    for year in range(first_year, last_year + 1):
+        days = days_in_year(year)
+        bits |= (unpack(blobs.get(year)) & ((1 << days) - 1)) << offset
+        offset += days
+    return bits
+
+
+def current_streak(bits, today):
+    """
+    Tage in Folge bis today (Bitposition). Ist today noch nicht erledigt, zählt
+    die Serie bis gestern – sie ist erst gerissen, wenn auch heute vorbei ist.
+    """
+    if not bits >> today & 1:
+        today -= 1
+    if today < 0:
+        return 0
+    # Höchstes nicht gesetztes Bit bis today begrenzt die Serie
+    gaps = ~bits & ((1 << (today + 1)) - 1)
+    return today + 1 if not gaps else today - (gaps.bit_length() - 1)
+
+
+def longest_streak(bits):
+    """
+    Längste Folge gesetzter Bits. runs[k] markiert die Tage, ab denen mindestens
+    k Tage in Folge erledigt sind (runs[2k] = runs[k] & runs[k] >> k); erst
+    verdoppeln, dann mit den kleineren Stufen auffüllen – O(log n) int-Operationen.
+    """
+    if not bits:
+        return 0
+    runs = [(1, bits)]
+    while True:
+        length, starts = runs[-1]
+        longer = starts & (starts >> length)
+        if not longer:
+            break
+        runs.append((2 * length, longer))
+    length, starts = runs.pop()
+    for step, step_starts in reversed(runs):
+        longer = starts & (step_starts >> length)
+        if longer:
+            length, starts = length + step, longer
+    return length
+
+
+def ratio(bits, end, window, first=0):
+    """
+    Anteil erledigter Tage in den window Tagen bis einschließlich end
+    (Bitpositionen). Tage vor first (Beginn der Gewohnheit) zählen nicht mit.
+    """
+    days = min(window, end - first + 1)
+    if days <= 0:
+        return 0.0
+    done = (bits >> (end - days + 1) & ((1 << days) - 1)).bit_count()
+    return round(done / days, 3)
+
+
+def year_grid(blob, year):
+    """
+    Heatmap eines Jahres: "0"/"1" pro Tag ab dem 1. Januar, dazu der Wochentag
+    des 1. Januar (0 = Montag) für die Ausrichtung im Raster.
+    """
+    days = days_in_year(year)
+    bits = unpack(blob) & ((1 << days) - 1)
+    return {
+        "days": format(bits, f"0{days}b")[::-1],
+        "done": bits.bit_count(),
+        "first_weekday": date(year, 1, 1).weekday(),
+    }
+
+
+def habit_stats(blobs, start_date, today):
+    """
+    Streaks und Quoten einer Gewohnheit am Tag today.
+    blobs: {jahr: blob} von start_date.year bis today.year (fehlende Jahre = leer)
+    """
+    first_year = min(start_date.year, today.year)
+    bits = join_years(blobs, first_year, today.year)
+    origin = date(first_year, 1, 1).toordinal()
+    end = today.toordinal() - origin
+    first = max(start_date.toordinal() - origin, 0)
+    # Tage nach today (Einträge im Voraus) fließen nicht ein
+    bits &= (1 << (end + 1)) - 1
+    return {
+        "current_streak": current_streak(bits, end),
+        "longest_streak": longest_streak(bits),
+        "ratios": {str(window): ratio(bits, end, window, first) for window in RATIO_WINDOWS},
+        "total_done": bits.bit_count(),
+    }
@@ -1,122 +1,506 @@
 # habits.py
 from flask import Blueprint, render_template, request, redirect, url_for, jsonify
-from datetime import datetime
+from flask_login import current_user, login_required
+from datetime import date, timedelta
+import json
 import sqlite3
 
+import db
+import habit_analytics
+from cache import bump_data_version, HABITS_SCOPE
+from conditional import conditional
+
 habits_bp = Blueprint('habits', __name__, template_folder='templates')
 
 DATABASE = "tasks.db"  # Du kannst dieselbe DB verwenden oder eine separate
 
 
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+def get_db_connection(write=False):
+    # Request-gebundene Verbindung bzw. Pool-Verbindung, siehe db.py
+    return db.connection(DATABASE, write=write)
 
 
-def init_db():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS daily_habits (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            habit_date TEXT UNIQUE,
-            alcohol INTEGER DEFAULT 0,
-            smoke INTEGER DEFAULT 0,
-            sport INTEGER DEFAULT 0
-        )
-    """)
-    conn.commit()
-    conn.close()
+HABIT_FIELDS = ("alcohol", "smoke", "sport")
+PERIODS = ("month", "quarter", "year")
+HABIT_PAGE_SIZE = 100
+MAX_HABIT_PAGE = 400
+MAX_UPDATE_DAYS = 400  # ein Jahr + Rand pro POST
+
+# Alle Tage nach dem letzten Eintrag bis einschließlich heute in einer Anweisung.
+# Gibt es noch keinen Eintrag, entsteht nur der für heute; ist schon alles da,
+# liefert die Rekursion keinen Tag <= today und es wird nichts geschrieben.
+FILL_MISSING_DAYS_SQL = """
+    INSERT OR IGNORE INTO daily_habits (habit_date)
+    WITH RECURSIVE days(day) AS (
+        SELECT date(COALESCE(MAX(habit_date), date(:today, '-1 day')), '+1 day') FROM daily_habits
+        UNION ALL
+        SELECT date(day, '+1 day') FROM days WHERE day < :today
+    )
+    SELECT day FROM days WHERE day <= :today
+"""
+
+UPSERT_HABIT_SQL = f"""
+    INSERT INTO daily_habits (habit_date, {", ".join(HABIT_FIELDS)})
+    VALUES (?, {", ".join("?" for _ in HABIT_FIELDS)})
+    ON CONFLICT(habit_date) DO UPDATE SET {", ".join(f"{f} = excluded.{f}" for f in HABIT_FIELDS)}
+"""
+
+
+def habit_window(period, day):
+    """
+    Halboffenes Intervall [start, end) des Monats, Quartals oder Jahres, in dem day liegt.
+    Wirft ValueError bei unbekanntem Zeitraum.
+    """
+    if period == "year":
+        return date(day.year, 1, 1), date(day.year + 1, 1, 1)
+    if period == "quarter":
+        first_month = (day.month - 1) // 3 * 3 + 1
+    elif period == "month":
+        first_month = day.month
+    else:
+        raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+    months = 3 if period == "quarter" else 1
+    start = date(day.year, first_month, 1)
+    end_month = first_month + months - 1
+    end = date(day.year + end_month // 12, end_month % 12 + 1, 1)
+    return start, end
+
+
+def parse_window_args(args):
+    """
+    Liest period (month|quarter|year), date (ein Tag im Zeitraum, Standard heute)
+    und after (habit_date des letzten Eintrags der vorigen Seite) aus den Query-Parametern.
+    Wirft ValueError bei ungültigen Werten.
+    """
+    period = args.get("period", "month")
+    day = date.fromisoformat(args["date"]) if args.get("date") else date.today()
+    start, end = habit_window(period, day)
+    after = args.get("after") or None
+    if after:
+        after = date.fromisoformat(after).isoformat()
+    return period, start, end, after
+
+
+def fill_missing_days(cursor, today):
+    """
+    Legt die fehlenden Tage bis today an (alle Gewohnheiten 0).
+    Gibt die Zahl der neuen Einträge zurück.
+    """
+    cursor.execute(FILL_MISSING_DAYS_SQL, {"today": today.isoformat()})
+    return cursor.rowcount
+
+
+def load_habit_page(cursor, start, end, limit, after=None):
+    """
+    Eine Seite der Einträge in [start, end), aufsteigend nach Datum (Keyset über
+    habit_date, Bereichssuche auf dessen UNIQUE-Index). Liefert (Einträge, after
+    für die nächste Seite oder None).
+    """
+    cursor.execute(f"""
+        SELECT id, habit_date, {", ".join(HABIT_FIELDS)}
+        FROM daily_habits
+        WHERE habit_date >= :start AND habit_date < :end
+          AND habit_date > :after
+        ORDER BY habit_date
+        LIMIT :limit
+    """, {"start": start.isoformat(), "end": end.isoformat(), "after": after or "", "limit": limit + 1})
+    rows = cursor.fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    return rows[:limit], rows[limit - 1]["habit_date"]
 
 
-# Initialisiere die Tabelle, falls noch nicht vorhanden
-init_db()
+def _habit_date(value, field="habit_date"):
+    if not isinstance(value, str):
+        raise ValueError(f"{field} is required")
+    return date.fromisoformat(value)
+
+
+def _flag(value):
+    flag = int(value)
+    if flag not in (0, 1):
+        raise ValueError("habit values must be 0 or 1")
+    return flag
+
+
+def parse_habit_entries(req):
+    """
+    Einträge eines POSTs an /update_habit als Liste von (habit_date, alcohol, smoke, sport).
+
+    JSON: {"entries": [{"habit_date": ..., "alcohol": 0|1, ...}, ...]}
+    Formular: habit_date und optional habit_date_end – dieselben Werte für jeden Tag
+    von habit_date bis einschließlich habit_date_end.
+    Wirft ValueError bei ungültigen Daten oder mehr als MAX_UPDATE_DAYS Tagen.
+    """
+    if req.is_json:
+        items = (req.get_json(silent=True) or {}).get("entries")
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise ValueError("entries must be a list of objects")
+        entries = [(_habit_date(item.get("habit_date")).isoformat(),
+                    *(_flag(item.get(field, 0)) for field in HABIT_FIELDS))
+                   for item in items]
+    else:
+        first = _habit_date(req.form.get("habit_date"))
+        last = _habit_date(req.form.get("habit_date_end") or first.isoformat())
+        if last < first:
+            raise ValueError("habit_date_end must not be before habit_date")
+        if (last - first).days >= MAX_UPDATE_DAYS:
+            raise ValueError(f"at most {MAX_UPDATE_DAYS} days per request")
+        values = tuple(_flag(req.form.get(field, 0)) for field in HABIT_FIELDS)
+        entries = [((first + timedelta(days=i)).isoformat(), *values)
+                   for i in range((last - first).days + 1)]
+    if len(entries) > MAX_UPDATE_DAYS:
+        raise ValueError(f"at most {MAX_UPDATE_DAYS} days per request")
+    return entries
 
 
 @habits_bp.route("/")
 def show_habits():
-    from datetime import datetime, timedelta
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Ermittele das letzte Datum, für das ein Eintrag existiert
-    cursor.execute("SELECT MAX(habit_date) as last_date FROM daily_habits")
-    row = cursor.fetchone()
-    last_date_str = row["last_date"] if row["last_date"] else None
-
-    today = datetime.now().date()
-    # Falls noch kein Eintrag existiert, setzen wir last_date auf gestern,
-    # damit mindestens für heute ein Eintrag erstellt wird.
-    if last_date_str:
-        last_date = datetime.strptime(last_date_str, "%Y-%m-%d").date()
-    else:
-        last_date = today - timedelta(days=1)
-
-    # Berechne, wie viele Tage seit dem letzten Eintrag vergangen sind
-    missing_days = (today - last_date).days
-    if missing_days > 0:
-        # Für jeden fehlenden Tag einen Eintrag erstellen
-        for i in range(1, missing_days + 1):
-            day = last_date + timedelta(days=i)
-            try:
-                cursor.execute("""
-                    INSERT INTO daily_habits (habit_date, alcohol, smoke, sport)
-                    VALUES (?, 0, 0, 0)
-                """, (day.strftime("%Y-%m-%d"),))
-            except sqlite3.IntegrityError:
-                # Falls für den Tag bereits ein Eintrag existiert, ignoriere
-                pass
-        conn.commit()
+    """
+    Einträge eines Zeitraums. Parameter: period (month|quarter|year), date, after;
+    bei ungültigen Werten der aktuelle Monat.
+    """
+    try:
+        period, start, end, after = parse_window_args(request.args)
+    except ValueError:
+        # Wie der Kalender: ungültige Parameter zeigen den aktuellen Zeitraum
+        period, start, end, after = parse_window_args({})
+
+    # Seit dem letzten Besuch fehlende Tage anlegen – eine Anweisung, egal wie viele.
+    # Vor conditional(), damit das ETag schon die neue Version enthält.
+    today = date.today()
+    with get_db_connection() as conn:
+        last = conn.execute("SELECT MAX(habit_date) FROM daily_habits").fetchone()[0]
+    if last is None or last < today.isoformat():
+        with get_db_connection(write=True) as conn:
+            cursor = conn.cursor()
+            if fill_missing_days(cursor, today):
+                bump_data_version(cursor, HABITS_SCOPE)
+                conn.commit()
 
-    # Jetzt alle Einträge abrufen
-    cursor.execute("SELECT * FROM daily_habits ORDER BY habit_date ASC")
-    habits = cursor.fetchall()
-    conn.close()
-    return render_template("habits.html", habits=habits)
+    def render():
+        with get_db_connection() as conn:
+            habits, next_after = load_habit_page(conn.cursor(), start, end, HABIT_PAGE_SIZE, after)
+        return render_template("habits.html", habits=habits, next_after=next_after, period=period,
+                               start=start, last_date=(end - timedelta(days=1)).isoformat(), periods=PERIODS,
+                               previous_date=(start - timedelta(days=1)).isoformat(),
+                               next_date=end.isoformat())
 
+    return conditional("habits", (HABITS_SCOPE,), render, extra=(period, start, after), html=True)
 
 
 @habits_bp.route("/update_habit", methods=["POST"])
 def update_habit():
     """
-    Nimmt einen POST-Request entgegen, um die Gewohnheitseinträge für einen bestimmten Tag zu aktualisieren.
-    Erwartet Felder: habit_date, alcohol, smoke, sport.
+    Setzt die Gewohnheiten für einen oder viele Tage (UPSERT über habit_date),
+    Eingabe siehe parse_habit_entries. Formulare werden zur Übersicht umgeleitet,
+    JSON-Requests bekommen {"ok": true, "updated": n}.
     """
-    habit_date = request.form.get("habit_date")
-    alcohol = int(request.form.get("alcohol", 0))
-    smoke = int(request.form.get("smoke", 0))
-    sport = int(request.form.get("sport", 0))
+    try:
+        entries = parse_habit_entries(request)
+    except (TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    # Versuche, einen bestehenden Eintrag zu aktualisieren. Falls keiner existiert, erstelle einen neuen.
-    cursor.execute("SELECT id FROM daily_habits WHERE habit_date = ?", (habit_date,))
-    row = cursor.fetchone()
-    if row:
-        cursor.execute("""
-            UPDATE daily_habits
-            SET alcohol = ?, smoke = ?, sport = ?
-            WHERE habit_date = ?
-        """, (alcohol, smoke, sport, habit_date))
-    else:
-        cursor.execute("""
-            INSERT INTO daily_habits (habit_date, alcohol, smoke, sport)
-            VALUES (?, ?, ?, ?)
-        """, (habit_date, alcohol, smoke, sport))
-    conn.commit()
-    conn.close()
-    return redirect(url_for("habits.show_habits"))
+    with get_db_connection(write=True) as conn:
+        cursor = conn.cursor()
+        cursor.executemany(UPSERT_HABIT_SQL, entries)
+        bump_data_version(cursor, HABITS_SCOPE)
+        conn.commit()
+    if request.is_json:
+        return jsonify({"ok": True, "updated": len(entries)})
+    return redirect(url_for("habits.show_habits", date=entries[0][0]))
 
 
-# Optional: API-Endpunkt, um die Gewohnheiten als JSON abzurufen (z.B. für eine dynamische Kalenderansicht)
+# API-Endpunkt für die Kalenderansicht: ein Zeitraum, seitenweise
 @habits_bp.route("/api/habits")
 def api_habits():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM daily_habits ORDER BY habit_date ASC")
-    habits = cursor.fetchall()
-    conn.close()
-    habits_list = [dict(row) for row in habits]
-    return jsonify(habits_list)
+    """
+    Parameter: period (month|quarter|year), date, after (aus "next"), limit.
+    Liefert {"start": ..., "end": ..., "habits": [...], "next": ...}.
+    """
+    try:
+        period, start, end, after = parse_window_args(request.args)
+        limit = int(request.args.get("limit", HABIT_PAGE_SIZE))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not 1 <= limit <= MAX_HABIT_PAGE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_HABIT_PAGE}"}), 400
+
+    def build():
+        with get_db_connection() as conn:
+            habits, next_after = load_habit_page(conn.cursor(), start, end, limit, after)
+        return jsonify({"start": start.isoformat(), "end": end.isoformat(), "habits": habits, "next": next_after})
+
+    return conditional("habits_api", (HABITS_SCOPE,), build, extra=(period, start, after, limit))
+
+
+# ---------------------------------------------------------------------------
+# Eigene Gewohnheiten pro User (habit_definitions/habit_years, Migration 13).
+# Ein Jahr einer Gewohnheit ist ein Bitset, siehe habit_analytics.py.
+# ---------------------------------------------------------------------------
+
+# Übernahme aus daily_habits: (Spalte, Name, Farbe wie in habits.js)
+LEGACY_HABITS = (("alcohol", "Alkohol", "#ff9999"), ("smoke", "Rauchen", "#cccccc"), ("sport", "Sport", "#99ff99"))
+
+UPSERT_HABIT_YEAR_SQL = """
+    INSERT INTO habit_years (habit_id, year, bits) VALUES (?, ?, ?)
+    ON CONFLICT(habit_id, year) DO UPDATE SET bits = excluded.bits
+"""
+
+
+def load_habit_definitions(cursor, user_id):
+    cursor.execute("""
+        SELECT id, name, color, start_date, position
+        FROM habit_definitions
+        WHERE user_id = ?
+        ORDER BY position, id
+    """, (user_id,))
+    return cursor.fetchall()
+
+
+def create_habit(cursor, user_id, name, color=None, start_date=None):
+    """
+    Legt eine Gewohnheit am Ende der Liste an. Wirft ValueError, wenn der User
+    schon eine mit diesem Namen hat.
+    """
+    try:
+        cursor.execute("""
+            INSERT INTO habit_definitions (user_id, name, color, start_date, position)
+            VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(position) + 1, 0) FROM habit_definitions WHERE user_id = ?))
+        """, (user_id, name, color, (start_date or date.today()).isoformat(), user_id))
+    except sqlite3.IntegrityError:
+        raise ValueError(f"habit {name!r} already exists")
+    return cursor.lastrowid
+
+
+def _load_year_bits(cursor, habit_ids, years):
+    # {(habit_id, jahr): bits als int} für alle Kombinationen, die es schon gibt
+    cursor.execute("""
+        SELECT habit_id, year, bits
+        FROM habit_years
+        WHERE habit_id IN (SELECT value FROM json_each(?))
+          AND year IN (SELECT value FROM json_each(?))
+    """, (json.dumps(sorted(habit_ids)), json.dumps(sorted(years))))
+    return {(row["habit_id"], row["year"]): habit_analytics.unpack(row["bits"]) for row in cursor.fetchall()}
+
+
+def set_habit_days(cursor, user_id, entries):
+    """
+    entries: Liste von (habit_id, date, done). Liest die betroffenen Jahres-
+    Bitsets einmal, setzt bzw. löscht die Bits und schreibt jedes Bitset einmal
+    zurück. Einträge vor dem Beginn einer Gewohnheit verschieben ihren Beginn.
+    Wirft ValueError bei Gewohnheiten, die nicht dem User gehören.
+    """
+    habit_ids = {habit_id for habit_id, _, _ in entries}
+    cursor.execute("""
+        SELECT id FROM habit_definitions
+        WHERE user_id = ? AND id IN (SELECT value FROM json_each(?))
+    """, (user_id, json.dumps(sorted(habit_ids))))
+    unknown = habit_ids - {row["id"] for row in cursor.fetchall()}
+    if unknown:
+        raise ValueError(f"unknown habit_id {min(unknown)}")
+
+    bits = _load_year_bits(cursor, habit_ids, {day.year for _, day, _ in entries})
+    first_day = {}
+    for habit_id, day, done in entries:
+        key = (habit_id, day.year)
+        bits[key] = habit_analytics.set_days(bits.get(key, 0), (habit_analytics.day_index(day),), done)
+        first_day[habit_id] = min(first_day.get(habit_id, day), day)
+    cursor.executemany(UPSERT_HABIT_YEAR_SQL,
+                       [(habit_id, year, habit_analytics.pack(value)) for (habit_id, year), value in bits.items()])
+    cursor.executemany("UPDATE habit_definitions SET start_date = MIN(start_date, ?) WHERE id = ?",
+                       [(day.isoformat(), habit_id) for habit_id, day in first_day.items()])
+
+
+def load_habit_year(cursor, user_id, year):
+    """
+    Heatmap-Daten eines Jahres für alle Gewohnheiten des Users – ein Bitset
+    (46 Bytes) pro Gewohnheit.
+    """
+    cursor.execute("""
+        SELECT d.id, d.name, d.color, y.bits
+        FROM habit_definitions d
+        LEFT JOIN habit_years y ON y.habit_id = d.id AND y.year = ?
+        WHERE d.user_id = ?
+        ORDER BY d.position, d.id
+    """, (year, user_id))
+    return [{"id": row["id"], "name": row["name"], "color": row["color"],
+             **habit_analytics.year_grid(row["bits"], year)}
+            for row in cursor.fetchall()]
+
+
+def load_habit_stats(cursor, user_id, today):
+    """
+    Streaks und 7/30/90-Tage-Quoten aller Gewohnheiten des Users am Tag today,
+    aus den Jahres-Bitsets bis today.year.
+    """
+    cursor.execute("""
+        SELECT d.id, d.name, d.color, d.start_date, y.year, y.bits
+        FROM habit_definitions d
+        LEFT JOIN habit_years y ON y.habit_id = d.id AND y.year <= ?
+        WHERE d.user_id = ?
+        ORDER BY d.position, d.id, y.year
+    """, (today.year, user_id))
+    habits = {}
+    for row in cursor.fetchall():
+        habit = habits.setdefault(row["id"], {"id": row["id"], "name": row["name"], "color": row["color"],
+                                              "start_date": row["start_date"], "blobs": {}})
+        if row["year"] is not None:
+            habit["blobs"][row["year"]] = row["bits"]
+    return [{"id": habit["id"], "name": habit["name"], "color": habit["color"],
+             **habit_analytics.habit_stats(habit.pop("blobs"), date.fromisoformat(habit["start_date"]), today)}
+            for habit in habits.values()]
+
+
+def import_daily_habits(cursor, user_id):
+    """
+    Übernimmt alcohol/smoke/sport aus daily_habits als drei Gewohnheiten des
+    Users. Schon vorhandene Tage bleiben erhalten (ODER), mehrfaches Ausführen
+    ändert nichts. Gibt die Zahl der gelesenen Tage zurück.
+    """
+    cursor.execute("SELECT MIN(habit_date) FROM daily_habits")
+    first = cursor.fetchone()[0]
+    if first is None:
+        return 0
+    habit_ids = {}
+    for column, name, color in LEGACY_HABITS:
+        cursor.execute("""
+            INSERT OR IGNORE INTO habit_definitions (user_id, name, color, start_date, position)
+            VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(position) + 1, 0) FROM habit_definitions WHERE user_id = ?))
+        """, (user_id, name, color, first, user_id))
+        cursor.execute("SELECT id FROM habit_definitions WHERE user_id = ? AND name = ?", (user_id, name))
+        habit_ids[column] = cursor.fetchone()["id"]
+
+    cursor.execute(f"SELECT habit_date, {', '.join(HABIT_FIELDS)} FROM daily_habits ORDER BY habit_date")
+    rows = cursor.fetchall()
+    years = {int(row["habit_date"][:4]) for row in rows}
+    bits = _load_year_bits(cursor, set(habit_ids.values()), years)
+    for row in rows:
+        day = date.fromisoformat(row["habit_date"])
+        for column, habit_id in habit_ids.items():
+            if row[column]:
+                key = (habit_id, day.year)
+                bits[key] = bits.get(key, 0) | 1 << habit_analytics.day_index(day)
+    cursor.executemany(UPSERT_HABIT_YEAR_SQL,
+                       [(habit_id, year, habit_analytics.pack(value)) for (habit_id, year), value in bits.items()])
+    cursor.executemany("UPDATE habit_definitions SET start_date = MIN(start_date, ?) WHERE id = ?",
+                       [(first, habit_id) for habit_id in habit_ids.values()])
+    return len(rows)
+
+
+def parse_day_entries(data):
+    """
+    {"entries": [{"habit_id": ..., "date": "YYYY-MM-DD", "done": 0|1}, ...]}
+    als Liste von (habit_id, date, done). Wirft ValueError bei ungültigen Daten.
+    """
+    items = (data or {}).get("entries")
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValueError("entries must be a list of objects")
+    if not items:
+        raise ValueError("entries must not be empty")
+    if len(items) > MAX_UPDATE_DAYS:
+        raise ValueError(f"at most {MAX_UPDATE_DAYS} entries per request")
+    if not all("habit_id" in item for item in items):
+        raise ValueError("habit_id is required")
+    return [(int(item["habit_id"]), _habit_date(item.get("date"), "date"), _flag(item.get("done", 1)))
+            for item in items]
+
+
+@habits_bp.route("/api/definitions")
+@login_required
+def api_habit_definitions():
+    def build():
+        with get_db_connection() as conn:
+            return jsonify(load_habit_definitions(conn.cursor(), current_user.id))
+
+    return conditional("habit_definitions", (current_user.id,), build)
+
+
+@habits_bp.route("/api/definitions", methods=["POST"])
+@login_required
+def add_habit_definition():
+    """
+    Neue Gewohnheit. JSON oder Formular: name, color (optional).
+    """
+    data = request.get_json(silent=True) if request.is_json else request.form
+    name = ((data or {}).get("name") or "").strip()
+    if not name:
+        return jsonify({"ok": False, "error": "name is required"}), 400
+    with get_db_connection(write=True) as conn:
+        cursor = conn.cursor()
+        try:
+            habit_id = create_habit(cursor, current_user.id, name, (data or {}).get("color"))
+        except ValueError as e:
+            return jsonify({"ok": False, "error": str(e)}), 409
+        bump_data_version(cursor, current_user.id)
+        conn.commit()
+    return jsonify({"ok": True, "id": habit_id})
+
+
+@habits_bp.route("/api/definitions/<int:habit_id>/delete", methods=["POST"])
+@login_required
+def delete_habit_definition(habit_id):
+    with get_db_connection(write=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM habit_definitions WHERE id = ? AND user_id = ?", (habit_id, current_user.id))
+        if not cursor.rowcount:
+            return jsonify({"ok": False, "error": "habit not found"}), 404
+        bump_data_version(cursor, current_user.id)
+        conn.commit()
+    return jsonify({"ok": True})
+
+
+@habits_bp.route("/api/days", methods=["POST"])
+@login_required
+def set_habit_days_api():
+    """
+    Tage eigener Gewohnheiten abhaken oder zurücknehmen, Eingabe siehe parse_day_entries.
+    """
+    try:
+        entries = parse_day_entries(request.get_json(silent=True))
+    except (TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    with get_db_connection(write=True) as conn:
+        cursor = conn.cursor()
+        try:
+            set_habit_days(cursor, current_user.id, entries)
+        except ValueError as e:
+            return jsonify({"ok": False, "error": str(e)}), 404
+        bump_data_version(cursor, current_user.id)
+        conn.commit()
+    return jsonify({"ok": True, "updated": len(entries)})
+
+
+@habits_bp.route("/api/year/<int:year>")
+@login_required
+def api_habit_year(year):
+    """
+    Heatmap eines Jahres: pro Gewohnheit days ("0"/"1" je Tag), done und first_weekday.
+    """
+    if not 1 <= year <= 9999:
+        return jsonify({"error": "invalid year"}), 400
+
+    def build():
+        with get_db_connection() as conn:
+            return jsonify({"year": year, "habits": load_habit_year(conn.cursor(), current_user.id, year)})
+
+    return conditional("habit_year", (current_user.id,), build, extra=(year,))
+
+
+@habits_bp.route("/api/stats")
+@login_required
+def api_habit_stats():
+    """
+    Aktuelle und längste Serie sowie 7/30/90-Tage-Quoten je Gewohnheit.
+    Parameter: date (Stichtag, Standard heute).
+    """
+    try:
+        today = date.fromisoformat(request.args["date"]) if request.args.get("date") else date.today()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def build():
+        with get_db_connection() as conn:
+            return jsonify({"date": today.isoformat(), "habits": load_habit_stats(conn.cursor(), current_user.id, today)})
 
+    return conditional("habit_stats", (current_user.id,), build, extra=(today,))
@@ -1,11 +1,115 @@
 # File: list_manager.py
 
+import json
 import sqlite3
 from datetime import datetime, timedelta, date
 from prompt_toolkit import prompt
 from prompt_toolkit.completion import WordCompleter
 from flask_login import current_user
 
+import db
+import migrations
+import calendar_service
+import recurrence
+import ordering
+import events
+import task_tree
+from cache import data_cache, bump_data_version
+
+
+# Tasks des Users (:task_ids als JSON-Array) samt allen Nachfahren, mit Tiefe
+# (0 = der Task selbst). Wird als Unterabfrage eingebettet, damit das Statement
+# mit UPDATE/DELETE beginnt und das sqlite3-Modul die Transaktion öffnet.
+SUBTREE_CTE = """
+    WITH RECURSIVE subtree(id, depth) AS (
+        SELECT id, 0 FROM tasks
+        WHERE id IN (SELECT value FROM json_each(:task_ids)) AND user_id = :user_id
+        UNION ALL
+        SELECT t.id, s.depth + 1
+        FROM tasks t
+        JOIN subtree s ON t.parent_id = s.id
+        WHERE t.user_id = :user_id
+          AND s.depth < :max_depth
+    )
+"""
+MAX_TREE_DEPTH = 100  # Schutz gegen Zyklen in parent_id
+
+COMPLETED_PAGE_SIZE = 20   # erledigte Tasks pro Seite (Listen rendern nur die erste)
+MAX_COMPLETED_PAGE = 200
+
+# Beim Abhaken den Zeitpunkt setzen – schon erledigte Unteraufgaben behalten ihren –,
+# beim Zurücknehmen löschen. completed rechts vom = ist noch der alte Wert.
+COMPLETED_AT_SQL = """
+    completed_at = CASE
+        WHEN {flag} THEN COALESCE(CASE WHEN completed = 1 THEN completed_at END,
+                                  strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+    END
+"""
+
+
+# Übersichten laden statt der Beschreibung nur, ob es eine gibt – bzw. wo die
+# Vorlage sie positionsweise anzeigt, ihren Anfang. Den ganzen Text liefert
+# get_task_details (GET /task/<id>) erst beim Aufklappen.
+HAS_DESCRIPTION_SQL = "COALESCE(description, '') <> '' AS has_description"
+DESCRIPTION_PREVIEW = 80
+DESCRIPTION_PREVIEW_SQL = f"substr(description, 1, {DESCRIPTION_PREVIEW}) AS description"
+
+# Spalten der Detailansicht eines Tasks
+TASK_DETAIL_COLUMNS = ("id, title, description, due_date, completed, completed_at, estimated_time, "
+                       "list_name, parent_id, position, color, updated_at")
+
+
+def _id_list(ids):
+    # IDs als JSON-Array für json_each(...) – eine Abfrage für beliebig viele Tasks
+    return json.dumps([int(i) for i in ids])
+
+
+def encode_completed_cursor(completed_at, task_id):
+    return f"{completed_at or ''}:{task_id}"
+
+
+def decode_completed_cursor(cursor):
+    """
+    Wirft ValueError bei ungültigem Cursor.
+    """
+    completed_at, task_id = cursor.rsplit(":", 1)
+    return completed_at or None, int(task_id)
+
+
+def completed_page(cur, table, list_column, list_name, user_id, columns, limit, after=None):
+    """
+    Eine Seite erledigter Tasks, zuletzt erledigte zuerst (Keyset über completed_at, id).
+    Liest limit + 1 Zeilen über den Teilindex aus Migration 9; ob es weitergeht,
+    entscheidet page_result. Tasks ohne completed_at (Altbestand aus Importen) kommen zuletzt.
+    """
+    keyset, params = "", {"list_name": list_name, "user_id": user_id, "limit": limit + 1}
+    if after is not None:
+        params["at"], params["id"] = decode_completed_cursor(after)
+        if params["at"] is None:
+            keyset = "AND completed_at IS NULL AND id < :id"
+        else:
+            keyset = """
+                AND (completed_at < :at OR (completed_at = :at AND id < :id) OR completed_at IS NULL)
+            """
+    cur.execute(f"""
+        SELECT {columns}, completed_at
+        FROM {table}
+        WHERE user_id = :user_id AND {list_column} = :list_name AND completed = 1
+        {keyset}
+        ORDER BY completed_at DESC, id DESC
+        LIMIT :limit
+    """, params)
+    return cur.fetchall()
+
+
+def page_result(rows, limit):
+    """
+    Teilt limit + 1 gelesene Zeilen in (Seite, Cursor der nächsten Seite oder None).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_completed_cursor(last["completed_at"], last["id"])
 
 
 def select_list(manager):
@@ -85,61 +189,45 @@ class TaskList:
 
 # ListManager class to handle lists and tasks
 class ListManager:
-    def __init__(self, db_name="tasks.db"):
-        self.conn = sqlite3.connect(db_name, check_same_thread=False)
-        self.cursor = self.conn.cursor()
+    def __init__(self, db_name=db.DATABASE):
+        self.db_name = db_name
         self._create_tables()
 
-    def get_db_connection(self):
+    def get_db_connection(self, write=False):
         """
-        Returns a connection to the SQLite database.
+        Returns a connection to the SQLite database (request-scoped, see db.py).
+        Use as context manager: with manager.get_db_connection() as conn: ...
         """
-        connection = sqlite3.connect("tasks.db")
-        connection.row_factory = sqlite3.Row  # Optional: Access rows like dictionaries
-        return connection
+        return db.connection(self.db_name, write=write)
 
     def get_list_color(self, list_name):
         """
         Fetches the color associated with a list name.
         """
-        connection = self.get_db_connection()
-        cursor = connection.cursor()
-        cursor.execute("SELECT color FROM tasks WHERE list_name = ? LIMIT 1", (list_name,))
-        row = cursor.fetchone()
-        connection.close()
+        with self.get_db_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT color FROM tasks WHERE list_name = ? LIMIT 1", (list_name,))
+            row = cursor.fetchone()
         return row[0] if row else "#ffffff"  # Default color if none exists
 
     def update_list_color(self, list_name, color):
         """
         Updates the color for all tasks in a given list name.
         """
-        connection = self.get_db_connection()
-        cursor = connection.cursor()
-        cursor.execute("""
-            UPDATE tasks
-            SET color = ?
-            WHERE list_name = ?
-        """, (color, list_name))
-        connection.commit()
-        connection.close()
+        with self.get_db_connection(write=True) as connection:
+            cursor = connection.cursor()
+            cursor.execute("""
+                UPDATE tasks
+                SET color = ?
+                WHERE list_name = ?
+            """, (color, list_name))
+            bump_data_version(cursor, current_user.id)
+            connection.commit()
+            events.notify()
 
     def _create_tables(self):
-        self.cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tasks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            list_name TEXT,
-            title TEXT,
-            description TEXT,
-            due_date TEXT,
-            completed INTEGER,
-            estimated_time INTEGER,
-            user_id INTEGER,
-            archived INTEGER DEFAULT 0,
-            parent_id INTEGER,
-            position INTEGER DEFAULT 0
-        )
-        """)
-        self.conn.commit()
+        # Schema liegt in migrations.py
+        migrations.migrate(self.db_name)
 
     def add_list(self, list_name):
         new_list = TaskList(list_name)
@@ -162,13 +250,27 @@ class ListManager:
         if user_id is None:
             raise ValueError("user_id must be provided when adding a task.")
 
-        connection = self.get_db_connection()
-        cursor = connection.cursor()
+        with self.get_db_connection(write=True) as connection:
+            cursor = connection.cursor()
+            task_id = self._insert_task(cursor, list_name, title, description, due_date,
+                                        estimated_time, parent_id, user_id)
+            bump_data_version(cursor, user_id)
+            connection.commit()
+            events.notify()
+        return task_id
+
+    def _insert_task(self, cursor, list_name, title, description, due_date,
+                     estimated_time, parent_id, user_id):
+        # Neue Tasks hinten an ihre Geschwister anhängen (dünn besetzte Positionen)
         cursor.execute("""
             INSERT INTO tasks
               (list_name, title, description, due_date,
                estimated_time, completed, user_id, parent_id, position)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, (
+                SELECT COALESCE(MAX(position), 0) + ?
+                FROM tasks
+                WHERE user_id = ? AND list_name = ? AND parent_id IS ?
+            ))
         """, (
             list_name,
             title,
@@ -178,51 +280,22 @@ class ListManager:
             0,
             user_id,
             parent_id,
-            0
+            ordering.POSITION_GAP,
+            user_id,
+            list_name,
+            parent_id
         ))
-        connection.commit()
-        connection.close()
+        return cursor.lastrowid
 
     def build_task_tree(self, tasks):
         """
-        Baut aus einer flachen Liste von Tasks eine verschachtelte Baumstruktur.
-        Nur uncompleted Tasks.
+        Baut aus einer flachen Liste offener Tasks die verschachtelte Baumstruktur.
 
-        tasks: Liste von dicts aus SQLite (mit id, parent_id, position)
+        tasks: Zeilen aus SQLite, sortiert nach task_tree.TREE_ORDER_SQL. Die Zeilen
+        werden selbst zu Knoten (children, subtask_count, estimated_total) – siehe
+        task_tree.build_forest.
         """
-        # 1. Index nach ID für schnelles Nachschlagen
-        task_dict = {task['id']: {**task, 'children': []} for task in tasks}
-
-        # 2. Liste für Wurzel-Tasks
-        tree = []
-
-        # 3. Tasks zuordnen
-        for task in tasks:
-            task_id = task['id']
-            parent_id = task['parent_id']
-
-            if parent_id is None:
-                # Wurzel-Task
-                tree.append(task_dict[task_id])
-            else:
-                # Untertask → an parent's children anhängen
-                parent_task = task_dict.get(parent_id)
-                if parent_task:
-                    parent_task['children'].append(task_dict[task_id])
-                else:
-                    # Falls Parent fehlt (evtl. DB-Inkonsistenz), trotzdem als Wurzel
-                    tree.append(task_dict[task_id])
-
-        # 4. Optional: Kinder nach position sortieren
-        def sort_children(task):
-            task['children'].sort(key=lambda x: x['position'])
-            for child in task['children']:
-                sort_children(child)
-
-        for t in tree:
-            sort_children(t)
-
-        return tree
+        return task_tree.build_forest(tasks)
 
     def get_task_by_id(self, task_id):
         # Suche in allen Hauptaufgaben
@@ -242,63 +315,68 @@ class ListManager:
         return None
 
     def get_tasks(self, list_name):
-        connection = self.get_db_connection()
-        cursor = connection.cursor()
-
-        # Uncompleted Tasks
-        cursor.execute("""
-            SELECT id, title, description, due_date, completed, parent_id, position
-            FROM tasks
-            WHERE list_name = ? AND completed = 0 AND user_id = ?
-        """, (list_name, current_user.id))
-        rows = cursor.fetchall()
-        #print("Rows from DB (incomplete):", rows)  # <--- Debug
-
-        # Dicts erzeugen
-        incomplete_tasks = [
-            {
-                "id": r[0],
-                "title": r[1],
-                "description": r[2],
-                "due_date": r[3],
-                "completed": r[4],
-                "parent_id": r[5],
-                "position": r[6],
-                "children": []
-            } for r in rows
-        ]
-        #print("Incomplete tasks dicts:", incomplete_tasks)  # <--- Debug
-
-        # Baum bauen
-        incomplete_tree = self.build_task_tree(incomplete_tasks)
-        #print("Incomplete tree:", incomplete_tree)  # <--- Debug
-
-        # Completed Tasks flach lassen
-        cursor.execute("""
-            SELECT id, title, description, due_date, completed
-            FROM tasks
-            WHERE list_name = ? AND completed = 1 AND user_id = ?
-            ORDER BY position
-        """, (list_name, current_user.id))
-        completed_rows = cursor.fetchall()
-        completed_tasks = [
-            {
-                "id": r[0],
-                "title": r[1],
-                "description": r[2],
-                "due_date": r[3],
-                "completed": r[4]
-            } for r in completed_rows
-        ]
-        #print("Completed tasks:", completed_tasks)  # <--- Debug
+        """
+        Liefert die Tasks einer Liste (gecacht pro User und Datenversion).
+        """
+        return data_cache.get_or_load(
+            "tasks", (current_user.id,), (list_name,),
+            lambda: self._load_tasks(list_name)
+        )
 
-        connection.close()
+    def _load_tasks(self, list_name):
+        with self.get_db_connection() as connection:
+            cursor = connection.cursor()
+
+            # Uncompleted Tasks, schon in Baumreihenfolge (Teilindex aus Migration 10)
+            cursor.execute(f"""
+                SELECT id, title, {HAS_DESCRIPTION_SQL}, due_date, estimated_time, completed, parent_id, position
+                FROM tasks
+                WHERE list_name = ? AND completed = 0 AND user_id = ?
+                ORDER BY {task_tree.TREE_ORDER_SQL}
+            """, (list_name, current_user.id))
+            rows = cursor.fetchall()
+
+            # Baum direkt aus den Zeilen bauen – keine Zwischen-dicts
+            incomplete_tree = self.build_task_tree(rows)
+
+            # Completed Tasks flach lassen – nur die erste Seite, den Rest lädt
+            # die Seite über /completed_tasks nach
+            completed_tasks, completed_next = page_result(completed_page(
+                cursor, "tasks", "list_name", list_name, current_user.id,
+                f"id, title, {HAS_DESCRIPTION_SQL}, due_date, completed", COMPLETED_PAGE_SIZE
+            ), COMPLETED_PAGE_SIZE)
 
         return {
             "incomplete": incomplete_tree,
-            "completed": completed_tasks
+            "completed": completed_tasks,
+            "completed_next": completed_next
         }
 
+    def get_completed_tasks(self, list_name, limit=COMPLETED_PAGE_SIZE, after=None):
+        """
+        Verlauf der erledigten Tasks einer Liste, seitenweise.
+        after: Cursor aus "next" der vorherigen Seite (ValueError, wenn ungültig)
+        Liefert {"tasks": [...], "next": Cursor oder None}.
+        """
+        with self.get_db_connection() as conn:
+            rows = completed_page(conn.cursor(), "tasks", "list_name", list_name, current_user.id,
+                                  f"id, title, {HAS_DESCRIPTION_SQL}, due_date, completed", limit, after)
+        rows, next_cursor = page_result(rows, limit)
+        return {"tasks": rows, "next": next_cursor}
+
+    def get_task_details(self, task_id):
+        """
+        Ein Task des aktuellen Users mit Beschreibung und allen Feldern der
+        Detailansicht, oder None.
+        """
+        with self.get_db_connection() as conn:
+            row = conn.execute(f"""
+                SELECT {TASK_DETAIL_COLUMNS}
+                FROM tasks
+                WHERE id = ? AND user_id = ?
+            """, (task_id, current_user.id)).fetchone()
+        return dict(row) if row else None
+
     def update_task(self, task_id, title=None, description=None, due_date=None, completed=None):
         """
         Aktualisiert einen Task, nur wenn er dem aktuell eingeloggten User gehört.
@@ -316,6 +394,8 @@ class ListManager:
             updates.append("due_date = ?")
             params.append(due_date)
         if completed is not None:
+            updates.append(COMPLETED_AT_SQL.format(flag="?"))
+            params.append(int(completed))
             updates.append("completed = ?")
             params.append(int(completed))
 
@@ -328,69 +408,115 @@ class ListManager:
         params.append(task_id)
         params.append(current_user.id)
 
-        # Führe das Update über eine neue DB-Verbindung aus
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute(query, params)
-        conn.commit()
-        conn.close()
+        # Führe das Update über die (Request-)Verbindung aus
+        with self.get_db_connection(write=True) as conn:
+            cur = conn.cursor()
+            cur.execute(query, params)
+            bump_data_version(cur, current_user.id)
+            conn.commit()
+            events.notify()
 
     def update_task_order(self, tasks, new_list_name=None):
         """
         tasks = [{"id": 1, "parent_id": None, "position": 0}, ...]
+                (position = Index in der neuen Reihenfolge der Geschwister)
         new_list_name = optional: wenn Task in andere Liste verschoben wurde
-        """
-        connection = self.get_db_connection()
-        cursor = connection.cursor()
 
-        for task in tasks:
-            print("DEBUG updating task:", task, "new_list_name:", new_list_name)
-
-            # Tabelle auswählen
-            if new_list_name in ["Today", "Next Day", "This Week", "This Month"]:
-                table = "special_list_tasks"
-            else:
-                table = "tasks"
-
-            if table == "special_list_tasks":
-                cursor.execute(f"""
-                    UPDATE {table}
-                    SET position = ?, parent_id = ?
-                    WHERE id = ? AND user_id = ?
-                """, (task['position'], task['parent_id'], task['id'], current_user.id))
-            else:
-                cursor.execute(f"""
-                    UPDATE {table}
-                    SET position = ?, parent_id = ?, list_name = ?
-                    WHERE id = ? AND user_id = ?
-                """, (task['position'], task['parent_id'], new_list_name, task['id'], current_user.id))
-
-            connection.commit()
-
-            cursor.execute(f"SELECT id, list_name, parent_id, position FROM {table} WHERE id=?", (task['id'],))
-            print("DEBUG db after update:", cursor.fetchone())
-
-        connection.close()
-
-    def add_recurring_task(self, title, frequency, start_date, interval_value=1):
+        Läuft in einer Transaktion und schreibt nur Tasks, deren Position,
+        Parent oder Liste sich wirklich ändert – bei einer verschobenen Karte
+        also meist genau eine Zeile (siehe ordering.py).
+        """
+        with self.get_db_connection(write=True) as connection:
+            cursor = connection.cursor()
+            if self._reorder(cursor, tasks, new_list_name):
+                bump_data_version(cursor, current_user.id)
+                connection.commit()
+                events.notify()
+
+    def _reorder(self, cursor, tasks, new_list_name=None):
+        """
+        Schreibt die neue Reihenfolge ohne Commit, liefert die Anzahl geänderter Zeilen.
+        """
+        if not tasks:
+            return 0
+        tasks = sorted(tasks, key=lambda t: t["position"])
+
+        # Tabelle auswählen
+        special = new_list_name in ["Today", "Next Day", "This Week", "This Month"]
+        table = "special_list_tasks" if special else "tasks"
+        list_column = "special_list_name" if special else "list_name"
+
+        cursor.execute(f"""
+            SELECT id, position, parent_id, {list_column}
+            FROM {table}
+            WHERE id IN (SELECT value FROM json_each(?)) AND user_id = ?
+        """, (_id_list([t["id"] for t in tasks]), current_user.id))
+        rows = {r[0]: r for r in cursor.fetchall()}
+
+        def target(t):
+            list_name = rows[t["id"]][3] if special or new_list_name is None else new_list_name
+            return t["parent_id"], list_name
+
+        # Nur Positionen von Tasks, die schon in dieser Geschwistergruppe waren, bleiben erhalten
+        present = [t for t in tasks if t["id"] in rows]
+        current = [
+            rows[t["id"]][1] if target(t) == tuple(rows[t["id"]][2:]) else None
+            for t in present
+        ]
+        positions = ordering.plan_positions(current)
+
+        changes = []
+        for t, position in zip(present, positions):
+            parent_id, list_name = target(t)
+            if (position, parent_id, list_name) != tuple(rows[t["id"]][1:]):
+                changes.append((position, parent_id, list_name, t["id"], current_user.id))
+
+        if changes:
+            cursor.executemany(f"""
+                UPDATE {table}
+                SET position = ?, parent_id = ?, {list_column} = ?
+                WHERE id = ? AND user_id = ?
+            """, changes)
+        return len(changes)
+
+    def add_recurring_task(self, title, frequency, start_date, interval_value=1, end_date=None):
         """
         Add a new recurring task for the current user.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO recurring_tasks
-                (title, frequency, start_date, interval_value, user_id)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            title,
-            frequency,
-            start_date,
-            interval_value,
-            current_user.id
-        ))
-        conn.commit()
-        conn.close()
+        with self.get_db_connection(write=True) as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT INTO recurring_tasks
+                    (title, frequency, start_date, interval_value, end_date, user_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (
+                title,
+                frequency,
+                start_date,
+                interval_value,
+                end_date,
+                current_user.id
+            ))
+            bump_data_version(cur, current_user.id)
+            conn.commit()
+            events.notify()
+
+    def skip_recurring_occurrence(self, recurring_task_id, skip_date):
+        """
+        Lässt einen einzelnen Termin einer wiederkehrenden Aufgabe des aktuellen Users aus.
+        """
+        with self.get_db_connection(write=True) as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT OR IGNORE INTO recurring_task_skips (recurring_task_id, skip_date)
+                SELECT id, ?
+                FROM recurring_tasks
+                WHERE id = ? AND user_id = ?
+            """, (skip_date, recurring_task_id, current_user.id))
+            if cur.rowcount:
+                bump_data_version(cur, current_user.id)
+            conn.commit()
+            events.notify()
 
     def should_run_task_addition(self, task_name):
         """
@@ -398,255 +524,302 @@ class ListManager:
         Falls nicht, speichert sie das Datum der letzten Ausführung in der Datenbank.
         Dieser Check bleibt global, erfasst also nicht User-spezifisch.
         """
-        connection = self.get_db_connection()
-        cursor = connection.cursor()
+        with self.get_db_connection(write=True) as connection:
+            cursor = connection.cursor()
 
-        today = date.today().isoformat()
+            today = date.today().isoformat()
 
-        cursor.execute("""
-            SELECT last_run FROM last_execution WHERE task = ?
-        """, (task_name,))
-        last_run = cursor.fetchone()
+            cursor.execute("""
+                SELECT last_run FROM last_execution WHERE task = ?
+            """, (task_name,))
+            last_run = cursor.fetchone()
 
-        if last_run and last_run[0] == today:
-            connection.close()
-            return False
+            if last_run and last_run[0] == today:
+                return False
 
-        cursor.execute("""
-            INSERT INTO last_execution (task, last_run)
-            VALUES (?, ?)
-            ON CONFLICT(task) DO UPDATE SET last_run = excluded.last_run
-        """, (task_name, today))
+            cursor.execute("""
+                INSERT INTO last_execution (task, last_run)
+                VALUES (?, ?)
+                ON CONFLICT(task) DO UPDATE SET last_run = excluded.last_run
+            """, (task_name, today))
 
-        connection.commit()
-        connection.close()
+            connection.commit()
         return True
 
     def add_recurring_tasks_to_special_lists(self):
         """
         Fügt wiederkehrende Aufgaben des aktuellen Users den Spezial‑Listen hinzu.
+        Welche Regel wann fällig ist, rechnet recurrence.py aus (inkl. Intervall,
+        Enddatum und ausgelassenen Terminen):
+          - tägliche Regeln mit Termin heute/morgen → Today / Next Day
+          - wöchentliche Regeln mit Termin in dieser Woche → This Week (montags)
+          - monatliche/jährliche Regeln mit Termin in diesem Monat → This Month (am 1.)
         """
         today = date.today()
+        tomorrow = today + timedelta(days=1)
         week_start = today - timedelta(days=today.weekday())
         month_start = today.replace(day=1)
+        month_end = calendar_service.month_range(today.year, today.month)[1]
 
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-
-        # tägliche recurring_tasks nur des current_user einfügen
-        cur.execute("""
-            INSERT INTO tasks (title, list_name, due_date, completed, user_id)
-            SELECT title, 'Today', ?, 0, ?
-            FROM recurring_tasks
-            WHERE frequency = 'daily' AND user_id = ?
-              AND NOT EXISTS (
-                SELECT 1 FROM tasks
-                WHERE title = recurring_tasks.title
-                  AND due_date = ?
-                  AND user_id = ?
-              )
-        """, (today.isoformat(),
-              current_user.id,
-              current_user.id,
-              today.isoformat(),
-              current_user.id))
-
-        # tomorrow
-        tomorrow = (today + timedelta(days=1)).isoformat()
-        cur.execute("""
-            INSERT INTO tasks (title, list_name, due_date, completed, user_id)
-            SELECT title, 'Next Day', ?, 0, ?
-            FROM recurring_tasks
-            WHERE frequency = 'daily' AND user_id = ?
-              AND NOT EXISTS (
-                SELECT 1 FROM tasks
-                WHERE title = recurring_tasks.title
-                  AND due_date = ?
-                  AND user_id = ?
-              )
-        """, (tomorrow,
-              current_user.id,
-              current_user.id,
-              tomorrow,
-              current_user.id))
-
-        # montags wöchentliche
+        # (list_name, Frequenzen, Fensterstart, Fensterende exklusiv)
+        windows = [
+            ("Today", ("daily",), today, tomorrow),
+            ("Next Day", ("daily",), tomorrow, tomorrow + timedelta(days=1)),
+        ]
         if today == week_start:
-            cur.execute("""
-                INSERT INTO tasks (title, list_name, due_date, completed, user_id)
-                SELECT title, 'This Week', ?, 0, ?
-                FROM recurring_tasks
-                WHERE frequency = 'weekly' AND user_id = ?
-                  AND NOT EXISTS (
-                    SELECT 1 FROM tasks
-                    WHERE title = recurring_tasks.title
-                      AND due_date = ?
-                      AND user_id = ?
-                  )
-            """, (week_start.isoformat(),
-                  current_user.id,
-                  current_user.id,
-                  week_start.isoformat(),
-                  current_user.id))
-
-        # am Monatsanfang monatliche
+            windows.append(("This Week", ("weekly",), week_start, week_start + timedelta(days=7)))
         if today == month_start:
+            windows.append(("This Month", ("monthly", "yearly"), month_start, month_end))
+
+        with self.get_db_connection(write=True) as conn:
+            cur = conn.cursor()
             cur.execute("""
-                INSERT INTO tasks (title, list_name, due_date, completed, user_id)
-                SELECT title, 'This Month', ?, 0, ?
+                SELECT id, title, frequency, interval_value, start_date, end_date
                 FROM recurring_tasks
-                WHERE frequency = 'monthly' AND user_id = ?
-                  AND NOT EXISTS (
+                WHERE user_id = ?
+                  AND (start_date IS NULL OR start_date < ?)
+                  AND (end_date IS NULL OR end_date >= ?)
+            """, (current_user.id, max(w[3] for w in windows).isoformat(), today.isoformat()))
+            rules = cur.fetchall()
+            skips = recurrence.load_skips(cur, current_user.id) if rules else {}
+
+            rows = []
+            for list_name, frequencies, start, end in windows:
+                for rule in rules:
+                    if rule["frequency"] not in frequencies:
+                        continue
+                    for d in recurrence.rule_occurrences(rule, start, end, skips):
+                        due = d.isoformat()
+                        rows.append((rule["title"], list_name, due, current_user.id,
+                                     rule["title"], due, current_user.id))
+
+            # pro Termin höchstens eine Aufgabe (gleicher Titel + Datum)
+            cur.executemany("""
+                INSERT INTO tasks (title, list_name, due_date, completed, user_id)
+                SELECT ?, ?, ?, 0, ?
+                WHERE NOT EXISTS (
                     SELECT 1 FROM tasks
-                    WHERE title = recurring_tasks.title
+                    WHERE title = ?
                       AND due_date = ?
                       AND user_id = ?
-                  )
-            """, (month_start.isoformat(),
-                  current_user.id,
-                  current_user.id,
-                  month_start.isoformat(),
-                  current_user.id))
+                )
+            """, rows)
 
-        conn.commit()
-        conn.close()
+            bump_data_version(cur, current_user.id)
+            conn.commit()
+            events.notify()
 
     def get_all_lists(self):
         """
         Liefert alle (öffentlichen) Listen‑Namen des aktuellen Users,
         exklusive Spezial‑ und Secret-Listen.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT DISTINCT list_name
-            FROM tasks
-            WHERE archived = 0
-              AND user_id = ?
-              AND list_name NOT IN ('Today','Next Day','This Week','This Month')
-              AND LOWER(list_name) NOT IN (
-                  SELECT LOWER(name)
-                  FROM secret_lists
-                  WHERE user_id = ?
-              )
-        """, (current_user.id, current_user.id))
-        rows = cur.fetchall()
-        conn.close()
+        with self.get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT DISTINCT list_name
+                FROM tasks
+                WHERE user_id = ?
+                  AND list_name NOT IN ('Today','Next Day','This Week','This Month')
+                  AND LOWER(list_name) NOT IN (
+                      SELECT LOWER(name)
+                      FROM secret_lists
+                      WHERE user_id = ?
+                  )
+            """, (current_user.id, current_user.id))
+            rows = cur.fetchall()
         return [r[0] for r in rows]
 
     def add_calendar_task(self, title, date, category):
         """
         Fügt eine Kalender‑Aufgabe für den aktuellen User hinzu.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO calendar_tasks (title, date, category, user_id)
-            VALUES (?, ?, ?, ?)
-        """, (title, date, category, current_user.id))
-        conn.commit()
-        conn.close()
+        with self.get_db_connection(write=True) as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT INTO calendar_tasks (title, date, category, user_id)
+                VALUES (?, ?, ?, ?)
+            """, (title, date, category, current_user.id))
+            bump_data_version(cur, current_user.id)
+            conn.commit()
+            events.notify()
 
     def archive_list(self, list_name):
         """
-        Archiviere eine Liste nur für den aktuellen User.
+        Verschiebt eine Liste des aktuellen Users nach tasks_archive (inkl. Unteraufgaben,
+        die noch in anderen Listen hängen). Kopieren und Löschen in einer Transaktion.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE tasks
-            SET archived = 1
-            WHERE list_name = ? AND user_id = ?
-        """, (list_name, current_user.id))
-        conn.commit()
-        conn.close()
+        columns = ", ".join(migrations.TASK_ARCHIVE_COLUMNS)
+        params = {"list_name": list_name, "user_id": current_user.id}
+        with self.get_db_connection(write=True) as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+                INSERT INTO tasks_archive ({columns}, archive_list, archived_at)
+                SELECT {columns}, :list_name, strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+                FROM tasks
+                WHERE id IN (
+                    WITH RECURSIVE subtree(id) AS (
+                        SELECT id FROM tasks WHERE list_name = :list_name AND user_id = :user_id
+                        UNION
+                        SELECT t.id
+                        FROM tasks t
+                        JOIN subtree s ON t.parent_id = s.id
+                        WHERE t.user_id = :user_id
+                    )
+                    SELECT id FROM subtree
+                )
+            """, params)
+            cur.execute("""
+                DELETE FROM tasks
+                WHERE id IN (
+                    SELECT id FROM tasks_archive
+                    WHERE user_id = :user_id AND archive_list = :list_name
+                )
+            """, params)
+            bump_data_version(cur, current_user.id)
+            conn.commit()
+            events.notify()
 
     def restore_list(self, list_name):
         """
-        Hebt archived=0 nur für die Tasks des aktuellen Users auf.
+        Holt eine archivierte Liste des aktuellen Users samt Unteraufgaben zurück nach tasks.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE tasks
-            SET archived = 0
-            WHERE list_name = ? AND user_id = ?
-        """, (list_name, current_user.id))
-        conn.commit()
-        conn.close()
+        columns = ", ".join(migrations.TASK_ARCHIVE_COLUMNS)
+        params = {"list_name": list_name, "user_id": current_user.id}
+        with self.get_db_connection(write=True) as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+                INSERT INTO tasks ({columns})
+                SELECT {columns}
+                FROM tasks_archive
+                WHERE user_id = :user_id AND archive_list = :list_name
+            """, params)
+            cur.execute("""
+                DELETE FROM tasks_archive
+                WHERE user_id = :user_id AND archive_list = :list_name
+            """, params)
+            bump_data_version(cur, current_user.id)
+            conn.commit()
+            events.notify()
 
     def get_archived_lists(self):
         """
         Listet alle archivierten Listennamen des aktuellen Users.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT DISTINCT list_name
-            FROM tasks
-            WHERE archived = 1
-              AND user_id = ?
-        """, (current_user.id,))
-        rows = cur.fetchall()
-        conn.close()
-        return [r[0] for r in rows]
+        return [summary["name"] for summary in self.get_archived_list_summaries()]
+
+    def get_archived_list_summaries(self):
+        """
+        Eine Zeile pro archivierter Liste (neueste zuerst): name, color, task_count,
+        completed_count, archived_at – eine Abfrage, ohne die Tasks selbst zu laden.
+        """
+        with self.get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT archive_list AS name,
+                       COALESCE(MAX(CASE WHEN list_name = archive_list THEN color END),
+                                '#ffffff') AS color,
+                       COUNT(*) AS task_count,
+                       SUM(completed = 1) AS completed_count,
+                       MAX(archived_at) AS archived_at
+                FROM tasks_archive
+                WHERE user_id = ?
+                GROUP BY archive_list
+                ORDER BY MAX(archived_at) DESC, archive_list
+            """, (current_user.id,))
+            rows = cur.fetchall()
+        return rows
+
+    def get_archived_tasks(self, list_name):
+        """
+        Inhalt einer archivierten Liste in derselben Struktur wie get_tasks
+        (incomplete als Baum, completed flach).
+        """
+        with self.get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+                SELECT id, title, description, due_date, estimated_time, completed, parent_id, position, list_name
+                FROM tasks_archive
+                WHERE user_id = ? AND archive_list = ?
+                ORDER BY {task_tree.TREE_ORDER_SQL}
+            """, (current_user.id, list_name))
+            rows = cur.fetchall()
+        return {
+            "incomplete": self.build_task_tree([r for r in rows if not r.completed]),
+            "completed": [r for r in rows if r.completed],
+        }
 
     def task_exists_in_calendar(self, title, date, category):
         """
         Prüft nur im Kalender des aktuellen Users.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT 1
-            FROM calendar_tasks
-            WHERE title = ?
-              AND date = ?
-              AND category = ?
-              AND user_id = ?
-        """, (title, date, category, current_user.id))
-        exists = cur.fetchone() is not None
-        conn.close()
+        with self.get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT 1
+                FROM calendar_tasks
+                WHERE title = ?
+                  AND date = ?
+                  AND category = ?
+                  AND user_id = ?
+            """, (title, date, category, current_user.id))
+            exists = cur.fetchone() is not None
         return exists
 
     def get_calendar_tasks(self, year, month):
         """
         Holt Kalender‑Aufgaben nur des aktuellen Users.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT id, title, date, category
-            FROM calendar_tasks
-            WHERE strftime('%Y', date) = ?
-              AND strftime('%m', date) = ?
-              AND user_id = ?
-        """, (str(year), f"{month:02d}", current_user.id))
-        tasks = cur.fetchall()
-        colnames = tuple(c[0] for c in cur.description)
-        conn.close()
+        start, end = calendar_service.month_range(year, month)
+        with self.get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT id, title, date, category
+                FROM calendar_tasks
+                WHERE user_id = ?
+                  AND date >= ? AND date < ?
+                ORDER BY date, id
+            """, (current_user.id, start.isoformat(), end.isoformat()))
+            tasks = cur.fetchall()
+            colnames = tuple(c[0] for c in cur.description)
         return tasks, colnames
 
-    def get_special_list_tasks(self, special_list_name):
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT id, title, description, due_date, estimated_time, completed
-            FROM special_list_tasks
-            WHERE special_list_name = ? AND user_id = ?
-            ORDER BY position
-        """, (special_list_name, current_user.id))
-        rows = cur.fetchall()
-        conn.close()
-
-        # Aufgaben nach Status trennen
-        tasks = {"incomplete": [], "completed": []}
-        for row in rows:
-            if row[5]:  # completed
-                tasks["completed"].append(row)
-            else:
-                tasks["incomplete"].append(row)
-        return tasks
+    def get_special_list_tasks(self, special_list_name, user_id=None):
+        """
+        Offene Tasks einer Spezial-Liste als Baum wie bei get_tasks und die erste
+        Seite der erledigten (completed_next: Cursor für get_special_list_completed).
+        Die Spalten stehen in der Reihenfolge, in der special_lists.html sie
+        positionsweise anzeigt (id, title, Anfang der Beschreibung, due_date, estimated_time).
+        user_id: für load_dashboard, sonst der angemeldete User.
+        """
+        user_id = current_user.id if user_id is None else user_id
+        with self.get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+                SELECT id, title, {DESCRIPTION_PREVIEW_SQL}, due_date, estimated_time, completed, parent_id, position
+                FROM special_list_tasks
+                WHERE special_list_name = ? AND user_id = ? AND completed = 0
+                ORDER BY {task_tree.TREE_ORDER_SQL}
+            """, (special_list_name, user_id))
+            incomplete = self.build_task_tree(cur.fetchall())
+            completed, completed_next = page_result(completed_page(
+                cur, "special_list_tasks", "special_list_name", special_list_name, user_id,
+                f"id, title, {DESCRIPTION_PREVIEW_SQL}, due_date, estimated_time, completed", COMPLETED_PAGE_SIZE
+            ), COMPLETED_PAGE_SIZE)
+
+        return {"incomplete": incomplete, "completed": completed, "completed_next": completed_next}
+
+    def get_special_list_completed(self, special_list_name, limit=COMPLETED_PAGE_SIZE, after=None):
+        """
+        Wie get_completed_tasks, für eine Spezial-Liste.
+        """
+        with self.get_db_connection() as conn:
+            rows = completed_page(conn.cursor(), "special_list_tasks", "special_list_name",
+                                  special_list_name, current_user.id,
+                                  f"id, title, {HAS_DESCRIPTION_SQL}, due_date, estimated_time, completed",
+                                  limit, after)
+        rows, next_cursor = page_result(rows, limit)
+        return {"tasks": rows, "next": next_cursor}
 
     # Aufgaben aus dem Kalender → in Today/Next Day verschieben
     def move_calendar_tasks_to_special_lists(self):
@@ -660,125 +833,84 @@ class ListManager:
         today = date.today().isoformat()
         tomorrow = (date.today() + timedelta(days=1)).isoformat()
 
-        conn = self.get_db_connection()
-        cur = conn.cursor()
+        with self.get_db_connection(write=True) as conn:
+            cur = conn.cursor()
 
-        # Heute
-        cur.execute("""
-            INSERT INTO tasks (title, description, list_name, due_date, completed, user_id)
-            SELECT title, '', 'Today', date, 0, user_id
-            FROM calendar_tasks
-            WHERE date = ?
-              AND user_id = ?
-              AND NOT EXISTS (
-                SELECT 1 FROM tasks
-                WHERE title = calendar_tasks.title
-                  AND due_date = ?
+            # Heute
+            cur.execute("""
+                INSERT INTO tasks (title, description, list_name, due_date, completed, user_id)
+                SELECT title, '', 'Today', date, 0, user_id
+                FROM calendar_tasks
+                WHERE date = ?
                   AND user_id = ?
-              )
-        """, (today, current_user.id, today, current_user.id))
+                  AND NOT EXISTS (
+                    SELECT 1 FROM tasks
+                    WHERE title = calendar_tasks.title
+                      AND due_date = ?
+                      AND user_id = ?
+                  )
+            """, (today, current_user.id, today, current_user.id))
 
-        # Morgen
-        cur.execute("""
-            INSERT INTO tasks (title, description, list_name, due_date, completed, user_id)
-            SELECT title, '', 'Next Day', date, 0, user_id
-            FROM calendar_tasks
-            WHERE date = ?
-              AND user_id = ?
-              AND NOT EXISTS (
-                SELECT 1 FROM tasks
-                WHERE title = calendar_tasks.title
-                  AND due_date = ?
+            # Morgen
+            cur.execute("""
+                INSERT INTO tasks (title, description, list_name, due_date, completed, user_id)
+                SELECT title, '', 'Next Day', date, 0, user_id
+                FROM calendar_tasks
+                WHERE date = ?
                   AND user_id = ?
-              )
-        """, (tomorrow, current_user.id, tomorrow, current_user.id))
+                  AND NOT EXISTS (
+                    SELECT 1 FROM tasks
+                    WHERE title = calendar_tasks.title
+                      AND due_date = ?
+                      AND user_id = ?
+                  )
+            """, (tomorrow, current_user.id, tomorrow, current_user.id))
 
-        conn.commit()
-        conn.close()
+            bump_data_version(cur, current_user.id)
+            conn.commit()
+            events.notify()
 
     def get_calendar_tasks_with_recurring(self, year, month, include_recurring=False):
         """
-        Holt recurring calendar_tasks nur des aktuellen Users.
+        Holt calendar_tasks (und optional die Termine der recurring_tasks) des
+        aktuellen Users als (title, date, category) – siehe calendar_service.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-
-        cur.execute("""
-            SELECT title, date, category
-            FROM calendar_tasks
-            WHERE strftime('%Y', date) = ?
-              AND strftime('%m', date) = ?
-              AND user_id = ?
-        """, (str(year), f"{month:02d}", current_user.id))
-        tasks = cur.fetchall()
-
-        if include_recurring:
-            cur.execute("""
-                SELECT title, frequency, interval_value, start_date
-                FROM recurring_tasks
-                WHERE user_id = ?
-            """, (current_user.id,))
-            recurring = cur.fetchall()
-
-            import datetime
-            end_of_month = (datetime.date(year, month, 1) + datetime.timedelta(days=31)).replace(
-                day=1) - datetime.timedelta(days=1)
-
-            for title, freq, interval, start in recurring:
-                start = start or f"{year}-{month:02d}-01"
-                d0 = datetime.datetime.strptime(start, "%Y-%m-%d").date()
-
-                if freq == "daily":
-                    while d0 <= end_of_month:
-                        tasks.append((title, d0.isoformat(), "recurring-daily"))
-                        d0 += datetime.timedelta(days=interval or 1)
-
-                elif freq == "weekly":
-                    while d0 <= end_of_month:
-                        tasks.append((title, d0.isoformat(), "recurring-weekly"))
-                        d0 += datetime.timedelta(weeks=interval or 1)
-
-                elif freq == "monthly":
-                    while d0 <= end_of_month:
-                        tasks.append((title, d0.isoformat(), "recurring-monthly"))
-                        d0 = (d0.replace(day=1) + datetime.timedelta(days=31)).replace(day=1)
-
-        conn.close()
-        return tasks
+        start, end = calendar_service.month_range(year, month)
+        entries = calendar_service.load_calendar(self, current_user.id, start, end, include_recurring)
+        return [(e["title"], e["date"], e["category"]) for e in entries]
 
     def get_tasks_for_date_range(self, start_date, end_date, completed=None, exclude_lists=None,
                                  exclude_date_range=None):
         """
-        Sucht nur in tasks des aktuellen Users.
+        Sucht nur in tasks des aktuellen Users. Von der Beschreibung kommt nur der Anfang mit.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
+        with self.get_db_connection() as conn:
+            cur = conn.cursor()
 
-        query = """
-            SELECT id, title, description, due_date, completed, list_name
-            FROM tasks
-            WHERE due_date BETWEEN ? AND ?
-              AND user_id = ?
-        """
-        params = [start_date, end_date, current_user.id]
+            query = f"""
+                SELECT id, title, {DESCRIPTION_PREVIEW_SQL}, due_date, completed, list_name
+                FROM tasks
+                WHERE due_date BETWEEN ? AND ?
+                  AND user_id = ?
+            """
+            params = [start_date, end_date, current_user.id]
 
-        if completed is not None:
-            query += " AND completed = ?"
-            params.append(int(completed))
+            if completed is not None:
+                query += " AND completed = ?"
+                params.append(int(completed))
 
-        if exclude_lists:
-            ph = ", ".join("?" * len(exclude_lists))
-            query += f" AND list_name NOT IN ({ph})"
-            params += exclude_lists
+            if exclude_lists:
+                ph = ", ".join("?" * len(exclude_lists))
+                query += f" AND list_name NOT IN ({ph})"
+                params += exclude_lists
 
-        if exclude_date_range:
-            query += " AND NOT (due_date BETWEEN ? AND ?)"
-            params += [exclude_date_range[0], exclude_date_range[1]]
+            if exclude_date_range:
+                query += " AND NOT (due_date BETWEEN ? AND ?)"
+                params += [exclude_date_range[0], exclude_date_range[1]]
 
-        query += " ORDER BY due_date ASC"
-        cur.execute(query, params)
-        rows = cur.fetchall()
-        conn.close()
+            query += " ORDER BY due_date ASC"
+            cur.execute(query, params)
+            rows = cur.fetchall()
         return rows
 
     def get_next_day_tasks(self):
@@ -792,105 +924,278 @@ class ListManager:
         """
         Holt alle Aufgaben der 'This Week'-Liste für den aktuellen User.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT id, title, description, due_date, completed
-            FROM tasks
-            WHERE list_name = 'This Week'
-              AND user_id = ?
-        """, (current_user.id,))
-        rows = cur.fetchall()
-        conn.close()
+        with self.get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+                SELECT id, title, {DESCRIPTION_PREVIEW_SQL}, due_date, completed
+                FROM tasks
+                WHERE list_name = 'This Week'
+                  AND user_id = ?
+            """, (current_user.id,))
+            rows = cur.fetchall()
         return rows
 
     def get_month_tasks(self):
         """
         Holt alle Aufgaben der 'This Month'-Liste für den aktuellen User.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT id, title, description, due_date, completed
-            FROM tasks
-            WHERE list_name = 'This Month'
-              AND user_id = ?
-        """, (current_user.id,))
-        rows = cur.fetchall()
-        conn.close()
+        with self.get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+                SELECT id, title, {DESCRIPTION_PREVIEW_SQL}, due_date, completed
+                FROM tasks
+                WHERE list_name = 'This Month'
+                  AND user_id = ?
+            """, (current_user.id,))
+            rows = cur.fetchall()
         return rows
 
-    def toggle_task_completion(self, task_id, completed):
+    def _subtree_params(self, task_ids, **extra):
+        return {"task_ids": _id_list(task_ids), "user_id": current_user.id,
+                "max_depth": MAX_TREE_DEPTH, **extra}
+
+    def get_subtree(self, task_id):
         """
-        Markiert eine Aufgabe als (un)vollständig – nur für den aktuellen User.
+        Liefert einen Task mit allen Unteraufgaben (flach, mit depth) – nur für den aktuellen User.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
+        with self.get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(SUBTREE_CTE + """
+                SELECT t.id, t.title, t.description, t.due_date, t.completed,
+                       t.parent_id, t.position, t.list_name, s.depth
+                FROM subtree s
+                JOIN tasks t ON t.id = s.id
+                ORDER BY s.depth, t.position
+            """, self._subtree_params([task_id]))
+            rows = cur.fetchall()
+        return rows
+
+    # ---------------------------------------------------------------
+    # Set-basierte Änderungen. Die _-Varianten schreiben ohne Commit in
+    # einen übergebenen Cursor (für apply_batch), die öffentlichen Methoden
+    # sind je eine Transaktion. Einzel-Methoden rufen die Bulk-Methoden auf.
+    # ---------------------------------------------------------------
+
+    def _set_completed(self, cur, task_ids, completed):
+        if completed:
+            cur.execute("""
+                UPDATE tasks
+                SET completed = 1, """ + COMPLETED_AT_SQL.format(flag="1") + """
+                WHERE id IN (""" + SUBTREE_CTE + """ SELECT id FROM subtree)
+            """, self._subtree_params(task_ids))
+        else:
+            cur.execute("""
+                UPDATE tasks
+                SET completed = 0, completed_at = NULL
+                WHERE id IN (SELECT value FROM json_each(?)) AND user_id = ?
+            """, (_id_list(task_ids), current_user.id))
+        return cur.rowcount
+
+    def _delete_tasks(self, cur, task_ids):
+        cur.execute("""
+            DELETE FROM tasks
+            WHERE id IN (""" + SUBTREE_CTE + """ SELECT id FROM subtree)
+        """, self._subtree_params(task_ids))
+        return cur.rowcount
+
+    def _move_tasks(self, cur, task_ids, new_list):
+        params = self._subtree_params(task_ids, new_list=new_list, gap=ordering.POSITION_GAP)
+        # Tasks, deren Parent nicht mitwandert, werden in der neuen Liste zu Wurzeln –
+        # hinter den vorhandenen, jede mit eigener Position in ihrer bisherigen Reihenfolge
         cur.execute("""
             UPDATE tasks
-            SET completed = ?
+            SET position = moved.position
+            FROM (
+                SELECT id,
+                       (SELECT COALESCE(MAX(position), 0)
+                        FROM tasks
+                        WHERE user_id = :user_id AND list_name = :new_list AND parent_id IS NULL)
+                       + :gap * ROW_NUMBER() OVER (ORDER BY position, id) AS position
+                FROM tasks
+                WHERE id IN (""" + SUBTREE_CTE + """ SELECT id FROM subtree)
+                  AND list_name IS NOT :new_list
+                  AND (parent_id IS NULL
+                       OR parent_id NOT IN (""" + SUBTREE_CTE + """ SELECT id FROM subtree))
+            ) AS moved
+            WHERE tasks.id = moved.id
+        """, params)
+        cur.execute("""
+            UPDATE tasks
+            SET list_name = :new_list,
+                parent_id = CASE
+                    WHEN list_name IS NOT :new_list
+                     AND parent_id NOT IN (""" + SUBTREE_CTE + """ SELECT id FROM subtree)
+                    THEN NULL
+                    ELSE parent_id
+                END
+            WHERE id IN (""" + SUBTREE_CTE + """ SELECT id FROM subtree)
+        """, params)
+        return cur.rowcount
+
+    def _rename_tasks(self, cur, titles):
+        cur.executemany("""
+            UPDATE tasks
+            SET title = ?
             WHERE id = ? AND user_id = ?
-        """, (int(completed), task_id, current_user.id))
-        conn.commit()
-        conn.close()
+        """, [(title, task_id, current_user.id) for task_id, title in titles])
+        return cur.rowcount
+
+    def _set_due_date(self, cur, task_ids, due_date):
+        cur.execute("""
+            UPDATE tasks
+            SET due_date = ?
+            WHERE id IN (SELECT value FROM json_each(?)) AND user_id = ?
+        """, (due_date, _id_list(task_ids), current_user.id))
+        return cur.rowcount
+
+    def _write(self, fn, *args):
+        with self.get_db_connection(write=True) as conn:
+            cur = conn.cursor()
+            affected = fn(cur, *args)
+            bump_data_version(cur, current_user.id)
+            conn.commit()
+            events.notify()
+        return affected
+
+    def set_completed_many(self, task_ids, completed):
+        """
+        Markiert mehrere Aufgaben als (un)vollständig. Erledigen erledigt auch
+        alle Unteraufgaben; Zurücksetzen betrifft nur die Aufgaben selbst.
+        """
+        return self._write(self._set_completed, task_ids, completed)
+
+    def delete_tasks(self, task_ids):
+        """
+        Löscht mehrere Aufgaben samt Unteraufgaben.
+        """
+        return self._write(self._delete_tasks, task_ids)
+
+    def move_tasks(self, task_ids, new_list):
+        """
+        Verschiebt mehrere Aufgaben samt Unteraufgaben in eine Liste. Wechselt
+        die Liste, werden sie dort zu Wurzeln und hinten angehängt.
+        """
+        return self._write(self._move_tasks, task_ids, new_list)
+
+    def rename_tasks(self, titles):
+        """
+        titles: Liste von (task_id, neuer Titel)
+        """
+        return self._write(self._rename_tasks, titles)
+
+    def set_due_date_many(self, task_ids, due_date):
+        return self._write(self._set_due_date, task_ids, due_date)
+
+    def toggle_task_completion(self, task_id, completed):
+        """
+        Markiert eine Aufgabe als (un)vollständig – nur für den aktuellen User.
+        Erledigen erledigt auch alle Unteraufgaben; Zurücksetzen betrifft nur die Aufgabe selbst.
+        """
+        self.set_completed_many([task_id], completed)
 
     def delete_task(self, task_id):
         """
-        Löscht eine Aufgabe – nur wenn sie zum aktuellen User gehört.
+        Löscht eine Aufgabe samt Unteraufgaben – nur wenn sie zum aktuellen User gehört.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            DELETE FROM tasks
-            WHERE id = ? AND user_id = ?
-        """, (task_id, current_user.id))
-        conn.commit()
-        conn.close()
+        self.delete_tasks([task_id])
 
     def move_task(self, task_id, new_list):
         """
-        Verschiebt eine Aufgabe in eine andere Liste – nur für den aktuellen User.
+        Verschiebt eine Aufgabe samt Unteraufgaben in eine andere Liste – nur für den aktuellen User.
+        Wechselt die Liste, wird die Aufgabe dort zur Wurzel und hinten angehängt.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE tasks
-            SET list_name = ?
-            WHERE id = ? AND user_id = ?
-        """, (new_list, task_id, current_user.id))
-        conn.commit()
-        conn.close()
+        self.move_tasks([task_id], new_list)
 
     def rename_task(self, task_id, new_name):
         """
         Ändert den Titel einer Aufgabe – nur für den aktuellen User.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE tasks
-            SET title = ?
-            WHERE id = ? AND user_id = ?
-        """, (new_name, task_id, current_user.id))
-        conn.commit()
-        conn.close()
+        self.rename_tasks([(task_id, new_name)])
 
     def update_task_date(self, task_id, new_date):
         """
         Ändert das Datum einer Kalender-Aufgabe – nur für den aktuellen User.
         """
-        conn = self.get_db_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE calendar_tasks
-            SET date = ?
-            WHERE id = ? AND user_id = ?
-        """, (new_date, task_id, current_user.id))
-        conn.commit()
-        conn.close()
+        with self.get_db_connection(write=True) as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                UPDATE calendar_tasks
+                SET date = ?
+                WHERE id = ? AND user_id = ?
+            """, (new_date, task_id, current_user.id))
+            bump_data_version(cur, current_user.id)
+            conn.commit()
+            events.notify()
+
+    def apply_batch(self, operations):
+        """
+        Führt eine geordnete Liste von Operationen in einer Transaktion aus:
+
+          {"op": "create", "list_name", "title", "description"?, "due_date"?,
+                           "estimated_time"?, "parent_id"? | "parent_ref"?}
+          {"op": "toggle", "ids", "completed"}
+          {"op": "rename", "id", "title"}
+          {"op": "move", "ids", "list_name"}
+          {"op": "delete", "ids"}
+          {"op": "reorder", "order", "parent_id"?, "list_name"?}
+          {"op": "set_date", "ids", "due_date"}
+
+        Statt "ids" geht auch ein einzelnes "id". parent_ref verweist auf den
+        Index einer früheren create-Operation im selben Batch.
+
+        Liefert (ok, results) mit einem Ergebnis pro Operation. Schlägt eine
+        Operation fehl, wird der ganze Batch zurückgerollt.
+        """
+        results = []
+        with self.get_db_connection(write=True) as conn:
+            cur = conn.cursor()
+            try:
+                for op in operations:
+                    results.append(self._apply_operation(cur, op, results))
+            except (KeyError, IndexError, TypeError, ValueError, sqlite3.Error) as e:
+                conn.rollback()
+                results.append({"ok": False, "error": f"{type(e).__name__}: {e}"})
+                return False, results
+
+            bump_data_version(cur, current_user.id)
+            conn.commit()
+            events.notify()
+        return True, results
+
+    def _apply_operation(self, cur, op, results):
+        kind = op["op"]
+
+        def ids():
+            return op["ids"] if "ids" in op else [op["id"]]
+
+        if kind == "create":
+            parent_id = op.get("parent_id")
+            if "parent_ref" in op:
+                parent_id = results[int(op["parent_ref"])]["id"]
+            task_id = self._insert_task(
+                cur, op["list_name"], op["title"], op.get("description", ""),
+                op.get("due_date"), op.get("estimated_time", 0), parent_id, current_user.id
+            )
+            return {"ok": True, "id": task_id}
+        if kind == "toggle":
+            return {"ok": True, "affected": self._set_completed(cur, ids(), bool(op["completed"]))}
+        if kind == "rename":
+            return {"ok": True, "affected": self._rename_tasks(cur, [(op["id"], op["title"])])}
+        if kind == "move":
+            return {"ok": True, "affected": self._move_tasks(cur, ids(), op["list_name"])}
+        if kind == "delete":
+            return {"ok": True, "affected": self._delete_tasks(cur, ids())}
+        if kind == "reorder":
+            parent_id = op.get("parent_id")
+            tasks = [{"id": int(task_id), "parent_id": int(parent_id) if parent_id else None, "position": idx}
+                     for idx, task_id in enumerate(op["order"])]
+            return {"ok": True, "affected": self._reorder(cur, tasks, op.get("list_name"))}
+        if kind == "set_date":
+            return {"ok": True, "affected": self._set_due_date(cur, ids(), op["due_date"])}
+        raise ValueError(f"unknown op {kind!r}")
 
     def close(self):
-        self.conn.close()
+        db.get_pool(self.db_name).close_all()
 
 
 # CLI Interface for interacting with the ListManager
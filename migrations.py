@@ -0,0 +1,728 @@
+# migrations.py
+"""
+Versionierte Schema-Migrationen.
+
+Die aktuelle Schema-Version steht in PRAGMA user_version der Datenbank.
+migrate() führt beim Start alle Schritte mit höherer Nummer der Reihe nach aus,
+jeden in seiner eigenen Transaktion. Neue Schemaänderungen werden nur noch
+als neuer Eintrag am Ende von MIGRATIONS hinzugefügt – nie bestehende ändern.
+"""
+import logging
+import sqlite3
+import threading
+
+import db
+
+_migrated = set()
+_lock = threading.Lock()
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_missing_columns(conn, table, columns):
+    """
+    Ergänzt Spalten, die in älteren Datenbanken noch fehlen.
+    columns: Liste von (name, definition)
+    """
+    existing = _columns(conn, table)
+    for name, definition in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+def _0001_baseline(conn):
+    """
+    Bisheriges Schema, wie es _create_tables, init_db und Handarbeit hinterlassen haben.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            list_name TEXT,
+            title TEXT,
+            description TEXT,
+            due_date TEXT,
+            completed INTEGER
+        )
+    """)
+    _add_missing_columns(conn, "tasks", [
+        ("color", "TEXT DEFAULT '#ffffff'"),
+        ("position", "INTEGER DEFAULT 0"),
+        ("estimated_time", "INTEGER DEFAULT 30"),
+        ("archived", "INTEGER DEFAULT 0"),
+        ("user_id", "INTEGER"),
+        ("parent_id", "INTEGER"),
+    ])
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS special_list_tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            special_list_name TEXT,
+            title TEXT NOT NULL,
+            description TEXT,
+            due_date TEXT,
+            completed INTEGER DEFAULT 0,
+            color TEXT DEFAULT '#ffffff',
+            position INTEGER DEFAULT 0,
+            estimated_time INTEGER DEFAULT 30,
+            parent_id INTEGER,
+            user_id INTEGER
+        )
+    """)
+    _add_missing_columns(conn, "special_list_tasks", [("list_name", "TEXT")])
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS recurring_tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            frequency TEXT NOT NULL,
+            start_date DATE NOT NULL
+        )
+    """)
+    _add_missing_columns(conn, "recurring_tasks", [
+        ("interval_value", "INTEGER"),
+        ("new_start_date", "DATE"),
+        ("user_id", "INTEGER DEFAULT 1"),
+    ])
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS calendar_tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            date DATE NOT NULL,
+            category TEXT NOT NULL
+        )
+    """)
+    _add_missing_columns(conn, "calendar_tasks", [("user_id", "INTEGER DEFAULT 1")])
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS last_execution (
+            task TEXT PRIMARY KEY,
+            last_run DATE
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS secret_lists (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE,
+            color TEXT,
+            password TEXT
+        )
+    """)
+    _add_missing_columns(conn, "secret_lists", [("user_id", "INTEGER")])
+
+    # Timeline
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS timeline_goals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            description TEXT,
+            due_date TEXT
+        )
+    """)
+    _add_missing_columns(conn, "timeline_goals", [
+        ("start_date", "TEXT"),
+        ("color", "TEXT"),
+    ])
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS milestones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            goal_id INTEGER,
+            title TEXT,
+            due_date TEXT,
+            completed INTEGER DEFAULT 0,
+            FOREIGN KEY (goal_id) REFERENCES timeline_goals(id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS milestone_tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            milestone_id INTEGER,
+            title TEXT,
+            completed INTEGER DEFAULT 0,
+            FOREIGN KEY (milestone_id) REFERENCES milestones(id)
+        )
+    """)
+
+    # Habits
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_habits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            habit_date TEXT UNIQUE,
+            alcohol INTEGER DEFAULT 0,
+            smoke INTEGER DEFAULT 0,
+            sport INTEGER DEFAULT 0
+        )
+    """)
+
+    # Datenversionen für den Cache (siehe cache.py)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+
+def _0002_hot_path_indexes(conn):
+    """
+    Indizes für die tatsächlichen Zugriffspfade – vorher lief jede Abfrage pro User als Full Scan.
+    """
+    # get_tasks / Dashboard-Listen: WHERE user_id = ? AND list_name = ? AND completed = ? ORDER BY position
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tasks_user_list
+        ON tasks (user_id, list_name, completed, position)
+    """)
+    # get_tasks_for_date_range / Dashboard: WHERE user_id = ? AND due_date BETWEEN ? AND ?
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tasks_user_due
+        ON tasks (user_id, due_date)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_special_list_tasks_user_list
+        ON special_list_tasks (user_id, special_list_name, position)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_calendar_tasks_user_date
+        ON calendar_tasks (user_id, date)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_milestones_goal_due
+        ON milestones (goal_id, due_date)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_milestone_tasks_milestone
+        ON milestone_tasks (milestone_id)
+    """)
+
+
+def _0003_recurrence_end_and_skips(conn):
+    """
+    Enddatum und einzelne ausgelassene Termine für wiederkehrende Aufgaben (siehe recurrence.py).
+    """
+    _add_missing_columns(conn, "recurring_tasks", [("end_date", "DATE")])
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS recurring_task_skips (
+            recurring_task_id INTEGER NOT NULL REFERENCES recurring_tasks(id) ON DELETE CASCADE,
+            skip_date DATE NOT NULL,
+            PRIMARY KEY (recurring_task_id, skip_date)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_recurring_tasks_user
+        ON recurring_tasks (user_id, frequency)
+    """)
+
+
+def _0004_task_parent_index(conn):
+    """
+    Kinder eines Tasks per Index finden – Grundlage der rekursiven Teilbaum-Abfragen.
+    """
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tasks_parent
+        ON tasks (parent_id)
+    """)
+
+
+# Tabellen im Änderungsprotokoll und der Ausdruck, der den Besitzer einer Zeile liefert.
+# Milestones hängen an den Timeline-Zielen und haben wie diese keinen user_id (SHARED_SCOPE).
+CHANGE_TRACKED_TABLES = {
+    "tasks": "{row}.user_id",
+    "special_list_tasks": "{row}.user_id",
+    "calendar_tasks": "{row}.user_id",
+    "milestones": "0",
+    "milestone_tasks": "0",
+}
+
+_NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+
+
+def log_rows_sql(table, conflict=""):
+    """
+    Protokolliert Zeilen von table mengenbasiert (ohne Trigger), z.B. beim
+    Anlegen des Protokolls oder nach einem Massenimport. WHERE kann angehängt werden.
+    """
+    owner = CHANGE_TRACKED_TABLES[table]
+    return f"""
+        INSERT {conflict} INTO change_log (user_id, table_name, row_id, changed_at)
+        SELECT {owner.format(row=table)}, '{table}', id, updated_at FROM {table}
+    """
+
+
+def _log_insert_trigger(table, when=""):
+    owner = CHANGE_TRACKED_TABLES[table]
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_log_insert
+        AFTER INSERT ON {table}
+        {when}
+        BEGIN
+            UPDATE {table} SET updated_at = {_NOW} WHERE id = NEW.id;
+            DELETE FROM change_log WHERE table_name = '{table}' AND row_id = NEW.id;
+            INSERT INTO change_log (user_id, table_name, row_id, changed_at)
+            VALUES ({owner.format(row="NEW")}, '{table}', NEW.id, {_NOW});
+        END
+    """
+
+
+def _0005_change_log(conn):
+    """
+    updated_at und Änderungsprotokoll für die Delta-Synchronisation (siehe changes.py).
+
+    change_log hält pro Zeile nur den letzten Eintrag: jede Änderung löscht den
+    alten und legt einen neuen mit höherem seq an. Gelöschte Zeilen bleiben als
+    Tombstone (deleted = 1) stehen, damit Clients auch Löschungen mitbekommen.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0,
+            changed_at TEXT NOT NULL,
+            UNIQUE (table_name, row_id)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_change_log_user_seq
+        ON change_log (user_id, seq)
+    """)
+
+    for table, owner in CHANGE_TRACKED_TABLES.items():
+        _add_missing_columns(conn, table, [("updated_at", "TEXT")])
+
+        # Bestehende Zeilen einmal protokollieren – ein Client mit since=0 bekommt so alles
+        conn.execute(f"UPDATE {table} SET updated_at = {_NOW} WHERE updated_at IS NULL")
+        conn.execute(log_rows_sql(table, "OR IGNORE"))
+
+        log_new = f"""
+            DELETE FROM change_log WHERE table_name = '{table}' AND row_id = NEW.id;
+            INSERT INTO change_log (user_id, table_name, row_id, changed_at)
+            VALUES ({owner.format(row="NEW")}, '{table}', NEW.id, {_NOW});
+        """
+        conn.execute(_log_insert_trigger(table))
+        # Die WHEN-Bedingung verhindert, dass das Setzen von updated_at (auch aus dem
+        # Insert-Trigger) ein zweites Mal protokolliert wird
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_log_update
+            AFTER UPDATE ON {table}
+            WHEN NEW.updated_at IS OLD.updated_at
+            BEGIN
+                UPDATE {table} SET updated_at = {_NOW} WHERE id = NEW.id;
+                {log_new}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_log_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                DELETE FROM change_log WHERE table_name = '{table}' AND row_id = OLD.id;
+                INSERT INTO change_log (user_id, table_name, row_id, deleted, changed_at)
+                VALUES ({owner.format(row="OLD")}, '{table}', OLD.id, 1, {_NOW});
+            END
+        """)
+
+
+# Quellen der Volltextsuche: Tabelle -> (Code, Spalte mit Beschreibungstext, Spalte
+# mit dem Besitzer; None = keine bzw. SHARED_SCOPE). Die rowid im Index ist
+# id * SEARCH_KINDS + Code, damit Trigger den Eintrag ohne Nachschlagen finden.
+# Codes nie umnummerieren!
+SEARCH_KINDS = 8
+SEARCH_SOURCES = {
+    "tasks": (1, "description", "user_id"),
+    "special_list_tasks": (2, "description", "user_id"),
+    "calendar_tasks": (3, "category", "user_id"),
+    "milestones": (4, None, None),
+    "milestone_tasks": (5, None, None),
+}
+
+
+def search_row_sql(table, row, conflict=""):
+    """
+    INSERT in den Suchindex für eine Zeile von table (row: NEW oder Tabellenname).
+    Der Besitzer steht in der nicht indizierten Spalte scope (SHARED_SCOPE = 0).
+    """
+    code, description, owner = SEARCH_SOURCES[table]
+    return f"""
+        INSERT {conflict} INTO search_index (rowid, title, description, scope)
+        SELECT {row}.id * {SEARCH_KINDS} + {code}, {row}.title,
+               {f"{row}.{description}" if description else "NULL"},
+               {f"{row}.{owner}" if owner else "0"}
+    """
+
+
+def _search_insert_trigger(table, when=""):
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_search_insert
+        AFTER INSERT ON {table}
+        {when}
+        BEGIN
+            {search_row_sql(table, "NEW")};
+        END
+    """
+
+
+def _0006_search_index(conn):
+    """
+    FTS5-Volltextindex über Titel und Beschreibungen (siehe search.py). Trigger
+    halten ihn aktuell; befüllt wird er hier und per "flask rebuild-search".
+    """
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            title, description, scope UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    for table, (code, description, owner) in SEARCH_SOURCES.items():
+        key = f"{SEARCH_KINDS} + {code}"
+        # Nur Änderungen an indizierten Spalten – Umsortieren oder Abhaken fasst den Index nicht an
+        indexed = ", ".join(c for c in ("title", description, owner) if c)
+        conn.execute(_search_insert_trigger(table))
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_search_update
+            AFTER UPDATE OF {indexed} ON {table}
+            BEGIN
+                DELETE FROM search_index WHERE rowid = OLD.id * {key};
+                {search_row_sql(table, "NEW")};
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_search_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                DELETE FROM search_index WHERE rowid = OLD.id * {key};
+            END
+        """)
+        # Bestand übernehmen. "flask rebuild-search" baut den Index später in
+        # kleinen Transaktionen neu auf, ohne die Datenbank lange zu sperren
+        conn.execute(search_row_sql(table, table, "OR REPLACE") + f" FROM {table}")
+
+
+# Solange hier eine Zeile steht, schreiben die Insert-Trigger weder Änderungsprotokoll
+# noch Suchindex. Massenimporte setzen sie innerhalb ihrer Schreibtransaktion und
+# holen beides danach mengenbasiert nach – andere Verbindungen sehen sie nie.
+BULK_LOAD_GUARD = "WHEN NOT EXISTS (SELECT 1 FROM bulk_load)"
+
+
+def _0007_bulk_load_switch(conn):
+    """
+    Schalter für Massenimporte (siehe transfer.py): pro Zeile kosten die Insert-
+    Trigger ein Mehrfaches des eigentlichen INSERT, mengenbasiert fast nichts.
+    """
+    conn.execute("CREATE TABLE IF NOT EXISTS bulk_load (active INTEGER)")
+    for table in CHANGE_TRACKED_TABLES:
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_log_insert")
+        conn.execute(_log_insert_trigger(table, BULK_LOAD_GUARD))
+    for table in SEARCH_SOURCES:
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_search_insert")
+        conn.execute(_search_insert_trigger(table, BULK_LOAD_GUARD))
+
+
+# Spalten, die beim Archivieren zwischen tasks und tasks_archive wandern. Die IDs
+# bleiben erhalten – tasks ist AUTOINCREMENT, archivierte IDs werden nie neu vergeben.
+TASK_ARCHIVE_COLUMNS = ("id", "list_name", "title", "description", "due_date", "completed",
+                        "color", "position", "estimated_time", "user_id", "parent_id",
+                        "completed_at")
+
+
+def _0008_task_archive(conn):
+    """
+    Archivierte Listen in eine eigene Tabelle auslagern. Vorher blieben sie mit
+    archived = 1 in tasks und liefen durch jeden Index und jede Abfrage mit.
+
+    archive_list ist die Liste, deren Archivierung die Zeile verschoben hat –
+    Unteraufgaben aus anderen Listen gehören zu deren Archiv und kommen mit ihr zurück.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tasks_archive (
+            id INTEGER PRIMARY KEY,
+            list_name TEXT,
+            title TEXT,
+            description TEXT,
+            due_date TEXT,
+            completed INTEGER,
+            color TEXT,
+            position INTEGER,
+            estimated_time INTEGER,
+            user_id INTEGER,
+            parent_id INTEGER,
+            archive_list TEXT NOT NULL,
+            archived_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tasks_archive_user_list
+        ON tasks_archive (user_id, archive_list)
+    """)
+
+    # Bisher archivierte Tasks umziehen; die Delete-Trigger auf tasks melden sie
+    # den Clients als gelöscht und nehmen sie aus dem Suchindex
+    # Stand von Migration 8 – TASK_ARCHIVE_COLUMNS wächst mit späteren Migrationen
+    columns = "id, list_name, title, description, due_date, completed, color, position, estimated_time, user_id, parent_id"
+    conn.execute(f"""
+        INSERT INTO tasks_archive ({columns}, archive_list, archived_at)
+        SELECT {columns}, COALESCE(list_name, ''), {_NOW} FROM tasks WHERE archived = 1
+    """)
+    conn.execute("DELETE FROM tasks WHERE archived = 1")
+
+
+def _0009_completed_at(conn):
+    """
+    Zeitpunkt des Abhakens, damit erledigte Tasks als Verlauf (neueste zuerst)
+    seitenweise geladen werden können statt alle auf einmal.
+    """
+    for table in ("tasks", "special_list_tasks", "tasks_archive"):
+        _add_missing_columns(conn, table, [("completed_at", "TEXT")])
+    # Wann Altbestand erledigt wurde, weiß niemand – die letzte Änderung kommt am nächsten
+    for table in ("tasks", "special_list_tasks"):
+        conn.execute(f"""
+            UPDATE {table} SET completed_at = COALESCE(updated_at, {_NOW})
+            WHERE completed = 1 AND completed_at IS NULL
+        """)
+    conn.execute("""
+        UPDATE tasks_archive SET completed_at = archived_at
+        WHERE completed = 1 AND completed_at IS NULL
+    """)
+
+    # Teilindizes nur über erledigte Tasks, in Verlaufsreihenfolge: eine Seite ist ein
+    # Bereichs-Scan über limit Einträge, egal wie lang der Verlauf ist
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tasks_user_list_done
+        ON tasks (user_id, list_name, completed_at DESC, id DESC)
+        WHERE completed = 1
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_special_list_tasks_user_list_done
+        ON special_list_tasks (user_id, special_list_name, completed_at DESC, id DESC)
+        WHERE completed = 1
+    """)
+
+
+def _0010_open_task_tree_indexes(conn):
+    """
+    Offene Tasks einer Liste in Baumreihenfolge (task_tree.TREE_ORDER_SQL) direkt
+    aus dem Index – der Baum wird danach ohne Sortieren zusammengesetzt.
+    """
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tasks_user_list_tree
+        ON tasks (user_id, list_name, parent_id, position)
+        WHERE completed = 0
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_special_list_tasks_user_list_tree
+        ON special_list_tasks (user_id, special_list_name, parent_id, position)
+        WHERE completed = 0
+    """)
+
+
+# Zähler für den Fortschritt: milestones.total_count/done_count zählen die
+# Milestone-Tasks, timeline_goals summiert die seiner Meilensteine. Beide
+# Anweisungen schreiben nur abweichende Zeilen – sonst meldete der Update-Trigger
+# des Änderungsprotokolls jeden Meilenstein als geändert.
+RECOUNT_PROGRESS_SQL = (
+    """
+        UPDATE milestones
+        SET total_count = c.total_count, done_count = c.done_count
+        FROM (
+            SELECT m.id, COUNT(t.id) AS total_count, COALESCE(SUM(t.completed IS 1), 0) AS done_count
+            FROM milestones m
+            LEFT JOIN milestone_tasks t ON t.milestone_id = m.id
+            GROUP BY m.id
+        ) c
+        WHERE c.id = milestones.id
+          AND (milestones.total_count IS NOT c.total_count OR milestones.done_count IS NOT c.done_count)
+    """,
+    """
+        UPDATE timeline_goals
+        SET total_count = c.total_count, done_count = c.done_count
+        FROM (
+            SELECT g.id, COALESCE(SUM(m.total_count), 0) AS total_count,
+                   COALESCE(SUM(m.done_count), 0) AS done_count
+            FROM timeline_goals g
+            LEFT JOIN milestones m ON m.goal_id = g.id
+            GROUP BY g.id
+        ) c
+        WHERE c.id = timeline_goals.id
+          AND (timeline_goals.total_count IS NOT c.total_count OR timeline_goals.done_count IS NOT c.done_count)
+    """,
+)
+
+
+def _0011_progress_counters(conn):
+    """
+    Fortschritt von Meilensteinen und Zielen als gepflegte Zähler statt bei jedem
+    Render aus milestone_tasks gezählt. Trigger halten sie aktuell: Milestone-Tasks
+    zählen in ihren Meilenstein, dessen Änderungen wandern als Differenz ins Ziel.
+    Reparatur: "flask repair-progress".
+    """
+    for table in ("milestones", "timeline_goals"):
+        _add_missing_columns(conn, table, [
+            ("total_count", "INTEGER NOT NULL DEFAULT 0"),
+            ("done_count", "INTEGER NOT NULL DEFAULT 0"),
+        ])
+    for statement in RECOUNT_PROGRESS_SQL:
+        conn.execute(statement)
+
+    # Massenimporte zählen nach dem Einfügen mengenbasiert nach (siehe transfer.py)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_milestone_tasks_count_insert
+        AFTER INSERT ON milestone_tasks
+        {BULK_LOAD_GUARD}
+        BEGIN
+            UPDATE milestones
+            SET total_count = total_count + 1, done_count = done_count + (NEW.completed IS 1)
+            WHERE id = NEW.milestone_id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_milestone_tasks_count_delete
+        AFTER DELETE ON milestone_tasks
+        BEGIN
+            UPDATE milestones
+            SET total_count = total_count - 1, done_count = done_count - (OLD.completed IS 1)
+            WHERE id = OLD.milestone_id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_milestone_tasks_count_update
+        AFTER UPDATE OF completed, milestone_id ON milestone_tasks
+        WHEN (OLD.completed IS 1) IS NOT (NEW.completed IS 1) OR OLD.milestone_id IS NOT NEW.milestone_id
+        BEGIN
+            UPDATE milestones
+            SET total_count = total_count - 1, done_count = done_count - (OLD.completed IS 1)
+            WHERE id = OLD.milestone_id;
+            UPDATE milestones
+            SET total_count = total_count + 1, done_count = done_count + (NEW.completed IS 1)
+            WHERE id = NEW.milestone_id;
+        END
+    """)
+
+    # Ein neuer Meilenstein hat noch keine Tasks – für Ziele reichen Update und Delete
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_milestones_count_update
+        AFTER UPDATE OF total_count, done_count, goal_id ON milestones
+        WHEN OLD.total_count IS NOT NEW.total_count OR OLD.done_count IS NOT NEW.done_count
+          OR OLD.goal_id IS NOT NEW.goal_id
+        BEGIN
+            UPDATE timeline_goals
+            SET total_count = total_count - OLD.total_count, done_count = done_count - OLD.done_count
+            WHERE id = OLD.goal_id;
+            UPDATE timeline_goals
+            SET total_count = total_count + NEW.total_count, done_count = done_count + NEW.done_count
+            WHERE id = NEW.goal_id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_milestones_count_delete
+        AFTER DELETE ON milestones
+        BEGIN
+            UPDATE timeline_goals
+            SET total_count = total_count - OLD.total_count, done_count = done_count - OLD.done_count
+            WHERE id = OLD.goal_id;
+        END
+    """)
+
+
+def _0012_goal_interval_index(conn):
+    """
+    Ziele, die ein Zeitfenster schneiden (due_date >= Fensteranfang, Start vor dem
+    Fensterende): Bereichs-Scan über due_date, start_date wird im Index geprüft.
+    """
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_timeline_goals_due_start
+        ON timeline_goals (due_date, start_date)
+    """)
+
+
+def _0013_habit_bitsets(conn):
+    """
+    Eigene Gewohnheiten pro User und ihre erledigten Tage als ein Bitset pro
+    Gewohnheit und Jahr (46 Bytes statt bis zu 366 Zeilen, Aufbau siehe
+    habit_analytics.py). daily_habits bleibt für den gemeinsamen Tracker;
+    übernehmen lässt er sich mit "flask import-legacy-habits".
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS habit_definitions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            color TEXT,
+            start_date TEXT NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (user_id, name)
+        )
+    """)
+    # Ein Jahr einer Gewohnheit liegt mit dem Schlüssel zusammen in einer Seite
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS habit_years (
+            habit_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            bits BLOB NOT NULL,
+            PRIMARY KEY (habit_id, year)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_habit_definitions_delete
+        AFTER DELETE ON habit_definitions
+        BEGIN
+            DELETE FROM habit_years WHERE habit_id = OLD.id;
+        END
+    """)
+
+
+# (Version, Name, Funktion) – nur hinten anfügen!
+MIGRATIONS = [
+    (1, "baseline schema", _0001_baseline),
+    (2, "hot-path indexes", _0002_hot_path_indexes),
+    (3, "recurrence end dates and skips", _0003_recurrence_end_and_skips),
+    (4, "task parent index", _0004_task_parent_index),
+    (5, "change log for delta sync", _0005_change_log),
+    (6, "full-text search index", _0006_search_index),
+    (7, "bulk load switch for imports", _0007_bulk_load_switch),
+    (8, "archive table for archived lists", _0008_task_archive),
+    (9, "completion time for completed history", _0009_completed_at),
+    (10, "open task tree indexes", _0010_open_task_tree_indexes),
+    (11, "progress counters for milestones and goals", _0011_progress_counters),
+    (12, "goal interval index for timeline windows", _0012_goal_interval_index),
+    (13, "per-user habits stored as yearly bitsets", _0013_habit_bitsets),
+]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db_name=db.DATABASE):
+    """
+    Bringt die Datenbank auf den neuesten Stand. Mehrfache Aufrufe sind billig,
+    parallel startende Worker warten per BEGIN IMMEDIATE aufeinander.
+    """
+    with _lock:
+        if db_name in _migrated:
+            return
+        conn = sqlite3.connect(db_name, isolation_level=None)
+        try:
+            db.apply_pragmas(conn)
+            for version, name, step in MIGRATIONS:
+                if version <= schema_version(conn):
+                    continue
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # Ein anderer Prozess könnte den Schritt inzwischen ausgeführt haben
+                    if version > schema_version(conn):
+                        step(conn)
+                        conn.execute(f"PRAGMA user_version = {version}")
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                logging.getLogger(__name__).info("Migration %d (%s) ausgeführt.", version, name)
+            conn.execute("PRAGMA optimize")
+        finally:
+            conn.close()
+        _migrated.add(db_name)
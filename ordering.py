@@ -0,0 +1,86 @@
+# ordering.py
+"""
+Dünn besetzte Positionsschlüssel für die Reihenfolge von Tasks.
+
+Positionen liegen POSITION_GAP auseinander. Wird eine Karte verschoben,
+bekommt nur sie eine neue Position zwischen ihren neuen Nachbarn. Erst wenn
+dort kein Platz mehr ist, wird die ganze Geschwistergruppe neu durchnummeriert.
+"""
+from bisect import bisect_left
+
+POSITION_GAP = 1024
+
+
+def _increasing_subsequence(values):
+    """
+    Indizes einer längsten streng steigenden Teilfolge (None zählt nie dazu).
+    """
+    tails = []       # kleinster Endwert einer steigenden Folge der Länge i+1
+    tail_index = []  # Index dieses Endwerts in values
+    previous = [None] * len(values)
+
+    for i, value in enumerate(values):
+        if value is None:
+            continue
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_index.append(i)
+        else:
+            tails[k] = value
+            tail_index[k] = i
+        previous[i] = tail_index[k - 1] if k else None
+
+    keep = set()
+    i = tail_index[-1] if tail_index else None
+    while i is not None:
+        keep.add(i)
+        i = previous[i]
+    return keep
+
+
+def plan_positions(current):
+    """
+    Berechnet Positionen für eine Geschwistergruppe in ihrer neuen Reihenfolge.
+
+    current: Liste der bisherigen Positionen in der gewünschten Reihenfolge
+             (None für Tasks, die neu in die Gruppe kommen).
+    Liefert die neuen Positionen in derselben Reihenfolge. Tasks, deren
+    Position schon passt, behalten sie; nur die übrigen werden in die Lücken
+    zwischen ihren Nachbarn gelegt.
+    """
+    keep = _increasing_subsequence(current)
+    result = list(current)
+
+    i = 0
+    n = len(current)
+    while i < n:
+        if i in keep:
+            i += 1
+            continue
+
+        # zusammenhängender Block verschobener Tasks [i, j)
+        j = i
+        while j < n and j not in keep:
+            j += 1
+        low = result[i - 1] if i > 0 else None
+        high = current[j] if j < n else None
+        count = j - i
+
+        if low is None and high is None:
+            positions = [(k + 1) * POSITION_GAP for k in range(count)]
+        elif high is None:
+            positions = [low + (k + 1) * POSITION_GAP for k in range(count)]
+        elif low is None:
+            positions = [high - (count - k) * POSITION_GAP for k in range(count)]
+        elif high - low > count:
+            step = (high - low) / (count + 1)
+            positions = [low + int(step * (k + 1)) for k in range(count)]
+        else:
+            # kein Platz mehr zwischen den Nachbarn → alles neu verteilen
+            return [(k + 1) * POSITION_GAP for k in range(n)]
+
+        result[i:j] = positions
+        i = j
+
+    return result
@@ -0,0 +1,145 @@
+# records.py
+"""
+Kompakte Zeilenobjekte als row_factory für alle Verbindungen (siehe db.py).
+
+Pro Spaltenliste wird einmal eine Klasse mit __slots__ erzeugt; eine Zeile ist
+dann ein Objekt ohne __dict__ – rund ein Drittel eines dicts mit denselben
+Schlüsseln. Zugriff wie bei sqlite3.Row per Index, Slice oder Spaltenname
+(row[0], row["title"], dict(row)) und zusätzlich per Attribut (row.title),
+damit Templates und Baum-Aufbau dieselben Objekte benutzen können, ohne sie
+in dicts umzukopieren.
+
+Jede Zeile hat außerdem die Slots aus NODE_SLOTS, die task_tree.build_forest
+in place befüllt. Für jsonify sorgt RecordJSONProvider; Zeilen werden dort zu
+Objekten, die Baum-Slots nur, wenn gesetzt.
+"""
+import keyword
+import threading
+
+from flask.json.provider import DefaultJSONProvider
+
+# Vom Baum-Aufbau gesetzt (task_tree.py), nicht Teil der Abfrage
+NODE_SLOTS = ("children", "subtask_count", "estimated_total")
+
+_classes = {}
+_lock = threading.Lock()
+
+
+class Record:
+    __slots__ = NODE_SLOTS
+
+    # Von record_class gesetzt: Spaltennamen, zugehörige Slots, Name -> Index
+    _fields = ()
+    _slots = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                key = self._index[key.lower()]
+            except KeyError:
+                raise IndexError(f"No item with that key: {key!r}") from None
+        if isinstance(key, slice):
+            return tuple(getattr(self, name) for name in self._slots[key])
+        return getattr(self, self._slots[key])
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __iter__(self):
+        # Wie sqlite3.Row: Iteration liefert die Werte
+        for name in self._slots:
+            yield getattr(self, name)
+
+    def __eq__(self, other):
+        if not isinstance(other, Record):
+            return NotImplemented
+        return self._fields == other._fields and tuple(self) == tuple(other)
+
+    __hash__ = None
+
+    def keys(self):
+        return list(self._fields)
+
+    def get(self, key, default=None):
+        index = self._index.get(key.lower())
+        return default if index is None else getattr(self, self._slots[index])
+
+    def as_dict(self):
+        result = dict(zip(self._fields, self))
+        for name in NODE_SLOTS:
+            value = getattr(self, name, None)
+            if value is not None:
+                result[name] = value
+        return result
+
+    def __repr__(self):
+        return f"Record({', '.join(f'{k}={v!r}' for k, v in zip(self._fields, self))})"
+
+
+# Namen, die als Spaltenname mit der Klasse kollidieren würden
+_RESERVED = set(dir(Record))
+
+
+def _make_class(fields):
+    slots, index = [], {}
+    for i, name in enumerate(fields):
+        usable = (name.isidentifier() and not keyword.iskeyword(name)
+                  and name not in _RESERVED and not name.startswith("_") and name not in slots)
+        # Ausdrücke ohne Alias ("COUNT(*)") und doppelte Namen nur per Index/Name erreichbar
+        slots.append(name if usable else f"_{i}")
+        index.setdefault(name.lower(), i)
+
+    # __init__ mit festen Parametern generieren – so schnell wie Attributzuweisung geht
+    params = "".join(f", v{i}" for i in range(len(slots)))
+    body = "".join(f"\n    self.{slot} = v{i}" for i, slot in enumerate(slots)) or "\n    pass"
+    namespace = {}
+    exec(f"def __init__(self{params}):{body}", namespace)
+
+    return type("Record", (Record,), {
+        "__slots__": tuple(slots),
+        "__init__": namespace["__init__"],
+        "_fields": tuple(fields),
+        "_slots": tuple(slots),
+        "_index": index,
+    })
+
+
+def record_class(fields):
+    """
+    Klasse für eine Spaltenliste (Tupel von Namen), einmal erzeugt und wiederverwendet.
+    """
+    cls = _classes.get(fields)
+    if cls is None:
+        with _lock:
+            cls = _classes.get(fields)
+            if cls is None:
+                cls = _classes[fields] = _make_class(fields)
+    return cls
+
+
+# Zuletzt gesehene cursor.description und ihre Klasse: die row_factory läuft pro
+# Zeile, die Spaltenliste wechselt aber nur pro Abfrage
+_last = (None, None)
+
+
+def row_factory(cursor, row):
+    global _last
+    description, cls = _last
+    if cursor.description is not description:
+        description = cursor.description
+        cls = record_class(tuple(column[0] for column in description))
+        _last = (description, cls)
+    return cls(*row)
+
+
+class RecordJSONProvider(DefaultJSONProvider):
+    """
+    JSON-Provider der App: Zeilen werden wie dicts serialisiert.
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Record):
+            return o.as_dict()
+        return DefaultJSONProvider.default(o)
@@ -0,0 +1,113 @@
+# recurrence.py
+"""
+Termine wiederkehrender Aufgaben (recurring_tasks) in geschlossener Form.
+
+Statt ab start_date Intervall für Intervall bis zum gewünschten Fenster zu
+laufen, wird der erste Termin im Fenster direkt ausgerechnet. occurrences()
+liefert dann nur noch die Termine im Fenster, und zwar lazy.
+"""
+import calendar
+from datetime import date, datetime, timedelta
+
+FREQUENCIES = ("daily", "weekly", "monthly", "yearly")
+
+
+def _as_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _add_months(start, months):
+    """
+    Gleicher Tag im Monat, in kürzeren Monaten auf den letzten Tag gekappt (31.01. → 28.02.).
+    """
+    index = start.year * 12 + start.month - 1 + months
+    year, month = divmod(index, 12)
+    month += 1
+    return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+
+def _ceil_div(a, b):
+    return -(-a // b)
+
+
+def occurrences(frequency, start, window_start, window_end, interval=1, until=None, skip=()):
+    """
+    Termine der Regel im halboffenen Fenster [window_start, window_end).
+
+    frequency: daily, weekly, monthly oder yearly
+    start:     erster Termin (date oder "YYYY-MM-DD")
+    interval:  jeder n-te Tag/Woche/Monat/Jahr (None/0 = 1)
+    until:     letzter möglicher Termin (inklusive), optional
+    skip:      Menge einzelner ausgelassener Termine
+    """
+    start = _as_date(start)
+    window_start = _as_date(window_start)
+    window_end = _as_date(window_end)
+    until = _as_date(until)
+    interval = max(int(interval or 1), 1)
+
+    if until is not None:
+        window_end = min(window_end, until + timedelta(days=1))
+    window_start = max(window_start, start)
+    if window_start >= window_end:
+        return
+
+    if frequency in ("daily", "weekly"):
+        step = interval * (7 if frequency == "weekly" else 1)
+        k = _ceil_div((window_start - start).days, step)
+        d = start + timedelta(days=k * step)
+        while d < window_end:
+            if d not in skip:
+                yield d
+            d += timedelta(days=step)
+
+    elif frequency in ("monthly", "yearly"):
+        step = interval * (12 if frequency == "yearly" else 1)
+        months_apart = (window_start.year - start.year) * 12 + window_start.month - start.month
+        k = max(_ceil_div(months_apart, step), 0)
+        d = _add_months(start, k * step)
+        if d < window_start:
+            k += 1
+            d = _add_months(start, k * step)
+        while d < window_end:
+            if d not in skip:
+                yield d
+            k += 1
+            d = _add_months(start, k * step)
+
+    # unbekannte Frequenzen haben keine Termine (wie bisher)
+
+
+def load_skips(cursor, user_id):
+    """
+    Ausgelassene Termine aller Regeln des Users: {recurring_task_id: {date, ...}}
+    """
+    cursor.execute("""
+        SELECT s.recurring_task_id, s.skip_date
+        FROM recurring_task_skips s
+        JOIN recurring_tasks r ON r.id = s.recurring_task_id
+        WHERE r.user_id = ?
+    """, (user_id,))
+    skips = {}
+    for recurring_task_id, skip_date in cursor.fetchall():
+        skips.setdefault(recurring_task_id, set()).add(_as_date(skip_date))
+    return skips
+
+
+def rule_occurrences(rule, window_start, window_end, skips=None):
+    """
+    occurrences() für eine Zeile aus recurring_tasks
+    (id, frequency, interval_value, start_date, end_date).
+    Ohne start_date beginnt die Regel mit dem Fenster.
+    """
+    return occurrences(
+        rule["frequency"],
+        rule["start_date"] or window_start,
+        window_start,
+        window_end,
+        rule["interval_value"],
+        rule["end_date"],
+        (skips or {}).get(rule["id"], ()),
+    )
@@ -0,0 +1,169 @@
+# search.py
+"""
+Volltextsuche über Tasks, Spezial-Listen, Kalender-Einträge und Milestones.
+
+Grundlage ist der FTS5-Index search_index aus Migration 6, den Trigger auf den
+Quelltabellen aktuell halten. Gesucht wird per Präfix ("rech" findet
+"Rechnung"), sortiert nach bm25 mit stärkerem Gewicht auf dem Titel, und
+geblättert per Keyset: der Cursor ist (Score, rowid) des letzten Treffers.
+"""
+import re
+
+import db
+import migrations
+from cache import SHARED_SCOPE
+from migrations import SEARCH_KINDS, SEARCH_SOURCES, search_row_sql
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+REBUILD_CHUNK = 500
+
+# Gewichte für bm25: title, description, scope
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TABLE_BY_CODE = {code: table for table, (code, _, _) in SEARCH_SOURCES.items()}
+
+# Was zu einem Treffer zusätzlich ausgeliefert wird
+_DETAILS = {
+    "tasks": "id, title, list_name, due_date, completed",
+    "special_list_tasks": "id, title, special_list_name AS list_name, due_date, completed",
+    "calendar_tasks": "id, title, date, category",
+    "milestones": "id, title, goal_id, due_date, completed",
+    "milestone_tasks": "id, title, milestone_id, completed",
+}
+
+# Nur Wortzeichen übernehmen – Anführungszeichen, Klammern und Operatoren aus der
+# Eingabe können so die MATCH-Syntax nicht verbiegen
+_TERM = re.compile(r"\w+")
+
+
+def match_expression(query):
+    """
+    Baut den MATCH-Ausdruck: alle Wörter als Präfix in Titel oder Beschreibung.
+    Liefert None, wenn die Anfrage kein Wort enthält.
+    """
+    terms = _TERM.findall(query)
+    if not terms:
+        return None
+    words = " AND ".join(f'"{term}"*' for term in terms)
+    return f"{{title description}} : ({words})"
+
+
+def encode_cursor(score, rowid):
+    return f"{score!r}:{rowid}"
+
+
+def decode_cursor(cursor):
+    """
+    Wirft ValueError bei ungültigem Cursor.
+    """
+    score, rowid = cursor.rsplit(":", 1)
+    return float(score), int(rowid)
+
+
+def search(manager, user_id, query, limit=DEFAULT_LIMIT, after=None):
+    """
+    Sucht im Index und lädt die Details der Treffer nach (eine Abfrage pro Quelle).
+
+    after: Cursor aus "next" der vorherigen Seite
+    Liefert {"results": [...], "next": Cursor oder None}. Jeder Treffer hat
+    kind (Quelltabelle), id, title und je nach Quelle Liste, Datum, Status.
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return {"results": [], "next": None}
+
+    # Nur Einträge des Users und die gemeinsamen (Timeline). Der Filter läuft auf den
+    # Treffern des MATCH – das ist schneller als die User-ID als Token mitzusuchen,
+    # weil deren Trefferliste in einer Ein-Personen-Datenbank den ganzen Index umfasst.
+    params = [expression, user_id, SHARED_SCOPE]
+    keyset = ""
+    if after:
+        score, rowid = decode_cursor(after)
+        keyset = "WHERE score > ? OR (score = ? AND rowid > ?)"
+        params += [score, score, rowid]
+
+    with manager.get_db_connection() as conn:
+        hits = conn.execute(f"""
+            SELECT rowid, score FROM (
+                SELECT rowid, bm25(search_index, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}, 0.0) AS score
+                FROM search_index
+                WHERE search_index MATCH ? AND scope IN (?, ?)
+            )
+            {keyset}
+            ORDER BY score, rowid
+            LIMIT ?
+        """, params + [limit + 1]).fetchall()
+
+        has_more = len(hits) > limit
+        hits = hits[:limit]
+
+        wanted = {}
+        for hit in hits:
+            wanted.setdefault(_TABLE_BY_CODE[hit["rowid"] % SEARCH_KINDS], []).append(hit["rowid"] // SEARCH_KINDS)
+
+        details = {}
+        for table, ids in wanted.items():
+            placeholders = ", ".join("?" * len(ids))
+            for row in conn.execute(f"SELECT {_DETAILS[table]} FROM {table} WHERE id IN ({placeholders})", ids):
+                details[(table, row["id"])] = dict(row)
+
+    results = []
+    for hit in hits:
+        table = _TABLE_BY_CODE[hit["rowid"] % SEARCH_KINDS]
+        entry = details.get((table, hit["rowid"] // SEARCH_KINDS))
+        if entry is not None:
+            results.append({"kind": table, **entry})
+
+    last = hits[-1] if hits else None
+    return {
+        "results": results,
+        "next": encode_cursor(last["score"], last["rowid"]) if has_more else None,
+    }
+
+
+def rebuild(db_name=db.DATABASE, chunk_size=REBUILD_CHUNK, progress=None):
+    """
+    Baut den Index aus den Quelltabellen neu auf – Tabelle für Tabelle in
+    Häppchen von chunk_size Zeilen, jedes in einer eigenen kurzen Transaktion,
+    damit die App währenddessen weiter schreiben kann. Die Suche bleibt dabei
+    benutzbar; Einträge gelöschter Zeilen verschwinden mit ihrem Häppchen.
+
+    progress(table, count) wird nach jedem Häppchen aufgerufen.
+    Liefert die Zahl der indizierten Zeilen.
+    """
+    migrations.migrate(db_name)
+    total = 0
+    with db.connection(db_name, write=True) as conn:
+        for table, (code, _, _) in SEARCH_SOURCES.items():
+            last_id, done = 0, 0
+            while True:
+                ids = [r[0] for r in conn.execute(
+                    f"SELECT id FROM {table} WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunk_size)
+                )]
+                # Das letzte Häppchen reicht bis zum Ende, damit auch verwaiste Index-Einträge wegfallen
+                upper = ids[-1] if len(ids) == chunk_size else None
+                conn.execute(f"""
+                    DELETE FROM search_index
+                    WHERE rowid > ? {"AND rowid <= ?" if upper is not None else ""}
+                      AND rowid % {SEARCH_KINDS} = {code}
+                """, [last_id * SEARCH_KINDS + code] + ([upper * SEARCH_KINDS + code] if upper is not None else []))
+                conn.execute(
+                    search_row_sql(table, table, "OR REPLACE")
+                    + f" FROM {table} WHERE id > ? {'AND id <= ?' if upper is not None else ''}",
+                    [last_id] + ([upper] if upper is not None else [])
+                )
+                conn.commit()
+
+                done += len(ids)
+                if progress:
+                    progress(table, done)
+                if upper is None:
+                    break
+                last_id = upper
+            total += done
+
+        conn.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+        conn.commit()
+    return total
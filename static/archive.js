@@ -0,0 +1,40 @@
+document.addEventListener("DOMContentLoaded", function () {
+
+    // Tasks einer archivierten Liste erst beim ersten Aufklappen laden
+    document.querySelectorAll("details.archived-tasks").forEach(details => {
+        details.addEventListener("toggle", function () {
+            if (!details.open || details.dataset.loaded) return;
+            details.dataset.loaded = "1";
+
+            fetch(details.dataset.url)
+                .then(response => response.ok ? response.json() : Promise.reject(response.status))
+                .then(data => {
+                    const list = details.querySelector("ul");
+                    data.incomplete.forEach(task => list.appendChild(renderTask(task)));
+                    data.completed.forEach(task => list.appendChild(renderTask(task)));
+                    if (!list.children.length) {
+                        list.appendChild(document.createElement("li")).textContent = "Keine Aufgaben.";
+                    }
+                })
+                .catch(() => {
+                    // Beim nächsten Aufklappen erneut versuchen
+                    delete details.dataset.loaded;
+                });
+        });
+    });
+
+    function renderTask(task) {
+        const li = document.createElement("li");
+        li.textContent = task.title;
+        if (task.completed) li.classList.add("completed");
+        if (task.children && task.children.length) {
+            const rollup = li.appendChild(document.createElement("span"));
+            rollup.className = "task-rollup";
+            rollup.textContent = ` ${task.subtask_count} Unteraufgaben · ~${task.estimated_total} min`;
+            const ul = document.createElement("ul");
+            task.children.forEach(child => ul.appendChild(renderTask(child)));
+            li.appendChild(ul);
+        }
+        return li;
+    }
+});
@@ -8,103 +8,246 @@ document.addEventListener("DOMContentLoaded", function () {
 
     let date = new Date(initialYear, initialMonth - 1);
 
+    // Vorgeladene Monate: "YYYY-M" -> Liste der Einträge (siehe /calendar/range)
+    const monthCache = new Map();
 
-    // Navigiere zur gleichen Route, aber mit Query-Parametern für Jahr und Monat
-
-    prevMonthButton.addEventListener("click", function () {
-        date.setMonth(date.getMonth() - 1);
-        window.location.href = `/calendar?year=${date.getFullYear()}&month=${date.getMonth() + 1}`;
-    });
-
-    nextMonthButton.addEventListener("click", function () {
-        date.setMonth(date.getMonth() + 1);
-        window.location.href = `/calendar?year=${date.getFullYear()}&month=${date.getMonth() + 1}`;
-    });
+    function monthKey(year, month) {
+        return `${year}-${month}`;
+    }
 
+    function isoDate(d) {
+        return `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, "0")}-${String(d.getDate()).padStart(2, "0")}`;
+    }
 
-    // Optional: Aktualisiere den Header (falls nötig) – oder das übernimmt dein Server.
-    currentMonth.textContent = new Intl.DateTimeFormat('en-US', {
-        month: 'long',
-        year: 'numeric'
-    }).format(date);
+    // Lädt Vormonat, aktuellen und Folgemonat mit einer Anfrage vor
+    function prefetchAround(year, month) {
+        const start = new Date(year, month - 2, 1);
+        const end = new Date(year, month + 1, 1);
+        const months = [0, 1, 2].map(i => new Date(year, month - 2 + i, 1));
+        if (months.every(m => monthCache.has(monthKey(m.getFullYear(), m.getMonth() + 1)))) {
+            return;
+        }
+
+        fetch(`/calendar/range?start=${isoDate(start)}&end=${isoDate(end)}`)
+            .then(response => response.ok ? response.json() : Promise.reject(response.status))
+            .then(data => {
+                months.forEach(m => monthCache.set(monthKey(m.getFullYear(), m.getMonth() + 1), []));
+                data.tasks.forEach(task => {
+                    const [y, mo] = task.date.split("-").map(Number);
+                    const list = monthCache.get(monthKey(y, mo));
+                    if (list) list.push(task);
+                });
+            })
+            .catch(error => console.error("Prefetch failed:", error));
+    }
 
+    // Holt alle Änderungen seit syncCursor (siehe /api/changes) und trägt die
+    // calendar_tasks in die vorgeladenen Monate ein. Liefert true, wenn sich
+    // Kalender-Einträge geändert haben.
+    function syncChanges() {
+        return fetch(`/api/changes?since=${syncCursor}`)
+            .then(response => response.ok ? response.json() : Promise.reject(response.status))
+            .then(data => {
+                if (data.reset) {
+                    monthCache.clear();
+                    syncCursor = data.cursor;
+                    return true;
+                }
+                syncCursor = data.cursor;
+                const delta = data.changes.calendar_tasks;
+                if (delta) applyCalendarChanges(delta);
+                return data.has_more ? syncChanges().then(more => more || !!delta) : !!delta;
+            });
+    }
 
+    function applyCalendarChanges(delta) {
+        const touched = new Set(delta.deleted.concat(delta.upserted.map(row => row.id)));
+        monthCache.forEach((tasks, key) => monthCache.set(
+            key, tasks.filter(task => task.source !== "calendar" || !touched.has(task.id))
+        ));
+        delta.upserted.forEach(row => {
+            const [y, mo] = row.date.split("-").map(Number);
+            const list = monthCache.get(monthKey(y, mo));
+            if (list) {
+                list.push({ id: row.id, title: row.title, date: row.date, category: row.category, source: "calendar" });
+            }
+        });
+    }
 
+    // Wochen (Montag zuerst) mit 0 für Tage außerhalb des Monats – wie calendar.monthcalendar
+    function monthGrid(year, month) {
+        const first = new Date(year, month - 1, 1);
+        const daysInMonth = new Date(year, month, 0).getDate();
+        const weeks = [];
+        let week = new Array((first.getDay() + 6) % 7).fill(0);
+        for (let day = 1; day <= daysInMonth; day++) {
+            week.push(day);
+            if (week.length === 7) {
+                weeks.push(week);
+                week = [];
+            }
+        }
+        if (week.length) {
+            weeks.push(week.concat(new Array(7 - week.length).fill(0)));
+        }
+        return weeks;
+    }
 
+    function renderMonth(year, month, tasks) {
+        const byDate = {};
+        tasks.forEach(task => (byDate[task.date] = byDate[task.date] || []).push(task));
+
+        calendarGrid.innerHTML = "";
+        monthGrid(year, month).forEach(week => week.forEach(day => {
+            const cell = document.createElement("div");
+            cell.className = "day";
+            cell.dataset.date = `${year}-${String(month).padStart(2, "0")}-${String(day).padStart(2, "0")}`;
+            if (day > 0) {
+                const label = document.createElement("div");
+                label.textContent = day;
+                const container = document.createElement("div");
+                container.className = "task-container";
+                (byDate[cell.dataset.date] || []).forEach(task => {
+                    const el = document.createElement("div");
+                    el.className = `day-task ${task.category}`;
+                    el.dataset.taskId = task.id;
+                    el.dataset.source = task.source;
+                    el.draggable = task.source === "calendar";
+                    el.textContent = task.title;
+                    container.appendChild(el);
+                });
+                cell.append(label, container);
+            }
+            calendarGrid.appendChild(cell);
+        }));
+    }
 
-    function handleDrop(event) {
-        event.preventDefault();
-        const taskId = event.dataTransfer.getData("text");
-        const targetDate = event.target.dataset.date;
+    function updateHeader() {
+        currentMonth.textContent = new Intl.DateTimeFormat('en-US', {
+            month: 'long',
+            year: 'numeric'
+        }).format(date);
+    }
 
-        fetch(`/update_task_date/${taskId}`, {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ due_date: targetDate }),
-        }).then(response => {
-            if (response.ok) {
-                location.reload();
-            } else {
-                console.error("Failed to update task date.");
-            }
-        });
+    // Aus dem Vorab-Cache rendern; sonst wie bisher zur Route mit Query-Parametern navigieren
+    function showMonth(offset) {
+        date.setMonth(date.getMonth() + offset);
+        const year = date.getFullYear();
+        const month = date.getMonth() + 1;
+        const url = `/calendar?year=${year}&month=${month}`;
+
+        const tasks = monthCache.get(monthKey(year, month));
+        if (!tasks) {
+            window.location.href = url;
+            return;
+        }
+        renderMonth(year, month, tasks);
+        updateHeader();
+        history.pushState({ year, month }, "", url);
+        prefetchAround(year, month);
     }
 
+    prevMonthButton.addEventListener("click", () => showMonth(-1));
+    nextMonthButton.addEventListener("click", () => showMonth(1));
+
+    window.addEventListener("popstate", () => window.location.reload());
+
+    updateHeader();
+    prefetchAround(date.getFullYear(), date.getMonth() + 1);
+
+    // Zurück im Tab: Änderungen aus anderen Fenstern nachziehen statt neu zu laden
+    document.addEventListener("visibilitychange", function () {
+        if (document.visibilityState !== "visible") return;
+        syncChanges()
+            .then(changed => {
+                const year = date.getFullYear();
+                const month = date.getMonth() + 1;
+                const tasks = monthCache.get(monthKey(year, month));
+                if (changed && tasks) renderMonth(year, month, tasks);
+            })
+            .catch(error => console.error("Sync failed:", error));
+    });
+
 
     let draggedTask = null;
 
-    // Draggable tasks
-    document.querySelectorAll(".day-task").forEach(task => {
-        task.addEventListener("dragstart", function (event) {
-            draggedTask = this;
-            console.log(`Task dragged: ${this.dataset.taskId}`);
-        });
+    // Draggable tasks (delegiert, damit es auch nach renderMonth funktioniert)
+    calendarGrid.addEventListener("dragstart", function (event) {
+        const task = event.target.closest(".day-task");
+        if (!task) return;
+        draggedTask = task;
+        console.log(`Task dragged: ${task.dataset.taskId}`);
     });
 
+    // Wiederkehrende Aufgaben sind immer dabei und werden nur ein-/ausgeblendet
     document.getElementById("show-recurring-tasks").addEventListener("change", function () {
-        const includeRecurring = this.checked; // Prüfe, ob das Kontrollkästchen aktiviert ist
-        fetch(`/calendar?include_recurring=${includeRecurring ? '1' : '0'}`)
-            .then(response => response.json())
-            .then(data => {
-                // Aktualisiere den Kalender mit den neuen Aufgaben (inkl. wiederkehrender Aufgaben)
-                updateCalendar(data.tasks);
-            });
+        const display = this.checked ? "block" : "none";
+        document.querySelectorAll(".recurring-daily, .recurring-weekly, .recurring-monthly, .recurring-yearly").forEach(function (task) {
+            task.style.display = display;
+        });
+    });
+
+    // Doppelklick auf einen wiederkehrenden Termin lässt genau diesen Termin aus
+    calendarGrid.addEventListener("dblclick", function (event) {
+        const task = event.target.closest(".day-task");
+        if (!task || task.dataset.source !== "recurring") return;
+        const skipDate = task.closest(".day").dataset.date;
+        if (!confirm(`Skip "${task.textContent.trim()}" on ${skipDate}?`)) return;
+
+        fetch(`/skip_recurring_task/${task.dataset.taskId}`, {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+                "X-CSRFToken": document.querySelector('input[name="csrf_token"]').value
+            },
+            body: JSON.stringify({ date: skipDate }),
+        })
+            .then(response => {
+                if (response.ok) {
+                    task.remove();
+                    monthCache.clear();
+                } else {
+                    console.error("Failed to skip occurrence.");
+                }
+            })
+            .catch(error => console.error("Error:", error));
     });
 
     // Drop targets (days in the calendar)
-    document.querySelectorAll(".day").forEach(day => {
-        day.addEventListener("dragover", function (event) {
-            event.preventDefault(); // Allow drop
-        });
+    calendarGrid.addEventListener("dragover", function (event) {
+        event.preventDefault(); // Allow drop
+    });
 
-        day.addEventListener("drop", function (event) {
-            event.preventDefault();
-            if (draggedTask) {
-                const newDate = this.dataset.date;
-                const taskId = draggedTask.dataset.taskId;
-
-                console.log(`Task dropped on ${newDate}`);
-
-                // Update task visually
-                this.querySelector(".task-container").appendChild(draggedTask);
-
-                // Update task date in the backend
-                fetch(`/update_task_date/${taskId}`, {
-                    method: "POST",
-                    headers: {
-                        "Content-Type": "application/json",
-                    },
-                    body: JSON.stringify({ newDate }),
-                })
-                    .then(response => {
-                        if (response.ok) {
-                            console.log(`Task ${taskId} updated to ${newDate}`);
-                        } else {
-                            console.error("Failed to update task date.");
-                        }
-                    })
-                    .catch(error => console.error("Error:", error));
-            }
-        });
+    calendarGrid.addEventListener("drop", function (event) {
+        event.preventDefault();
+        const day = event.target.closest(".day");
+        if (!draggedTask || !day || !day.querySelector(".task-container")) return;
+
+        const newDate = day.dataset.date;
+        const taskId = draggedTask.dataset.taskId;
+
+        console.log(`Task dropped on ${newDate}`);
+
+        // Update task visually
+        day.querySelector(".task-container").appendChild(draggedTask);
+        draggedTask = null;
+
+        // Update task date in the backend
+        fetch(`/update_task_date/${taskId}`, {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+            },
+            body: JSON.stringify({ newDate }),
+        })
+            .then(response => {
+                if (response.ok) {
+                    console.log(`Task ${taskId} updated to ${newDate}`);
+                    return syncChanges();
+                } else {
+                    console.error("Failed to update task date.");
+                }
+            })
+            .catch(error => console.error("Error:", error));
     });
 });
@@ -0,0 +1,39 @@
+// Erledigte Tasks seitenweise nachladen ("Mehr laden", siehe /completed_tasks/<liste>).
+// Die Seite rendert nur die zuletzt erledigten; der Button trägt den Cursor der nächsten Seite.
+
+function loadMoreCompleted(button) {
+    const url = `${button.dataset.url}?format=html&after=${encodeURIComponent(button.dataset.cursor)}`;
+    button.disabled = true;
+    return fetch(url)
+        .then(response => response.ok ? response.text().then(html => [html, response.headers.get("X-Next-Cursor")])
+                                       : Promise.reject(response.status))
+        .then(([html, next]) => {
+            const list = document.getElementById(`completed-tasks-${button.dataset.listName}`);
+            list.insertAdjacentHTML("beforeend", html);
+            if (next) {
+                button.dataset.cursor = next;
+                button.disabled = false;
+            } else {
+                button.remove();
+            }
+            return Boolean(next);
+        })
+        .catch(error => {
+            button.disabled = false;
+            throw error;
+        });
+}
+
+// Alle restlichen Seiten einer Liste laden (z.B. bevor "Clear completed" alles löscht)
+function loadAllCompleted(listName) {
+    const button = Array.from(document.querySelectorAll(".load-more-completed"))
+        .find(b => b.dataset.listName === listName);
+    if (!button) return Promise.resolve();
+    return loadMoreCompleted(button).then(more => more ? loadAllCompleted(listName) : undefined);
+}
+
+document.addEventListener("click", function (event) {
+    const button = event.target.closest(".load-more-completed");
+    if (!button || button.disabled) return;
+    loadMoreCompleted(button).catch(error => console.error("Nachladen fehlgeschlagen:", error));
+});
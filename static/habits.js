@@ -1,8 +1,12 @@
 document.addEventListener("DOMContentLoaded", function() {
-  // Hole die Habit-Daten vom Server (über den API-Endpunkt)
-  fetch("/habits/api/habits")
+  // Hole die Habit-Daten des aktuellen Monats vom Server (über den API-Endpunkt);
+  // unverändert → 304 + Browser-Cache
+  const now = new Date();
+  const today = `${now.getFullYear()}-${String(now.getMonth() + 1).padStart(2, "0")}-${String(now.getDate()).padStart(2, "0")}`;
+  fetch(`/habits/api/habits?period=month&date=${today}`, { cache: "no-cache" })
     .then(response => response.json())
-    .then(data => {
+    .then(page => {
+      const data = page.habits;
       // Render die Kalender für jeden Habit
       renderHabitCalendar(data, "alcohol", "calendar-grid-alcohol", "#ff9999");  // Alkohol: Rotton
       renderHabitCalendar(data, "smoke", "calendar-grid-smoke", "#cccccc");        // Rauchen: Grauton
@@ -52,4 +56,110 @@ document.addEventListener("DOMContentLoaded", function() {
     html += "</tr></table>";
     container.innerHTML = html;
   }
+
+  // Eigene Gewohnheiten (nur angemeldet): Heatmap aus /habits/api/year/<jahr>,
+  // Serien und Quoten aus /habits/api/stats
+  const ownHabits = document.getElementById("own-habits");
+  if (ownHabits) {
+    const csrfToken = document.querySelector('input[name="csrf_token"]').value;
+    let ownYear = new Date().getFullYear();
+
+    function postJson(url, body) {
+      return fetch(url, {
+        method: "POST",
+        headers: { "Content-Type": "application/json", "X-CSRFToken": csrfToken },
+        body: JSON.stringify(body)
+      }).then(response => response.json());
+    }
+
+    function percent(ratio) {
+      return `${Math.round(ratio * 100)}%`;
+    }
+
+    function loadOwnHabits() {
+      document.getElementById("own-habits-year").textContent = ownYear;
+      Promise.all([
+        fetch(`/habits/api/year/${ownYear}`, { cache: "no-cache" }).then(response => response.json()),
+        fetch("/habits/api/stats", { cache: "no-cache" }).then(response => response.json())
+      ])
+        .then(([grid, stats]) => renderOwnHabits(grid, stats))
+        .catch(error => console.error("Fehler beim Laden der eigenen Gewohnheiten:", error));
+    }
+
+    function renderOwnHabits(grid, stats) {
+      const container = document.getElementById("own-habit-grids");
+      container.innerHTML = "";
+      const statsById = new Map(stats.habits.map(habit => [habit.id, habit]));
+      grid.habits.forEach(habit => {
+        const habitStats = statsById.get(habit.id);
+        const section = document.createElement("div");
+        section.className = "own-habit";
+
+        const title = document.createElement("h3");
+        title.textContent = `${habit.name} (${habit.done} Tage)`;
+        const deleteButton = document.createElement("button");
+        deleteButton.type = "button";
+        deleteButton.textContent = "✖";
+        deleteButton.addEventListener("click", () => {
+          if (confirm(`Gewohnheit "${habit.name}" löschen?`)) {
+            postJson(`/habits/api/definitions/${habit.id}/delete`, {}).then(loadOwnHabits);
+          }
+        });
+        title.appendChild(deleteButton);
+        section.appendChild(title);
+
+        if (habitStats) {
+          const info = document.createElement("p");
+          info.className = "own-habit-stats";
+          info.textContent = `Serie: ${habitStats.current_streak} Tage · Längste: ${habitStats.longest_streak} Tage · ` +
+            `7/30/90 Tage: ${percent(habitStats.ratios["7"])} / ${percent(habitStats.ratios["30"])} / ${percent(habitStats.ratios["90"])}`;
+          section.appendChild(info);
+        }
+
+        // Ein Zeichen pro Tag ab dem 1. Januar; davor leere Felder bis zum Wochentag
+        const heatmap = document.createElement("div");
+        heatmap.className = "habit-heatmap";
+        for (let i = 0; i < habit.first_weekday; i++) {
+          const empty = document.createElement("span");
+          empty.className = "habit-day empty";
+          heatmap.appendChild(empty);
+        }
+        [...habit.days].forEach((bit, dayIndex) => {
+          const day = new Date(Date.UTC(ownYear, 0, 1 + dayIndex)).toISOString().slice(0, 10);
+          const cell = document.createElement("span");
+          cell.className = "habit-day";
+          cell.title = day;
+          if (bit === "1") {
+            cell.classList.add("done");
+            cell.style.backgroundColor = habit.color || "#007bff";
+          }
+          cell.addEventListener("click", () => {
+            postJson("/habits/api/days", { entries: [{ habit_id: habit.id, date: day, done: bit === "1" ? 0 : 1 }] })
+              .then(loadOwnHabits);
+          });
+          heatmap.appendChild(cell);
+        });
+        section.appendChild(heatmap);
+        container.appendChild(section);
+      });
+    }
+
+    document.getElementById("own-habits-prev").addEventListener("click", () => { ownYear -= 1; loadOwnHabits(); });
+    document.getElementById("own-habits-next").addEventListener("click", () => { ownYear += 1; loadOwnHabits(); });
+    document.getElementById("own-habit-form").addEventListener("submit", function (event) {
+      event.preventDefault();
+      const name = document.getElementById("own-habit-name").value;
+      const color = document.getElementById("own-habit-color").value;
+      postJson("/habits/api/definitions", { name, color })
+        .then(result => {
+          if (!result.ok) {
+            alert(result.error);
+            return;
+          }
+          this.reset();
+          loadOwnHabits();
+        });
+    });
+    loadOwnHabits();
+  }
 });
@@ -145,6 +145,46 @@ document.addEventListener("DOMContentLoaded", function () {
 
 
 
+    // =======================
+    // Batch: mehrere Operationen in einem Request (siehe /api/batch)
+    // =======================
+    function batch(operations) {
+        return fetch("/api/batch", {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+                "X-CSRFToken": csrfToken
+            },
+            credentials: "same-origin",
+            body: JSON.stringify({ operations })
+        }).then(res => res.json().then(data => {
+            if (!res.ok || !data.ok) throw new Error(JSON.stringify(data.results));
+            return data.results;
+        }));
+    }
+
+    // Alle erledigten Tasks einer Liste mit einem Request löschen
+    document.body.addEventListener("click", function (event) {
+        const button = event.target.closest(".clear-completed-btn");
+        if (!button) return;
+
+        const listName = button.dataset.listName;
+        const container = document.getElementById(`completed-tasks-${listName}`);
+
+        // Die Seite zeigt nur die erste Seite des Verlaufs – vorher den Rest holen
+        loadAllCompleted(listName)
+            .then(() => {
+                const items = Array.from(container.querySelectorAll(":scope > li[data-task-id]"));
+                if (!items.length || !confirm(`Delete ${items.length} completed tasks?`)) return;
+                return batch([{ op: "delete", ids: items.map(li => Number(li.dataset.taskId)) }])
+                    .then(() => items.forEach(li => li.remove()));
+            })
+            .catch(error => {
+                console.error("Batch failed:", error);
+                alert("Could not clear completed tasks.");
+            });
+    });
+
     // =======================
     // Fullscreen
     // =======================
@@ -303,4 +343,100 @@ document.addEventListener("DOMContentLoaded", function () {
     });
 
 
+    // =======================
+    // Live-Updates (Server-Sent Events, siehe /events)
+    // =======================
+    // Änderungen aus anderen Tabs/Geräten werden direkt in die Karten eingetragen
+    const syncMeta = document.querySelector('meta[name="sync-cursor"]');
+    if (syncMeta && window.EventSource) {
+        const source = new EventSource(`/events?since=${syncMeta.content}`);
+        source.addEventListener("change", function (event) {
+            const data = JSON.parse(event.data);
+            if (data.reset) {
+                // Cursor passt nicht mehr zur Datenbank – nur dann komplett neu laden
+                source.close();
+                window.location.reload();
+                return;
+            }
+            const delta = data.changes.tasks;
+            if (!delta) return;
+            delta.deleted.forEach(id => {
+                const item = findTask(id);
+                if (item) item.remove();
+            });
+            delta.upserted.forEach(applyTask);
+        });
+    }
+
+    function findTask(id) {
+        return document.querySelector(`.card[data-list-name] li[data-task-id='${id}']`);
+    }
+
+    // Ziel-UL wie im Template: erledigte flach, offene als Baum unter dem Eltern-Task
+    function taskContainer(row) {
+        if (row.completed) return document.getElementById(`completed-tasks-${row.list_name}`);
+        if (row.parent_id) {
+            const parent = findTask(row.parent_id);
+            if (!parent || parent.closest("ul[id^='completed-tasks-']")) return null;
+            let children = parent.querySelector(":scope > ul");
+            if (!children) {
+                children = document.createElement("ul");
+                parent.appendChild(children);
+            }
+            return children;
+        }
+        return document.getElementById(`incomplete-tasks-${row.list_name}`);
+    }
+
+    function applyTask(row) {
+        const container = taskContainer(row);
+        let taskItem = findTask(row.id);
+        if (!container) {
+            // Liste nicht auf dieser Seite (archiviert, geheim, anderer User-Bereich)
+            if (taskItem) taskItem.remove();
+            return;
+        }
+        if (!taskItem) {
+            taskItem = document.createElement("li");
+            taskItem.dataset.taskId = row.id;
+            taskItem.draggable = true;
+            const checkbox = document.createElement("input");
+            checkbox.type = "checkbox";
+            taskItem.append(checkbox, document.createElement("strong"), document.createTextNode(""));
+        }
+
+        const title = taskItem.querySelector(":scope > strong");
+        title.textContent = row.title;
+        title.nextSibling.textContent = row.due_date ? ` (Due: ${row.due_date}) ` : " ";
+
+        // Beschreibung nur als Aufklapp-Button (siehe task_details.js); aufgeklappte neu laden
+        const opened = taskItem.querySelector(":scope > .task-description");
+        if (opened) opened.remove();
+        let detailsButton = taskItem.querySelector(":scope > .task-details-btn");
+        if (row.description && !detailsButton) {
+            detailsButton = document.createElement("button");
+            detailsButton.type = "button";
+            detailsButton.className = "task-details-btn";
+            detailsButton.title = "Beschreibung";
+            detailsButton.textContent = "…";
+            title.nextSibling.after(detailsButton);
+        } else if (!row.description && detailsButton) {
+            detailsButton.remove();
+        }
+        taskItem.querySelector(":scope > input[type='checkbox']").checked = !!row.completed;
+        taskItem.style.textDecoration = row.completed ? "line-through" : "none";
+        taskItem.style.color = row.completed ? "gray" : "black";
+
+        const parentItem = container.closest("li[data-task-id]");
+        taskItem.style.marginLeft = parentItem ? `${(parseInt(parentItem.style.marginLeft, 10) || 0) + 20}px` : "0px";
+
+        // Nach Position einsortieren
+        const position = row.position || 0;
+        taskItem.dataset.position = position;
+        const next = Array.from(container.children).find(
+            other => other !== taskItem && Number(other.dataset.position) > position
+        );
+        container.insertBefore(taskItem, next || null);
+    }
+
 });
@@ -0,0 +1,27 @@
+// Beschreibung eines Tasks erst beim Aufklappen laden (GET /task/<id>).
+// Die Listen liefern nur has_description; der Text kann mehrere Kilobyte lang sein.
+document.addEventListener("click", function (event) {
+    const button = event.target.closest(".task-details-btn");
+    if (!button) return;
+    const item = button.closest("li[data-task-id]");
+
+    // Der Text steht direkt hinter dem Button – nicht den eines Untertasks erwischen
+    let details = button.nextElementSibling;
+    if (details && details.classList.contains("task-description")) {
+        details.hidden = !details.hidden;
+        return;
+    }
+
+    button.disabled = true;
+    fetch(`/task/${item.dataset.taskId}`)
+        .then(response => response.ok ? response.json() : Promise.reject(response.status))
+        .then(task => {
+            details = document.createElement("div");
+            details.className = "task-description";
+            details.style.whiteSpace = "pre-wrap";
+            details.textContent = task.description || "";
+            button.after(details);
+        })
+        .catch(error => console.error("Details konnten nicht geladen werden:", error))
+        .finally(() => { button.disabled = false; });
+});
@@ -15,18 +15,57 @@ document.addEventListener("DOMContentLoaded", function () {
     }
   });
 
-  // Hole die Timeline-Daten vom Server
-  fetch("/timeline/api/timeline_data")
-    .then(response => response.json())
-    .then(data => {
-      renderTimeline(data);
-    })
-    .catch(error => console.error("Fehler beim Laden der Timeline-Daten:", error));
+  // Sichtbares Fenster: ab windowStart spanYears Jahre. Der Server liefert nur die
+  // Ziele in diesem Fenster; ab drei Jahren fasst er Meilensteine zusammen
+  const ZOOM_BY_SPAN = { 1: "week", 3: "month", 10: "quarter" };
+  let windowStart = new Date();
+  windowStart.setHours(0, 0, 0, 0);
+  let spanYears = 1;
+
+  function windowEnd() {
+    const end = new Date(windowStart);
+    end.setFullYear(end.getFullYear() + spanYears);
+    return end;
+  }
+
+  function isoDate(d) {
+    return `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, "0")}-${String(d.getDate()).padStart(2, "0")}`;
+  }
+
+  // Hole die Timeline-Daten vom Server – "no-cache" heißt: per ETag nachfragen,
+  // bei 304 nimmt der Browser die gespeicherte Antwort
+  function loadTimeline() {
+    const params = new URLSearchParams({
+      start: isoDate(windowStart),
+      end: isoDate(windowEnd()),
+      zoom: ZOOM_BY_SPAN[spanYears]
+    });
+    fetch(`/timeline/api/timeline_data?${params}`, { cache: "no-cache" })
+      .then(response => response.json())
+      .then(data => {
+        renderTimeline(data);
+      })
+      .catch(error => console.error("Fehler beim Laden der Timeline-Daten:", error));
+  }
+
+  function shiftWindow(direction) {
+    // Um ein halbes Fenster weiterschieben
+    windowStart.setMonth(windowStart.getMonth() + direction * spanYears * 6);
+    loadTimeline();
+  }
+
+  document.getElementById("timeline-prev").addEventListener("click", () => shiftWindow(-1));
+  document.getElementById("timeline-next").addEventListener("click", () => shiftWindow(1));
+  document.getElementById("timeline-span").addEventListener("change", function () {
+    spanYears = Number(this.value);
+    loadTimeline();
+  });
+  loadTimeline();
 
   function showMilestoneDetail(title, milestoneId) {
     modalTitle.textContent = title;
     // Rufe den API-Endpunkt auf, um die Milestone-Aufgaben zu holen:
-    fetch(`/timeline/api/milestone_tasks/${milestoneId}`)
+    fetch(`/timeline/api/milestone_tasks/${milestoneId}`, { cache: "no-cache" })
       .then(response => response.json())
       .then(tasks => {
         let tasksHtml = "";
@@ -76,7 +115,8 @@ document.addEventListener("DOMContentLoaded", function () {
       label.textContent = current.toLocaleString('de-DE', { month: 'short', year: 'numeric' });
       marker.appendChild(label);
       xAxis.appendChild(marker);
-      current.setMonth(current.getMonth() + 1);
+      // Bei langen Fenstern nur jedes Quartal bzw. jedes Jahr beschriften
+      current.setMonth(current.getMonth() + (spanYears >= 10 ? 12 : spanYears >= 3 ? 3 : 1));
     }
     return xAxis;
   }
@@ -85,12 +125,8 @@ document.addEventListener("DOMContentLoaded", function () {
     const diagram = document.getElementById("timeline-diagram");
     diagram.innerHTML = "";
 
-    // Verwende einen fixen Zeitbereich: heute bis heute + 1 Jahr
-    const today = new Date();
-    const oneYearLater = new Date();
-    oneYearLater.setFullYear(oneYearLater.getFullYear() + 1);
-    const earliest = today.getTime();
-    const latest = oneYearLater.getTime();
+    const earliest = windowStart.getTime();
+    const latest = windowEnd().getTime();
     const totalSpan = latest - earliest;
 
     // Füge die X-Achse hinzu
@@ -109,11 +145,14 @@ document.addEventListener("DOMContentLoaded", function () {
       const lineTop = topOffset + index * goalHeight;
 
       // Erstelle die Zielzeile
+      // Nur der sichtbare Teil der Linie; Meilensteine rechnen mit der ganzen
+      const visibleLeft = Math.max(leftPercent, 0);
+      const visibleRight = Math.min(leftPercent + widthPercent, 100);
       const goalLine = document.createElement("div");
       goalLine.className = "goal-line";
       goalLine.style.top = lineTop + "px";
-      goalLine.style.left = leftPercent + "%";
-      goalLine.style.width = widthPercent + "%";
+      goalLine.style.left = visibleLeft + "%";
+      goalLine.style.width = Math.max(visibleRight - visibleLeft, 0) + "%";
       goalLine.style.backgroundColor = goal.color || "#007bff";
       // Beim Klick auf die Zielzeile das Goal-Detail-Modal anzeigen (wenn gewünscht)
       goalLine.addEventListener("click", function () {
@@ -126,20 +165,22 @@ document.addEventListener("DOMContentLoaded", function () {
       const goalLabel = document.createElement("div");
       goalLabel.className = "goal-label";
       goalLabel.style.top = (lineTop - 20) + "px";
-      goalLabel.style.left = leftPercent + "%";
-      goalLabel.textContent = goal.title;
+      goalLabel.style.left = visibleLeft + "%";
+      goalLabel.textContent = goal.task_count ? `${goal.title} (${goal.progress}%)` : goal.title;
       diagram.appendChild(goalLabel);
 
-      // Milestone-Punkte positionieren
+      // Milestone-Punkte auf der Zielzeile: percentage ist die Lage zwischen
+      // Start und Fälligkeit des Ziels (vom Server berechnet)
       goal.milestones.forEach(milestone => {
-        const msDate = new Date(milestone.due_date).getTime();
-        const msLeftPercent = ((msDate - earliest) / totalSpan) * 100;
+        const msLeftPercent = leftPercent + widthPercent * milestone.percentage / 100;
         const point = document.createElement("div");
         point.className = "milestone-point";
+        if (milestone.progress === 100) point.classList.add("done");
         point.style.top = lineTop + "px";
         point.style.left = msLeftPercent + "%";
+        point.title = `${milestone.title} – ${milestone.progress}% erledigt`;
         point.setAttribute("data-milestone-id", milestone.id);
-        point.setAttribute("data-title", milestone.title);
+        point.setAttribute("data-title", `${milestone.title} (${milestone.progress}%)`);
         // Wir laden die Aufgaben per Fetch, also kein data-detail setzen
         point.addEventListener("click", function (event) {
           event.stopPropagation();
@@ -149,6 +190,18 @@ document.addEventListener("DOMContentLoaded", function () {
         });
         diagram.appendChild(point);
       });
+
+      // Grobe Zoomstufe: ein Punkt pro Zeitraum mit der Zahl seiner Meilensteine
+      (goal.buckets || []).forEach(bucket => {
+        const point = document.createElement("div");
+        point.className = "milestone-point milestone-bucket";
+        if (bucket.progress === 100) point.classList.add("done");
+        point.style.top = lineTop + "px";
+        point.style.left = (leftPercent + widthPercent * bucket.percentage / 100) + "%";
+        point.textContent = bucket.milestone_count;
+        point.title = `${bucket.bucket}: ${bucket.milestone_count} Meilensteine – ${bucket.progress}% erledigt`;
+        diagram.appendChild(point);
+      });
     });
   }
 });
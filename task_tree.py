@@ -0,0 +1,55 @@
+# task_tree.py
+"""
+Aufbau der Task-Bäume für normale, Spezial- und archivierte Listen.
+
+Die Zeilen kommen bereits in Baumreihenfolge aus SQL (ORDER BY TREE_ORDER_SQL:
+Wurzeln zuerst, Geschwister nach position). build_forest hängt sie deshalb nur
+noch ein – in linearer Zeit, ohne Sortieren und ohne Rekursion – und rechnet
+dabei pro Knoten die Zahl der Unteraufgaben und die geschätzte Zeit des ganzen
+Teilbaums hoch.
+"""
+
+# NULL sortiert in SQLite zuerst, die Wurzeln stehen also vorne. Die Teilindizes
+# aus Migration 10 liefern genau diese Reihenfolge, SQLite muss nicht sortieren.
+TREE_ORDER_SQL = "parent_id, position, id"
+
+
+def build_forest(rows):
+    """
+    rows: Records mit id, parent_id und optional estimated_time, sortiert nach
+    TREE_ORDER_SQL. Die Zeilen werden selbst zu Knoten; gesetzt werden
+      children          direkte Unteraufgaben in position-Reihenfolge
+      subtask_count     Zahl aller Unteraufgaben im Teilbaum
+      estimated_total   estimated_time des Knotens plus aller Unteraufgaben
+    Liefert die Wurzeln. Tasks, deren Parent nicht unter rows ist (erledigt,
+    gelöscht, andere Liste), werden selbst zu Wurzeln – hinter den echten.
+    """
+    by_id = {}
+    for row in rows:
+        row.children = []
+        row.subtask_count = 0
+        row.estimated_total = row.get("estimated_time") or 0
+        by_id[row.id] = row
+
+    # Da die Zeilen sortiert sind, kommen die Kinder schon geordnet an
+    roots = []
+    for row in rows:
+        parent = by_id.get(row.parent_id)
+        if parent is None:
+            roots.append(row)
+        else:
+            parent.children.append(row)
+
+    # Breitensuche von den Wurzeln: order wächst während der Schleife. Rückwärts
+    # gelesen kommt jeder Knoten nach all seinen Nachfahren – die Summen wandern
+    # so in einem Durchgang nach oben.
+    order = list(roots)
+    for node in order:
+        order.extend(node.children)
+    for node in reversed(order):
+        parent = by_id.get(node.parent_id)
+        if parent is not None:
+            parent.subtask_count += node.subtask_count + 1
+            parent.estimated_total += node.estimated_total
+
+    return roots
@@ -1,6 +1,8 @@
 # timeline.py
 from flask import Blueprint, render_template, request, redirect, url_for, jsonify
-from timeline_manager import TimelineManager
+from timeline_manager import TimelineManager, parse_window
+from cache import SHARED_SCOPE
+from conditional import conditional
 
 timeline_bp = Blueprint('timeline', __name__, template_folder='templates')
 
@@ -9,17 +11,12 @@ timeline_manager = TimelineManager()
 
 @timeline_bp.route("/")
 def show_timeline():
-    # Hol dir alle Ziele und zugehörigen Meilensteine
-    goals = timeline_manager.get_goals()
-    # Für jedes Ziel kannst du die Meilensteine abrufen
-    goals_with_milestones = []
-    for goal in goals:
-        milestones = timeline_manager.get_milestones_for_goal(goal["id"])
-        goals_with_milestones.append({
-            "goal": goal,
-            "milestones": milestones if milestones is not None else []
-        })
-    return render_template("timeline.html", goals=goals_with_milestones)
+    def render():
+        # Ziele samt Meilensteinen aus demselben Loader wie /api/timeline_data
+        goals = timeline_manager.get_all_timeline_data()
+        return render_template("timeline.html", goals=goals)
+
+    return conditional("timeline", (SHARED_SCOPE,), render, html=True)
 
 @timeline_bp.route("/add_goal", methods=["POST"])
 def add_goal():
@@ -49,10 +46,11 @@ def add_milestone_task():
 
 @timeline_bp.route("/api/milestone_tasks/<int:milestone_id>")
 def milestone_tasks(milestone_id):
-    tasks = timeline_manager.get_tasks_for_milestone(milestone_id)
-    # Konvertiere die SQLite-Rows in Dictionaries
-    tasks_list = [dict(task) for task in tasks]
-    return jsonify(tasks_list)
+    def build():
+        # Zeilen gehen direkt an jsonify (records.RecordJSONProvider)
+        return jsonify(timeline_manager.get_tasks_for_milestone(milestone_id))
+
+    return conditional("milestone_tasks", (SHARED_SCOPE,), build, extra=(milestone_id,))
 
 
 
@@ -60,6 +58,13 @@ def milestone_tasks(milestone_id):
 def timeline_data():
     """
     Liefert Daten für alle Ziele inklusive Meilensteine und Fortschritt.
+
+    Mit start und end (YYYY-MM-DD, end exklusiv) nur die Ziele, die dieses Fenster
+    schneiden, und deren Meilensteine im Fenster. zoom=day|week zeigt sie einzeln;
+    bei month|quarter|year stehen stattdessen pro Ziel Zusammenfassungen in
+    "buckets": {"bucket": "2024-Q1", "milestone_count", "completed_count",
+    "task_count", "done_count", "first_due_date", "due_date", "progress", "percentage"}.
+
     Beispielhafte Struktur:
     [
       {
@@ -69,13 +74,18 @@ def timeline_data():
         "start_date": "2023-01-01",
         "due_date": "2025-12-31",
         "color": "#ff5733",
+        "task_count": 40,       // Milestone-Tasks aller Meilensteine
+        "done_count": 22,
+        "progress": 55,
         "milestones": [
             {
               "id": 10,
               "title": "Businessplan fertig",
               "due_date": "2023-06-30",
-              "progress": 80,       // in Prozent
-              "percentage": 20      // relative Position auf der Zeitachse (z.B. 20%)
+              "progress": 80,       // erledigte Milestone-Tasks in Prozent
+              "percentage": 20,     // Lage zwischen start_date und due_date des Ziels in Prozent
+              "task_count": 5,      // Milestone-Tasks (Liste über /api/milestone_tasks/<id>)
+              "done_count": 4
             },
             {
               "id": 11,
@@ -90,6 +100,20 @@ def timeline_data():
       // weitere Ziele...
     ]
     """
-    timeline_data = timeline_manager.get_all_timeline_data()  # Schreibe eine Methode, die diese Struktur liefert.
-    return jsonify(timeline_data)
+    if "start" not in request.args and "end" not in request.args:
+        return conditional(
+            "timeline_data", (SHARED_SCOPE,),
+            lambda: jsonify(timeline_manager.get_all_timeline_data())
+        )
+
+    try:
+        start, end, zoom = parse_window(request.args.get("start", ""), request.args.get("end", ""),
+                                        request.args.get("zoom", "day"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return conditional(
+        "timeline_window", (SHARED_SCOPE,),
+        lambda: jsonify(timeline_manager.get_timeline_window(start, end, zoom)),
+        extra=(start, end, zoom)
+    )
 
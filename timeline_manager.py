@@ -1,214 +1,324 @@
 # timeline_manager.py
-import sqlite3
-from datetime import datetime
+from datetime import date, datetime
+
+import db
+import migrations
+import events
+from cache import data_cache, bump_data_version, SHARED_SCOPE
 
 DATABASE = "tasks.db"  # Oder eine eigene DB-Datei, wenn gewünscht
 
+
+# Zoomstufen der Timeline: None zeigt einzelne Meilensteine, sonst der Ausdruck,
+# nach dem die Meilensteine eines Ziels zu einem Eintrag in "buckets" zusammenfallen
+ZOOM_LEVELS = {
+    "day": None,
+    "week": None,
+    "month": "substr(m.due_date, 1, 7)",
+    "quarter": "substr(m.due_date, 1, 4) || '-Q' || ((CAST(substr(m.due_date, 6, 2) AS INTEGER) + 2) / 3)",
+    "year": "substr(m.due_date, 1, 4)",
+}
+MAX_WINDOW_DAYS = 3660  # zehn Jahre
+
+# Ziele ohne start_date beginnen beim frühesten Meilenstein bzw. am Fälligkeitstag
+GOAL_START_SQL = """
+    COALESCE(g.start_date, MIN(g.due_date, COALESCE(
+        (SELECT MIN(due_date) FROM milestones WHERE goal_id = g.id), g.due_date)))
+"""
+
+
+def parse_window(start, end, zoom):
+    """
+    Liest das sichtbare Fenster [start, end) (YYYY-MM-DD) und die Zoomstufe.
+    Wirft ValueError bei ungültigen Werten oder zu großen Fenstern.
+    """
+    if zoom not in ZOOM_LEVELS:
+        raise ValueError(f"zoom must be one of {', '.join(ZOOM_LEVELS)}")
+    start, end = date.fromisoformat(start), date.fromisoformat(end)
+    if end <= start:
+        raise ValueError("end must be after start")
+    if (end - start).days > MAX_WINDOW_DAYS:
+        raise ValueError(f"window must not exceed {MAX_WINDOW_DAYS} days")
+    return start.isoformat(), end.isoformat(), zoom
+
+
+def _days(iso_date):
+    return date.fromisoformat(iso_date[:10]).toordinal()
+
+
+def _percent(done, total):
+    return round(100 * done / total) if total else 0
+
+
+def _place_milestones(goal):
+    """
+    Setzt progress (Anteil erledigter Tasks in Prozent; ohne Tasks zählen die
+    completed-Flags der Meilensteine) und percentage (Lage des Fälligkeitsdatums
+    zwischen start_date und due_date des Ziels, 0–100) für jeden Meilenstein
+    bzw. jeden zusammengefassten Eintrag in buckets.
+    """
+    entries = goal["milestones"] + goal.get("buckets", [])
+    for entry in entries:
+        if entry["task_count"]:
+            entry["progress"] = _percent(entry["done_count"], entry["task_count"])
+        elif "milestone_count" in entry:
+            entry["progress"] = _percent(entry["completed_count"], entry["milestone_count"])
+        else:
+            entry["progress"] = 100 if entry["completed"] else 0
+
+    if not goal["start_date"] or not goal["due_date"]:
+        for entry in entries:
+            entry["percentage"] = 0
+        return
+
+    start = _days(goal["start_date"])
+    span = _days(goal["due_date"]) - start
+    for entry in entries:
+        if not entry["due_date"]:
+            entry["percentage"] = 0
+        elif span <= 0:
+            entry["percentage"] = 100
+        else:
+            offset = (_days(entry["due_date"]) - start) / span
+            entry["percentage"] = round(100 * min(max(offset, 0.0), 1.0), 1)
+
+
 class TimelineManager:
     def __init__(self, db_name=DATABASE):
         self.db_name = db_name
         self._create_tables()
 
-    def get_db_connection(self):
-        conn = sqlite3.connect(self.db_name)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def get_db_connection(self, write=False):
+        # Request-gebundene Verbindung bzw. Pool-Verbindung, siehe db.py
+        return db.connection(self.db_name, write=write)
 
     def _create_tables(self):
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        # Tabelle für Ziele (Goals)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS timeline_goals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT,
-                description TEXT,
-                due_date TEXT  -- z.B. als Ziel-Datum
-            )
-        """)
-        # Tabelle für Meilensteine, die zu einem Ziel gehören
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS milestones (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                goal_id INTEGER,
-                title TEXT,
-                due_date TEXT,
-                completed INTEGER DEFAULT 0,
-                FOREIGN KEY (goal_id) REFERENCES timeline_goals(id)
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS timeline_goals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT,
-                description TEXT,
-                start_date TEXT,         -- neu: Startdatum des Ziels
-                due_date TEXT,           -- Fälligkeitsdatum
-                color TEXT               -- neu: individuelle Farbe, z. B. "#ff5733"
-            )
-            """)
-
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS milestone_tasks (
-                  id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  milestone_id INTEGER,
-                  title TEXT,
-                  completed INTEGER DEFAULT 0,
-                  FOREIGN KEY (milestone_id) REFERENCES milestones(id)
-                );
-                """)
-        conn.commit()
-        conn.close()
+        # Schema liegt in migrations.py
+        migrations.migrate(self.db_name)
 
     def add_goal(self, title, description, due_date, color="#007bff"):
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO timeline_goals (title, description, due_date, color)
-            VALUES (?, ?, ?, ?)
-        """, (title, description, due_date, color))
-        conn.commit()
-        conn.close()
+        with self.get_db_connection(write=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO timeline_goals (title, description, due_date, color)
+                VALUES (?, ?, ?, ?)
+            """, (title, description, due_date, color))
+            bump_data_version(cursor, SHARED_SCOPE)
+            conn.commit()
+            events.notify()
 
     def add_milestone(self, goal_id, title, due_date):
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO milestones (goal_id, title, due_date)
-            VALUES (?, ?, ?)
-        """, (goal_id, title, due_date))
-        conn.commit()
-        conn.close()
+        with self.get_db_connection(write=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO milestones (goal_id, title, due_date)
+                VALUES (?, ?, ?)
+            """, (goal_id, title, due_date))
+            bump_data_version(cursor, SHARED_SCOPE)
+            conn.commit()
+            events.notify()
 
     def get_goals(self):
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM timeline_goals ORDER BY due_date ASC")
-        goals = cursor.fetchall()
-        conn.close()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM timeline_goals ORDER BY due_date ASC")
+            goals = cursor.fetchall()
         return goals
 
     def get_milestones_for_goal(self, goal_id):
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM milestones WHERE goal_id = ? ORDER BY due_date ASC", (goal_id,))
-        milestones = cursor.fetchall()
-        conn.close()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM milestones WHERE goal_id = ? ORDER BY due_date ASC", (goal_id,))
+            milestones = cursor.fetchall()
         return milestones
 
     def get_all_timeline_data(self):
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
+        # Timeline-Daten sind nicht user-spezifisch → gemeinsamer Cache-Scope
+        return data_cache.get_or_load(
+            "timeline", (SHARED_SCOPE,), (), self._load_timeline
+        )
 
-        cursor.execute("SELECT * FROM timeline_goals ORDER BY due_date ASC")
-        goals = cursor.fetchall()
+    def get_timeline_window(self, start, end, zoom):
+        """
+        Nur die Ziele, deren [start_date, due_date] das Fenster [start, end) schneidet,
+        mit den Meilensteinen im Fenster – bei grober Zoomstufe (ZOOM_LEVELS) pro
+        Ziel zu Einträgen in "buckets" zusammengefasst statt einzeln.
+        """
+        return data_cache.get_or_load(
+            "timeline_window", (SHARED_SCOPE,), (start, end, zoom),
+            lambda: self._load_timeline(start, end, zoom)
+        )
 
-        timeline_data = []
+    def _load_timeline(self, start=None, end=None, zoom="day"):
+        """
+        Ziele mit ihren Meilensteinen in einer Abfrage statt einer pro Ziel und einer
+        pro Meilenstein. Der Fortschritt kommt aus den Zählern, die die Trigger aus
+        Migration 11 pflegen – gezählt wird hier nichts. Die Tasks selbst lädt die
+        Seite beim Aufklappen über /api/milestone_tasks.
 
-        for goal in goals:
-            goal_dict = dict(goal)
-            goal_entry = {
-                "id": goal_dict["id"],
-                "title": goal_dict["title"],
-                "description": goal_dict["description"],
-                "due_date": goal_dict["due_date"],
-                "start_date": goal_dict.get("start_date", "2023-01-01"),
-                "color": goal_dict.get("color", "#007bff"),
-                "milestones": []
-            }
-
-            cursor.execute("SELECT * FROM milestones WHERE goal_id = ? ORDER BY due_date ASC", (goal_dict["id"],))
-            milestones = cursor.fetchall()
+        Mit Fenster reicht dank idx_timeline_goals_due_start (Migration 12) ein
+        Bereichs-Scan ab start über die Fälligkeit; vergangene Ziele liest SQLite nicht.
+        """
+        bucket = ZOOM_LEVELS[zoom]
+        params = {"start": start, "end": end}
+        goal_filter = milestone_filter = ""
+        if start is not None:
+            goal_filter = f"WHERE g.due_date >= :start AND {GOAL_START_SQL} < :end"
+            milestone_filter = "AND m.due_date >= :start AND m.due_date < :end"
 
-            for milestone in milestones:
-                milestone_dict = dict(milestone)
-                # Abrufen der zugehörigen Aufgaben
-                cursor.execute("SELECT * FROM milestone_tasks WHERE milestone_id = ? ORDER BY id ASC",
-                               (milestone_dict["id"],))
-                tasks = cursor.fetchall()
-                tasks_list = [dict(task) for task in tasks]
-
-                milestone_entry = {
-                    "id": milestone_dict["id"],
-                    "title": milestone_dict["title"],
-                    "due_date": milestone_dict["due_date"],
-                    "progress": 0,  # Hier kannst du den Fortschritt berechnen
-                    "percentage": 50,  # Berechnung der relativen Position (Platzhalter)
-                    "detail": "",  # Zusätzliche Details
-                    "tasks": tasks_list  # Hier werden die Milestone-Tasks eingebettet
+        if bucket is None:
+            milestone_columns = """
+                m.id AS milestone_id, m.title AS milestone_title, m.due_date AS milestone_due,
+                m.completed AS milestone_completed, m.total_count AS task_count, m.done_count
+            """
+            grouping = "ORDER BY g.due_date, g.id, m.due_date, m.id"
+        else:
+            milestone_columns = f"""
+                {bucket} AS bucket, COUNT(m.id) AS milestone_count,
+                COALESCE(SUM(m.completed IS 1), 0) AS completed_count,
+                COALESCE(SUM(m.total_count), 0) AS task_count, COALESCE(SUM(m.done_count), 0) AS done_count,
+                MIN(m.due_date) AS first_due, MAX(m.due_date) AS last_due
+            """
+            grouping = "GROUP BY g.id, bucket ORDER BY g.due_date, g.id, bucket"
+
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT g.id AS goal_id, g.title AS goal_title, g.description, g.due_date AS goal_due,
+                       {GOAL_START_SQL} AS start_date, g.color,
+                       g.total_count AS goal_total, g.done_count AS goal_done,
+                       {milestone_columns}
+                FROM timeline_goals g
+                LEFT JOIN milestones m ON m.goal_id = g.id {milestone_filter}
+                {goal_filter}
+                {grouping}
+            """, params)
+            rows = cursor.fetchall()
+
+        timeline_data = []
+        goal_entry = None
+        for row in rows:
+            if goal_entry is None or goal_entry["id"] != row.goal_id:
+                goal_entry = {
+                    "id": row.goal_id,
+                    "title": row.goal_title,
+                    "description": row.description,
+                    "due_date": row.goal_due,
+                    "start_date": row.start_date,
+                    "color": row.color or "#007bff",
+                    "task_count": row.goal_total,
+                    "done_count": row.goal_done,
+                    "progress": _percent(row.goal_done, row.goal_total),
+                    "milestones": []
                 }
-                goal_entry["milestones"].append(milestone_entry)
+                if bucket is not None:
+                    goal_entry["buckets"] = []
+                timeline_data.append(goal_entry)
 
-            timeline_data.append(goal_entry)
+            if bucket is None and row.milestone_id is not None:
+                goal_entry["milestones"].append({
+                    "id": row.milestone_id,
+                    "title": row.milestone_title,
+                    "due_date": row.milestone_due,
+                    "completed": row.milestone_completed,
+                    "task_count": row.task_count,
+                    "done_count": row.done_count,
+                    "detail": ""
+                })
+            elif bucket is not None and row.milestone_count:
+                goal_entry["buckets"].append({
+                    "bucket": row.bucket,
+                    "milestone_count": row.milestone_count,
+                    "completed_count": row.completed_count,
+                    "task_count": row.task_count,
+                    "done_count": row.done_count,
+                    "first_due_date": row.first_due,
+                    "due_date": row.last_due
+                })
 
-        conn.close()
+        for goal_entry in timeline_data:
+            _place_milestones(goal_entry)
         return timeline_data
 
     def get_promoted_milestone_tasks(self):
         from datetime import datetime, timedelta
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        # Berechne das Datum in 30 Tagen
-        threshold_date = (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
-        # Wähle alle Meilensteine aus, deren due_date kleiner oder gleich threshold_date ist
-        cursor.execute("SELECT id FROM milestones WHERE due_date <= ?", (threshold_date,))
-        milestone_ids = [row["id"] for row in cursor.fetchall()]
-
-        promoted_tasks = []
-        for m_id in milestone_ids:
-            cursor.execute("SELECT * FROM milestone_tasks WHERE milestone_id = ? ORDER BY id ASC", (m_id,))
-            tasks = cursor.fetchall()
-            promoted_tasks.extend([dict(task) for task in tasks])
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            # Berechne das Datum in 30 Tagen
+            threshold_date = (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
+            # Wähle alle Meilensteine aus, deren due_date kleiner oder gleich threshold_date ist
+            cursor.execute("SELECT id FROM milestones WHERE due_date <= ?", (threshold_date,))
+            milestone_ids = [row["id"] for row in cursor.fetchall()]
+
+            promoted_tasks = []
+            for m_id in milestone_ids:
+                cursor.execute("SELECT * FROM milestone_tasks WHERE milestone_id = ? ORDER BY id ASC", (m_id,))
+                tasks = cursor.fetchall()
+                promoted_tasks.extend(tasks)
 
-        conn.close()
         return promoted_tasks
 
     def get_milestones_for_date_range(self, start_date, end_date):
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT m.id, m.title, m.due_date, m.completed, g.title AS goal_title
-            FROM milestones m
-            JOIN timeline_goals g ON m.goal_id = g.id
-            WHERE m.due_date BETWEEN ? AND ?
-            ORDER BY m.due_date ASC
-        """, (start_date, end_date))
-        results = cursor.fetchall()
-        conn.close()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT m.id, m.title, m.due_date, m.completed, g.title AS goal_title
+                FROM milestones m
+                JOIN timeline_goals g ON m.goal_id = g.id
+                WHERE m.due_date BETWEEN ? AND ?
+                ORDER BY m.due_date ASC
+            """, (start_date, end_date))
+            results = cursor.fetchall()
         return results
 
     def add_milestone_task(self, milestone_id, title):
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO milestone_tasks (milestone_id, title, completed)
-            VALUES (?, ?, 0)
-        """, (milestone_id, title))
-        conn.commit()
-        conn.close()
+        with self.get_db_connection(write=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO milestone_tasks (milestone_id, title, completed)
+                VALUES (?, ?, 0)
+            """, (milestone_id, title))
+            bump_data_version(cursor, SHARED_SCOPE)
+            conn.commit()
+            events.notify()
 
     def get_tasks_for_milestone(self, milestone_id):
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT * FROM milestone_tasks
-            WHERE milestone_id = ?
-            ORDER BY id ASC
-        """, (milestone_id,))
-        tasks = cursor.fetchall()
-        conn.close()
+        with self.get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM milestone_tasks
+                WHERE milestone_id = ?
+                ORDER BY id ASC
+            """, (milestone_id,))
+            tasks = cursor.fetchall()
         return tasks
 
+    def repair_progress_counters(self):
+        """
+        Zählt total_count/done_count von Meilensteinen und Zielen neu (falls Daten
+        an den Triggern vorbei geändert wurden). Liefert die Zahl korrigierter
+        (Meilensteine, Ziele).
+        """
+        with self.get_db_connection(write=True) as conn:
+            cursor = conn.cursor()
+            fixed = tuple(cursor.execute(statement).rowcount for statement in migrations.RECOUNT_PROGRESS_SQL)
+            if any(fixed):
+                bump_data_version(cursor, SHARED_SCOPE)
+            conn.commit()
+        if any(fixed):
+            events.notify()
+        return fixed
+
     def toggle_task_completion(self, task_id, completed):
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE milestone_tasks
-            SET completed = ?
-            WHERE id = ?
-        """, (int(completed), task_id))
-        conn.commit()
-        conn.close()
+        with self.get_db_connection(write=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE milestone_tasks
+                SET completed = ?
+                WHERE id = ?
+            """, (int(completed), task_id))
+            bump_data_version(cursor, SHARED_SCOPE)
+            conn.commit()
+            events.notify()
 
     # Weitere Funktionen zum Aktualisieren, Löschen etc. kannst du hier hinzufügen.
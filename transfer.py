@@ -0,0 +1,437 @@
+# transfer.py
+"""
+Export und Import der Daten eines Users als NDJSON (eine JSON-Zeile pro Datensatz)
+oder als JSON-Array mit denselben Datensätzen.
+
+Exportiert wird nur, was einem User gehört. Timeline (timeline_goals, milestones,
+milestone_tasks) und daily_habits haben keinen user_id, alle User teilen sie –
+sie bleiben draußen, sonst legte jeder Import die ganze Timeline ein weiteres Mal
+an. Ältere Exporte mit diesen Typen lassen sich weiter importieren; die Datensätze
+werden übersprungen.
+
+Der Export ist ein Generator über Cursorn, die in Häppchen gelesen werden – der
+Speicherbedarf bleibt konstant, egal wie viele Zeilen ein User hat. Alle
+Abfragen laufen in einer Lesetransaktion und sehen damit denselben Stand.
+Auch der Import liest beide Formate Datensatz für Datensatz; ein JSON-Array
+wird dafür stückweise dekodiert statt am Stück geladen.
+
+Der Import prüft erst die ganze Datei und schreibt dann in Häppchen
+(executemany, je eine Transaktion). IDs werden neu vergeben; parent_id,
+recurring_task_id und habit_id werden auf die neuen IDs umgebogen.
+Verweise auf Zeilen, die nicht in der Datei stehen (verwaiste Unteraufgaben),
+werden zu NULL.
+
+Während eines Häppchens sind die Insert-Trigger für Änderungsprotokoll und
+Suchindex abgeschaltet (bulk_load, Migration 7); beides wird danach für den
+ganzen ID-Bereich des Häppchens mit je einer Anweisung nachgetragen.
+"""
+import json
+import time
+from datetime import datetime, timezone
+
+import db
+import events
+import migrations
+from cache import bump_data_version
+from migrations import CHANGE_TRACKED_TABLES, SEARCH_SOURCES, log_rows_sql, search_row_sql
+
+FORMAT_VERSION = 1
+FETCH_SIZE = 500
+IMPORT_CHUNK = 2000
+READ_SIZE = 64 * 1024
+
+# Datensatz-Typ -> (Tabelle, Filter für den Export, Verweise {Spalte: Typ}).
+# Reihenfolge = Export- und Importreihenfolge: Verweise auf andere Typen zeigen
+# immer nach oben.
+RECORD_TYPES = {
+    "secret_list": ("secret_lists", "user_id = :user_id", {}),
+    "task": ("tasks", "user_id = :user_id", {"parent_id": "task"}),
+    "archived_task": ("tasks_archive", "user_id = :user_id", {"parent_id": "archived_task"}),
+    "special_list_task": ("special_list_tasks", "user_id = :user_id", {"parent_id": "special_list_task"}),
+    "calendar_task": ("calendar_tasks", "user_id = :user_id", {}),
+    "recurring_task": ("recurring_tasks", "user_id = :user_id", {}),
+    "recurring_skip": (
+        "recurring_task_skips",
+        "recurring_task_id IN (SELECT id FROM recurring_tasks WHERE user_id = :user_id)",
+        {"recurring_task_id": "recurring_task"},
+    ),
+    "habit_definition": ("habit_definitions", "user_id = :user_id", {}),
+    "habit_year": (
+        "habit_years",
+        "habit_id IN (SELECT id FROM habit_definitions WHERE user_id = :user_id)",
+        {"habit_id": "habit_definition"},
+    ),
+}
+
+# Gemeinsame Tabellen ohne user_id, die ältere Exporte noch enthalten – beim Import übersprungen
+_SHARED_TYPES = {"goal", "milestone", "milestone_task", "habit"}
+
+# Tabellen ohne id-Spalte: Reihenfolge im Export
+_EXPORT_ORDER = {"recurring_task_skips": "recurring_task_id, skip_date", "habit_years": "habit_id, year"}
+
+# BLOB-Spalten stehen als Hex-String in der Datei (Bitsets aus Migration 13)
+_BLOB_COLUMNS = {"habit_years": ("bits",)}
+
+# Spalten, die nie aus der Datei übernommen werden (total_count/done_count pflegen
+# die Trigger aus Migration 11)
+_SKIPPED_COLUMNS = {"id", "user_id", "updated_at", "total_count", "done_count"}
+
+# Archivierte Tasks teilen sich die IDs mit tasks (restore_list verschiebt sie mit ID
+# zurück): gemeinsame ID-Vergabe und eine gemeinsame Zuordnung alt -> neu
+_ID_SPACES = {"tasks": ("tasks", "tasks_archive"), "tasks_archive": ("tasks", "tasks_archive")}
+_SHARED_ID_MAPS = {"archived_task": "task"}
+
+
+def _columns(conn, table):
+    """
+    (name, notnull, default) je Spalte.
+    """
+    return [(r[1], bool(r[3]), r[4]) for r in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def export_records(db_name, user_id):
+    """
+    Alle Datensätze des Users als Dicts mit "type"; die alten IDs bleiben in "id"
+    stehen, damit der Import die Verweise auflösen kann.
+    """
+    with db.connection(db_name) as conn:
+        conn.execute("BEGIN")  # ein Snapshot für den ganzen Export
+        yield {
+            "type": "header",
+            "format": FORMAT_VERSION,
+            "schema_version": migrations.schema_version(conn),
+            "exported_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        for record_type, (table, where, _) in RECORD_TYPES.items():
+            order = _EXPORT_ORDER.get(table, "id")
+            cursor = conn.execute(f"SELECT * FROM {table} WHERE {where} ORDER BY {order}", {"user_id": user_id})
+            names = [d[0] for d in cursor.description]
+            while True:
+                rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    record = {"type": record_type}
+                    record.update((k, v.hex() if isinstance(v, bytes) else v)
+                                  for k, v in zip(names, row) if k not in ("user_id", "updated_at"))
+                    yield record
+        conn.rollback()
+
+
+def export_ndjson(db_name, user_id):
+    for record in export_records(db_name, user_id):
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def export_json(db_name, user_id):
+    """
+    Dieselben Datensätze als ein JSON-Array, ebenfalls gestreamt.
+    """
+    separator = "[\n"
+    for record in export_records(db_name, user_id):
+        yield separator + json.dumps(record, ensure_ascii=False)
+        separator = ",\n"
+    yield "\n]\n" if separator != "[\n" else "[]\n"
+
+
+def _read_records(stream):
+    """
+    Liest Datensätze aus einer Textdatei: NDJSON zeilenweise, ein JSON-Array
+    (beginnt mit "[") Element für Element. Liefert (zeilennummer, dict); beim
+    Array zählt die Nummer die Elemente.
+    """
+    first = stream.read(1)
+    while first.isspace():
+        first = stream.read(1)
+    if first == "[":
+        yield from _read_array(stream)
+        return
+
+    pending = first
+    for number, line in enumerate(stream, start=1):
+        line, pending = pending + line, ""
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Zeile {number}: kein gültiges JSON ({e.msg})")
+
+
+def _read_array(stream):
+    """
+    Dekodiert die Elemente eines JSON-Arrays (nach dem "[") mit raw_decode aus
+    einem Puffer, der in READ_SIZE-Stücken nachgelesen wird – im Speicher steht
+    höchstens ein Stück plus ein Datensatz.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    number, expect_value = 0, True
+
+    def more():
+        nonlocal buffer, pos, eof
+        chunk = stream.read(READ_SIZE)
+        buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise ValueError(f"Zeile {number}: JSON-Array nicht abgeschlossen")
+            more()
+            continue
+        char = buffer[pos]
+        if char == "]" and (number == 0 or not expect_value):
+            if buffer[pos + 1:].strip() or stream.read(READ_SIZE).strip():
+                raise ValueError(f"Zeile {number}: Daten nach dem Ende des JSON-Arrays")
+            return
+        if not expect_value:
+            if char != ",":
+                raise ValueError(f"Zeile {number + 1}: \",\" oder \"]\" erwartet")
+            pos += 1
+            expect_value = True
+            continue
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ValueError(f"Zeile {number + 1}: kein gültiges JSON ({e.msg})")
+            more()
+            continue
+        if end == len(buffer) and not eof:
+            # Eine Zahl oder ein Literal könnte im nächsten Stück weitergehen
+            more()
+            continue
+        number += 1
+        pos, expect_value = end, False
+        yield number, record
+
+
+def validate(conn, stream):
+    """
+    Prüft die ganze Datei, bevor irgendetwas geschrieben wird.
+    Wirft ValueError mit Zeilennummer beim ersten Fehler; liefert die Anzahl je Typ
+    (übersprungene Datensätze gemeinsamer Tabellen unter "skipped").
+    """
+    required = {
+        record_type: {name for name, notnull, default in _columns(conn, table)
+                      if notnull and default is None and name not in _SKIPPED_COLUMNS}
+        for record_type, (table, _, _) in RECORD_TYPES.items()
+    }
+    counts = {}
+    for number, record in _read_records(stream):
+        if not isinstance(record, dict):
+            raise ValueError(f"Zeile {number}: Datensatz muss ein Objekt sein")
+        record_type = record.get("type")
+        if record_type == "header":
+            if record.get("format") != FORMAT_VERSION:
+                raise ValueError(f"Zeile {number}: unbekanntes Exportformat {record.get('format')!r}")
+            continue
+        if record_type in _SHARED_TYPES:
+            counts["skipped"] = counts.get("skipped", 0) + 1
+            continue
+        if record_type not in RECORD_TYPES:
+            raise ValueError(f"Zeile {number}: unbekannter Typ {record_type!r}")
+        missing = [name for name in required[record_type] if record.get(name) is None]
+        if missing:
+            raise ValueError(f"Zeile {number}: {record_type} ohne {', '.join(sorted(missing))}")
+        for column in ("id", *RECORD_TYPES[record_type][2]):
+            if record.get(column) is not None and not isinstance(record[column], int):
+                raise ValueError(f"Zeile {number}: {column} muss eine Zahl sein")
+        for column in _BLOB_COLUMNS.get(RECORD_TYPES[record_type][0], ()):
+            try:
+                bytes.fromhex(record.get(column) or "")
+            except (TypeError, ValueError):
+                raise ValueError(f"Zeile {number}: {column} muss ein Hex-String sein")
+        counts[record_type] = counts.get(record_type, 0) + 1
+    return counts
+
+
+def import_records(db_name, user_id, stream, chunk_size=IMPORT_CHUNK):
+    """
+    Importiert einen Export für user_id. stream ist eine Textdatei, die zweimal
+    gelesen wird (Prüfen, dann Schreiben) – muss also seek(0) können.
+
+    Liefert eine Statistik: records, by_type, skipped (gemeinsame Tabellen aus
+    älteren Exporten), seconds, records_per_second.
+    Wirft ValueError, wenn die Datei ungültig ist; dann wurde nichts geschrieben.
+    """
+    migrations.migrate(db_name)
+    started = time.perf_counter()
+    with db.connection(db_name, write=True) as conn:
+        counts = validate(conn, stream)
+        stream.seek(0)
+        importer = _Importer(conn, user_id, chunk_size)
+        for _, record in _read_records(stream):
+            if record["type"] != "header" and record["type"] not in _SHARED_TYPES:
+                importer.add(record["type"], record)
+        importer.finish()
+    events.notify()
+
+    seconds = time.perf_counter() - started
+    skipped = counts.pop("skipped", 0)
+    total = sum(counts.values())
+    return {
+        "records": total,
+        "by_type": counts,
+        "skipped": skipped,
+        "seconds": round(seconds, 3),
+        "records_per_second": round(total / seconds) if seconds else total,
+    }
+
+
+class _Importer:
+    def __init__(self, conn, user_id, chunk_size):
+        self.conn = conn
+        self.user_id = user_id
+        self.chunk_size = chunk_size
+        self.id_maps = {record_type: {} for record_type in RECORD_TYPES}
+        for record_type, owner in _SHARED_ID_MAPS.items():
+            self.id_maps[record_type] = self.id_maps[owner]
+        self.pending_parents = {}  # Typ -> [(neue id, alte parent_id)] für Eltern, die erst später kommen
+        self.columns, self.has_id, self.has_user = {}, {}, {}
+        for record_type, (table, _, _) in RECORD_TYPES.items():
+            names = [name for name, _, _ in _columns(conn, table)]
+            self.columns[record_type] = [name for name in names if name not in _SKIPPED_COLUMNS]
+            self.has_id[record_type] = "id" in names
+            self.has_user[record_type] = "user_id" in names
+        self.buffer = []
+        self.buffer_type = None
+
+    def add(self, record_type, record):
+        if record_type != self.buffer_type or len(self.buffer) >= self.chunk_size:
+            self.flush()
+            self.buffer_type = record_type
+        self.buffer.append(record)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        record_type, records = self.buffer_type, self.buffer
+        self.buffer = []
+        table, _, references = RECORD_TYPES[record_type]
+        columns = self.columns[record_type]
+        has_id, has_user = self.has_id[record_type], self.has_user[record_type]
+
+        tracked = table in CHANGE_TRACKED_TABLES
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Neue IDs selbst vergeben – innerhalb der Schreibsperre kollidiert nichts.
+            # sqlite_sequence zählt mit, damit IDs gelöschter Zeilen (und ihre Tombstones
+            # im change_log) nicht wiederverwendet werden, wie bei AUTOINCREMENT üblich.
+            next_id = first_id = None
+            if has_id:
+                space = _ID_SPACES.get(table, (table,))
+                candidates = [f"(SELECT MAX(id) FROM {t})" for t in space]
+                candidates.append(f"(SELECT seq FROM sqlite_sequence WHERE name = '{space[0]}')")
+                next_id = first_id = self.conn.execute(
+                    "SELECT MAX(" + ", ".join(f"COALESCE({c}, 0)" for c in candidates) + ") + 1"
+                ).fetchone()[0]
+            changed_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+            rows = []
+            for record in records:
+                values = {name: record.get(name) for name in columns}
+                for column, target in references.items():
+                    old = record.get(column)
+                    if old is None:
+                        continue
+                    new = self.id_maps[target].get(old)
+                    if new is None and target == record_type:
+                        # Elternteil kommt erst später – am Ende nachtragen
+                        values[column] = None
+                        self.pending_parents.setdefault(record_type, []).append((next_id, old))
+                    else:
+                        values[column] = new
+                for column in _BLOB_COLUMNS.get(table, ()):
+                    if values[column] is not None:
+                        values[column] = bytes.fromhex(values[column])
+                if table == "habit_years" and values["habit_id"] is None:
+                    # Bitset einer Gewohnheit, die nicht in der Datei steht
+                    continue
+                row = [values[name] for name in columns]
+                if has_id:
+                    if record.get("id") is not None:
+                        self.id_maps[record_type][record["id"]] = next_id
+                    row.insert(0, next_id)
+                    next_id += 1
+                if has_user:
+                    row.append(self.user_id)
+                if tracked:
+                    row.append(changed_at)
+                rows.append(row)
+
+            names = ((["id"] if has_id else []) + columns + (["user_id"] if has_user else [])
+                     + (["updated_at"] if tracked else []))
+            placeholders = ", ".join("?" * len(names))
+            if table == "habit_years":
+                # Das Jahr aus der Datei ersetzt den vorhandenen Stand
+                sql = f"""
+                    INSERT INTO habit_years ({", ".join(names)}) VALUES ({placeholders})
+                    ON CONFLICT(habit_id, year) DO UPDATE SET bits = excluded.bits
+                """
+            elif table == "habit_definitions":
+                # Gleichnamige Gewohnheit des Users bleibt, beginnt aber nicht später als die aus der Datei
+                sql = f"""
+                    INSERT INTO habit_definitions ({", ".join(names)}) VALUES ({placeholders})
+                    ON CONFLICT(user_id, name) DO UPDATE SET start_date = MIN(start_date, excluded.start_date)
+                """
+            elif table in ("secret_lists", "recurring_task_skips"):
+                # Name bzw. (Regel, Datum) sind eindeutig – Vorhandenes bleibt
+                sql = f"INSERT OR IGNORE INTO {table} ({', '.join(names)}) VALUES ({placeholders})"
+            else:
+                sql = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({placeholders})"
+            if tracked:
+                self.conn.execute("INSERT INTO bulk_load VALUES (1)")
+            self.conn.executemany(sql, rows)
+            if table == "habit_definitions":
+                # Schon vorhandene Gewohnheiten gleichen Namens übernehmen die Jahre aus der Datei
+                existing = {row["name"]: row["id"] for row in self.conn.execute("""
+                    SELECT name, id FROM habit_definitions
+                    WHERE user_id = ? AND name IN (SELECT value FROM json_each(?))
+                """, (self.user_id, json.dumps([record["name"] for record in records])))}
+                for record in records:
+                    if record.get("id") is not None:
+                        self.id_maps[record_type][record["id"]] = existing[record["name"]]
+            if has_id and space[0] != table and next_id > first_id:
+                # Die AUTOINCREMENT-Tabelle des ID-Raums soll die neuen IDs nicht noch einmal vergeben
+                updated = self.conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+                                            (next_id - 1, space[0])).rowcount
+                if not updated:
+                    self.conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)",
+                                      (space[0], next_id - 1))
+            if tracked:
+                self.conn.execute(log_rows_sql(table, "OR REPLACE") + " WHERE id BETWEEN ? AND ?",
+                                  (first_id, next_id - 1))
+                if table in SEARCH_SOURCES:
+                    self.conn.execute(search_row_sql(table, table, "OR REPLACE")
+                                      + f" FROM {table} WHERE id BETWEEN ? AND ?", (first_id, next_id - 1))
+                self.conn.execute("DELETE FROM bulk_load")
+
+            self._bump()
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def finish(self):
+        self.flush()
+        if not any(self.pending_parents.values()):
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for record_type, pending in self.pending_parents.items():
+                table = RECORD_TYPES[record_type][0]
+                id_map = self.id_maps[record_type]
+                self.conn.executemany(
+                    f"UPDATE {table} SET parent_id = ? WHERE id = ?",
+                    [(id_map.get(old_parent), new_id) for new_id, old_parent in pending]
+                )
+            self._bump()
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _bump(self):
+        bump_data_version(self.conn, self.user_id)
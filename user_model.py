@@ -1,13 +1,13 @@
 # user_model.py
-import sqlite3
 from flask_login import UserMixin
 
+import db
+
 DATABASE = "tasks.db"
 
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+def get_db_connection(write=False):
+    # Request-gebundene Verbindung bzw. Pool-Verbindung, siehe db.py
+    return db.connection(DATABASE, write=write)
 
 class User(UserMixin):
     def __init__(self, id_, username, password_hash):
@@ -17,28 +17,26 @@ class User(UserMixin):
 
     @staticmethod
     def get(user_id):
-        conn = get_db_connection()
-        cur  = conn.cursor()
-        cur.execute(
-            "SELECT id, username, password_hash FROM users WHERE id = ?",
-            (user_id,)
-        )
-        row = cur.fetchone()
-        conn.close()
+        with get_db_connection() as conn:
+            cur  = conn.cursor()
+            cur.execute(
+                "SELECT id, username, password_hash FROM users WHERE id = ?",
+                (user_id,)
+            )
+            row = cur.fetchone()
         if not row:
             return None
         return User(row["id"], row["username"], row["password_hash"])
 
     @staticmethod
     def find_by_username(username):
-        conn = get_db_connection()
-        cur  = conn.cursor()
-        cur.execute(
-            "SELECT id, username, password_hash FROM users WHERE username = ?",
-            (username,)
-        )
-        row = cur.fetchone()
-        conn.close()
+        with get_db_connection() as conn:
+            cur  = conn.cursor()
+            cur.execute(
+                "SELECT id, username, password_hash FROM users WHERE username = ?",
+                (username,)
+            )
+            row = cur.fetchone()
         if not row:
             return None
         return User(row["id"], row["username"], row["password_hash"])